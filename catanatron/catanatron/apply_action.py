@@ -1,6 +1,6 @@
 import random
-from collections import defaultdict
-from typing import Dict
+from collections import defaultdict, namedtuple
+from typing import Dict, List, Tuple
 
 from catanatron.models.board import Board
 from catanatron.models.enums import (
@@ -20,7 +20,6 @@ from catanatron.models.decks import (
     SETTLEMENT_COST_FREQDECK,
     draw_from_listdeck,
     freqdeck_add,
-    freqdeck_can_draw,
     freqdeck_contains,
     freqdeck_draw,
     freqdeck_from_listdeck,
@@ -47,12 +46,12 @@ from catanatron.state_functions import (
     player_deck_replenish,
     player_freqdeck_subtract,
     player_deck_to_array,
-    player_key,
     player_num_resource_cards,
     player_resource_freqdeck_contains,
+    player_set_has_rolled,
 )
 from catanatron.models.player import Color
-from catanatron.models.enums import FastResource
+from catanatron.zobrist import ROBBER_KEYS, building_key, road_key
 
 
 def apply_action(
@@ -120,10 +119,177 @@ def apply_action(
     else:
         raise ValueError("Unknown ActionType " + str(action.action_type))
 
-    state.action_records.append(action_record)
+    state.append_action_record(action_record)
     return action_record
 
 
+ActionUndo = namedtuple(
+    "ActionUndo",
+    [
+        "action",
+        "flags",
+        "player_state_array",
+        "resource_freqdeck",
+        "development_listdeck",
+        "robber_coordinate",
+        "buildings_by_color",
+        "building",
+        "road",
+        "board",
+        "rng_state",
+    ],
+)
+ActionUndo.__doc__ = """
+Token returned by apply_action_with_undo. Holds the pieces of State that
+the given action may change, as they were before it was applied. Small
+pieces (hands, bank, prompt flags) are always snapshotted; board pieces
+only for the actions that touch the board, and the random stream only for
+the ones that draw from it (see RANDOM_ACTION_TYPES).
+"""
+
+# Actions that may draw from state.rng (dice and steals)
+RANDOM_ACTION_TYPES = frozenset([ActionType.ROLL, ActionType.MOVE_ROBBER])
+
+_LAZY_RNG = object()  # rng_state of states whose rng wasn't created yet
+
+
+def apply_action_with_undo(
+    state: State, action: Action, action_record: ActionRecord = None
+) -> Tuple[ActionRecord, ActionUndo]:
+    """Like apply_action, but also returns a token that unapply_action can use
+    to restore state to exactly how it was before. Allows searching by mutating
+    a single State in place instead of copying it for every trial action.
+
+    If apply_action raises, state is restored before re-raising.
+    """
+    undo = _build_undo(state, action)
+    try:
+        action_record = apply_action(state, action, action_record)
+    except Exception:
+        _restore_undo(state, undo)
+        raise
+    return action_record, undo
+
+
+def unapply_action(state: State, undo: ActionUndo):
+    """Reverts the action that produced the given undo token. Tokens must be
+    unapplied in reverse order of application."""
+    state.pop_action_record()
+    _restore_undo(state, undo)
+
+
+def _build_undo(state: State, action: Action) -> ActionUndo:
+    action_type = action.action_type
+    board = state.board
+    buildings_by_color = None
+    building = None
+    road = None
+    board_snapshot = None
+    if action_type == ActionType.BUILD_SETTLEMENT:
+        buildings_by_color = _copy_color_buildings(state, action.color)
+        building = board.buildings.get(action.value)
+        board_snapshot = board.snapshot(include_buildable_ids=True)
+    elif action_type == ActionType.BUILD_ROAD:
+        buildings_by_color = _copy_color_buildings(state, action.color)
+        road = board.roads.get(action.value)
+        board_snapshot = board.snapshot()
+    elif action_type == ActionType.BUILD_CITY:
+        buildings_by_color = _copy_color_buildings(state, action.color)
+        building = board.buildings.get(action.value)
+        board_snapshot = board.snapshot()
+    rng_state = None
+    if action_type in RANDOM_ACTION_TYPES:
+        rng_state = _LAZY_RNG if state._rng is None else state._rng.getstate()
+
+    return ActionUndo(
+        action=action,
+        flags=(
+            state.current_player_index,
+            state.current_turn_index,
+            state.current_prompt,
+            state.is_initial_build_phase,
+            state.is_discarding,
+            state.discard_counts.copy(),
+            state.is_moving_knight,
+            state.is_road_building,
+            state.free_roads_available,
+            state.is_resolving_trade,
+            state.current_trade,
+            state.acceptees,
+            state.num_turns,
+            state.zobrist,
+            state._forks,
+        ),
+        player_state_array=state.player_state_array.copy(),
+        resource_freqdeck=state.resource_freqdeck.copy(),
+        development_listdeck=(
+            state.development_listdeck.copy()
+            if action_type == ActionType.BUY_DEVELOPMENT_CARD
+            else None
+        ),
+        robber_coordinate=board.robber_coordinate,
+        buildings_by_color=buildings_by_color,
+        building=building,
+        road=road,
+        board=board_snapshot,
+        rng_state=rng_state,
+    )
+
+
+def _copy_color_buildings(state: State, color):
+    buildings = state.buildings_by_color[color]
+    return defaultdict(list, {key: value.copy() for key, value in buildings.items()})
+
+
+def _restore_undo(state: State, undo: ActionUndo):
+    (
+        state.current_player_index,
+        state.current_turn_index,
+        state.current_prompt,
+        state.is_initial_build_phase,
+        state.is_discarding,
+        state.discard_counts,
+        state.is_moving_knight,
+        state.is_road_building,
+        state.free_roads_available,
+        state.is_resolving_trade,
+        state.current_trade,
+        state.acceptees,
+        state.num_turns,
+        state.zobrist,
+        state._forks,
+    ) = undo.flags
+    if undo.rng_state is _LAZY_RNG:
+        state._rng = None  # recreated from seed, as it would have been
+    elif undo.rng_state is not None:
+        state.rng.setstate(undo.rng_state)
+    state.player_state_array = undo.player_state_array
+    state.resource_freqdeck = undo.resource_freqdeck
+    if undo.development_listdeck is not None:
+        state.development_listdeck = undo.development_listdeck
+
+    board = state.board
+    board.robber_coordinate = undo.robber_coordinate
+    action = undo.action
+    if undo.buildings_by_color is not None:
+        state.buildings_by_color[action.color] = undo.buildings_by_color
+    if action.action_type in (ActionType.BUILD_SETTLEMENT, ActionType.BUILD_CITY):
+        if undo.building is None:
+            board.buildings.pop(action.value, None)
+        else:
+            board.buildings[action.value] = undo.building
+    elif action.action_type == ActionType.BUILD_ROAD:
+        edge = action.value
+        if undo.road is None:
+            board.roads.pop(edge, None)
+            board.roads.pop((edge[1], edge[0]), None)
+        else:
+            board.roads[edge] = undo.road
+            board.roads[(edge[1], edge[0])] = undo.road
+    if undo.board is not None:
+        board.restore(undo.board)
+
+
 # ===== Apply Action Handlers =====
 def apply_end_turn(state: State, action: Action):
     player_clean_turn(state, action.color)
@@ -136,17 +302,17 @@ def apply_build_settlement(state: State, action: Action):
     node_id = action.value
     if state.is_initial_build_phase:
         state.board.build_settlement(action.color, node_id, True)
+        state.zobrist ^= building_key(action.color, SETTLEMENT, node_id)
         build_settlement(state, action.color, node_id, True)
         buildings = state.buildings_by_color[action.color][SETTLEMENT]
 
         # yield resources if second settlement
         is_second_house = len(buildings) == 2
         if is_second_house:
-            key = player_key(state, action.color)
             for tile in state.board.map.adjacent_tiles[node_id]:
                 if tile.resource != None:
                     freqdeck_draw(state.resource_freqdeck, 1, tile.resource)  # type: ignore
-                    state.player_state[f"{key}_{tile.resource}_IN_HAND"] += 1
+                    player_deck_replenish(state, action.color, tile.resource)
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.BUILD_INITIAL_ROAD
@@ -156,6 +322,7 @@ def apply_build_settlement(state: State, action: Action):
             road_color,
             road_lengths,
         ) = state.board.build_settlement(action.color, node_id, False)
+        state.zobrist ^= building_key(action.color, SETTLEMENT, node_id)
         build_settlement(state, action.color, node_id, False)
         state.resource_freqdeck = freqdeck_add(
             state.resource_freqdeck, SETTLEMENT_COST_FREQDECK
@@ -171,6 +338,7 @@ def apply_build_road(state: State, action: Action):
     edge = action.value
     if state.is_initial_build_phase:
         state.board.build_road(action.color, edge)
+        state.zobrist ^= road_key(action.color, edge)
         build_road(state, action.color, edge, True)
 
         # state.current_player_index depend on what index are we
@@ -196,6 +364,7 @@ def apply_build_road(state: State, action: Action):
             state.current_prompt = ActionPrompt.BUILD_INITIAL_SETTLEMENT
     elif state.is_road_building and state.free_roads_available > 0:
         result = state.board.build_road(action.color, edge)
+        state.zobrist ^= road_key(action.color, edge)
         previous_road_color, road_color, road_lengths = result
         build_road(state, action.color, edge, True)
         maintain_longest_road(state, previous_road_color, road_color, road_lengths)
@@ -211,6 +380,7 @@ def apply_build_road(state: State, action: Action):
             # state.current_prompt stays as PLAY
     else:
         result = state.board.build_road(action.color, edge)
+        state.zobrist ^= road_key(action.color, edge)
         previous_road_color, road_color, road_lengths = result
         build_road(state, action.color, edge, False)
         maintain_longest_road(state, previous_road_color, road_color, road_lengths)
@@ -223,6 +393,8 @@ def apply_build_road(state: State, action: Action):
 def apply_build_city(state: State, action: Action):
     node_id = action.value
     state.board.build_city(action.color, node_id)
+    state.zobrist ^= building_key(action.color, SETTLEMENT, node_id)
+    state.zobrist ^= building_key(action.color, CITY, node_id)
     build_city(state, action.color, node_id)
     state.resource_freqdeck = freqdeck_add(
         state.resource_freqdeck, CITY_COST_FREQDECK
@@ -242,6 +414,8 @@ def apply_buy_development_card(state: State, action: Action, action_record=None)
 
     if action_record is None:
         card = state.development_listdeck.pop()  # already shuffled
+    elif state.development_listdeck[-1] == action_record.result:
+        card = state.development_listdeck.pop()  # replaying, keep the deck order
     else:
         card = action_record.result
         draw_from_listdeck(state.development_listdeck, 1, card)
@@ -258,10 +432,9 @@ def apply_buy_development_card(state: State, action: Action, action_record=None)
 
 
 def apply_roll(state: State, action: Action, action_record=None):
-    key = player_key(state, action.color)
-    state.player_state[f"{key}_HAS_ROLLED"] = True
+    player_set_has_rolled(state, action.color)
 
-    dices = action_record.result if action_record is not None else roll_dice()
+    dices = action_record.result if action_record is not None else roll_dice(state.rng)
     number = dices[0] + dices[1]
     action = Action(action.color, action.action_type, dices)
 
@@ -289,13 +462,13 @@ def apply_roll(state: State, action: Action, action_record=None):
             state.current_prompt = ActionPrompt.MOVE_ROBBER
             state.is_moving_knight = True
     else:
-        payout, _ = yield_resources(state.board, state.resource_freqdeck, number)
+        bank = state.resource_freqdeck
+        payout, _ = yield_resources(state.board, bank, number)
         for color, resource_freqdeck in payout.items():
             # Atomically add to player's hand and remove from bank
             player_freqdeck_add(state, color, resource_freqdeck)
-            state.resource_freqdeck = freqdeck_subtract(
-                state.resource_freqdeck, resource_freqdeck
-            )
+            for i, amount in enumerate(resource_freqdeck):
+                bank[i] -= amount
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.PLAY_TURN
@@ -352,6 +525,8 @@ def apply_move_robber(state: State, action: Action, action_record=None):
         )
         player_deck_draw(state, robbed_color, robbed_resource)
         player_deck_replenish(state, action.color, robbed_resource)
+    state.zobrist ^= ROBBER_KEYS[state.board.robber_coordinate]
+    state.zobrist ^= ROBBER_KEYS[coordinate]
     state.board.robber_coordinate = coordinate
 
     # state.current_player_index stays the same
@@ -393,10 +568,9 @@ def apply_play_monopoly(state: State, action: Action):
         raise ValueError("Player cant play monopoly now")
     for color in state.colors:
         if not color == action.color:
-            key = player_key(state, color)
-            number_of_cards_to_steal = state.player_state[
-                f"{key}_{mono_resource}_IN_HAND"
-            ]
+            number_of_cards_to_steal = player_num_resource_cards(
+                state, color, mono_resource
+            )
             freqdeck_replenish(cards_stolen, number_of_cards_to_steal, mono_resource)
             player_deck_draw(state, color, mono_resource, number_of_cards_to_steal)
     player_freqdeck_add(state, action.color, cards_stolen)
@@ -524,13 +698,16 @@ def apply_cancel_trade(state: State, action: Action):
 
 
 # ===== Helper Functions =====
-def roll_dice():
+def roll_dice(rng=random):
     """Yields two random numbers
 
+    Args:
+        rng (random.Random, optional): Random stream to draw from.
+
     Returns:
         tuple[int, int]: 2-tuple of random numbers from 1 to 6 inclusive.
     """
-    return (random.randint(1, 6), random.randint(1, 6))
+    return (rng.randint(1, 6), rng.randint(1, 6))
 
 
 def yield_resources(board: Board, resource_freqdeck, number):
@@ -547,41 +724,25 @@ def yield_resources(board: Board, resource_freqdeck, number):
             Second is an array of resources that couldn't be yieleded
             because they depleted.
     """
-    intented_payout: Dict[Color, Dict[FastResource, int]] = defaultdict(
-        lambda: defaultdict(int)
-    )
-    resource_totals: Dict[FastResource, int] = defaultdict(int)
-    for coordinate, tile in board.map.land_tiles.items():
-        if tile.number != number or board.robber_coordinate == coordinate:
+    robber_tile_id = board.map.land_tiles[board.robber_coordinate].id
+    payout: Dict[Color, List[int]] = dict()
+    resource_totals = [0, 0, 0, 0, 0]
+    for tile_id, _, color, resource_index, amount in board.payouts.get(number, ()):
+        if tile_id == robber_tile_id:
             continue  # doesn't yield
-
-        for node_id in tile.nodes.values():
-            building = board.buildings.get(node_id, None)
-            assert tile.resource is not None
-            if building is None:
-                continue
-            elif building[1] == SETTLEMENT:
-                intented_payout[building[0]][tile.resource] += 1
-                resource_totals[tile.resource] += 1
-            elif building[1] == CITY:
-                intented_payout[building[0]][tile.resource] += 2
-                resource_totals[tile.resource] += 2
+        resource_totals[resource_index] += amount
+        freqdeck = payout.get(color)
+        if freqdeck is None:
+            freqdeck = payout[color] = [0, 0, 0, 0, 0]
+        freqdeck[resource_index] += amount
 
     # for each resource, check enough in deck to yield.
     depleted = []
-    for resource in RESOURCES:
-        total = resource_totals[resource]
-        if not freqdeck_can_draw(resource_freqdeck, total, resource):
+    for i, resource in enumerate(RESOURCES):
+        if resource_totals[i] > resource_freqdeck[i]:
             depleted.append(resource)
-
-    # build final data color => freqdeck structure
-    payout = {}
-    for player, player_payout in intented_payout.items():
-        payout[player] = [0, 0, 0, 0, 0]
-
-        for resource, count in player_payout.items():
-            if resource not in depleted:
-                freqdeck_replenish(payout[player], count, resource)
+            for freqdeck in payout.values():
+                freqdeck[i] = 0
 
     return payout, depleted
 
@@ -41,7 +41,10 @@ CLI_PLAYERS = [
     CliPlayer(
         "M",
         "MCTSPlayer",
-        "Decides according to the MCTS algorithm. First param is NUM_SIMULATIONS.",
+        "Decides according to the MCTS algorithm. "
+        + "Params are NUM_SIMULATIONS, PRUNNING, WORKERS, PARALLEL_MODE (root or tree), "
+        + "TIME_BUDGET_MS, STOP_EARLY, PROGRESSIVE_WIDENING, ROLLOUT_PLIES (or turn), "
+        + "VALUE_FN, ROLLOUT_MIX.",
         MCTSPlayer,
     ),
     CliPlayer(
@@ -275,6 +275,9 @@ def play_batch_core(num_games, players, game_config, accumulators=[]):
         game.play(accumulators)
         yield game
 
+    for player in players:
+        player.close()  # e.g. stop worker processes kept between decisions
+
     for accumulator in accumulators:
         if isinstance(accumulator, SimulationAccumulator):
             accumulator.after_all()
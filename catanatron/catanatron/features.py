@@ -1,7 +1,6 @@
 from typing import Any, List, Literal, Tuple
 import functools
 from collections import Counter
-import networkx as nx
 
 from catanatron.models.decks import freqdeck_count
 from catanatron.state_functions import (
@@ -10,7 +9,8 @@ from catanatron.state_functions import (
     player_num_dev_cards,
     player_num_resource_cards,
 )
-from catanatron.models.board import STATIC_GRAPH, get_edges, get_node_distances
+from catanatron.models.board import get_node_distances
+from catanatron.models.topology import NODE_NEIGHBORS, get_edges
 from catanatron.models.map import NUM_TILES, CatanMap, build_map, number_probability
 from catanatron.models.player import Color, SimplePlayer
 from catanatron.models.enums import (
@@ -307,7 +307,7 @@ def iter_level_nodes(enemy_nodes, enemy_roads, num_roads, zero_nodes):
 
             # here we can assume node is empty or owned
             expandable = []
-            for neighbor_id in STATIC_GRAPH.neighbors(node_id):
+            for neighbor_id in NODE_NEIGHBORS[node_id]:
                 edge = (node_id, neighbor_id)
                 can_follow_edge = edge not in enemy_roads
                 if can_follow_edge:
@@ -380,6 +380,32 @@ def count_production(nodes, catan_map):
     return production
 
 
+def bfs_edges(edges, source, depth_limit, sort_neighbors):
+    """Edges of a breadth-first search from source that only walks the given
+    (both-orientation) edges. Yields in the same order as networkx's
+    bfs_edges over the equivalent edge subgraph.
+    """
+    seen = {source}
+    depth = 0
+
+    def neighbors(node_id):
+        return sort_neighbors(
+            n for n in NODE_NEIGHBORS[node_id] if (node_id, n) in edges
+        )
+
+    next_parents_children = [(source, neighbors(source))]
+    while next_parents_children and depth < depth_limit:
+        this_parents_children = next_parents_children
+        next_parents_children = []
+        for parent, children in this_parents_children:
+            for child in children:
+                if child not in seen:
+                    seen.add(child)
+                    next_parents_children.append((child, neighbors(child)))
+                    yield parent, child
+        depth += 1
+
+
 def expansion_features(game: Game, p0_color: Color):
     MAX_EXPANSION_DISTANCE = 3  # exclusive
 
@@ -389,7 +415,8 @@ def expansion_features(game: Game, p0_color: Color):
     empty_edges = set(get_edges(game.state.board.map.land_nodes))
     for i, color in iter_players(game.state.colors, p0_color):
         empty_edges.difference_update(get_player_buildings(game.state, color, ROAD))
-    searchable_subgraph = STATIC_GRAPH.edge_subgraph(empty_edges)
+    searchable_edges = empty_edges | {(b, a) for a, b in empty_edges}
+    searchable_nodes = {node_id for edge in empty_edges for node_id in edge}
 
     board_buildable_node_ids = game.state.board.buildable_node_ids(
         p0_color, True
@@ -419,11 +446,11 @@ def expansion_features(game: Game, p0_color: Color):
                         production, dis_res_prod[0][resource]
                     )
 
-            if node_id not in searchable_subgraph.nodes():
+            if node_id not in searchable_nodes:
                 continue  # must be internal node, no need to explore
 
-            bfs_iteration = nx.bfs_edges(
-                searchable_subgraph,
+            bfs_iteration = bfs_edges(
+                searchable_edges,
                 node_id,
                 depth_limit=MAX_EXPANSION_DISTANCE - 1,
                 sort_neighbors=skip_blocked_by_enemy,
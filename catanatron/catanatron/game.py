@@ -5,19 +5,36 @@ Contains Game class which is a thin-wrapper around the State class.
 import uuid
 import random
 import sys
-from typing import Sequence, Union, Optional
+from typing import Callable, List, Sequence, Tuple, Union, Optional
 
 from catanatron.models.actions import generate_playable_actions
 from catanatron.models.enums import Action, ActionPrompt, ActionRecord, ActionType
 from catanatron.state import State
-from catanatron.apply_action import apply_action
-from catanatron.state_functions import player_key, player_has_rolled
+from catanatron.apply_action import (
+    ActionUndo,
+    apply_action,
+    apply_action_with_undo,
+    unapply_action,
+)
+from catanatron.state_functions import get_actual_victory_points, player_has_rolled
 from catanatron.models.map import CatanMap, NumberPlacement
 from catanatron.models.player import Color, Player
 
 # To timeout RandomRobots from getting stuck...
 TURNS_LIMIT = 1000
 
+# Only these actions can change someone's victory points (longest road and
+#   largest army included), so Game.play only looks for a winner after them.
+VICTORY_POINT_ACTION_TYPES = frozenset(
+    [
+        ActionType.BUILD_SETTLEMENT,
+        ActionType.BUILD_CITY,
+        ActionType.BUILD_ROAD,
+        ActionType.BUY_DEVELOPMENT_CARD,
+        ActionType.PLAY_KNIGHT_CARD,
+    ]
+)
+
 
 def is_valid_action(playable_actions, state: State, action: Action) -> bool:
     """True if its a valid action right now. An action is valid
@@ -90,6 +107,7 @@ class Game:
     Attributes:
         state (State): Current game state.
         playable_actions (List[Action]): List of playable actions by current player.
+            Generated when first read after each action.
     """
 
     def __init__(
@@ -113,9 +131,9 @@ class Game:
             catan_map (CatanMap, optional): Map to use. Defaults to None.
             initialize (bool, optional): Whether to initialize. Defaults to True.
         """
+        self._playable_actions: Optional[List[Action]] = None
         if initialize:
             self.seed = seed if seed is not None else random.randrange(sys.maxsize)
-            random.seed(self.seed)
 
             self.id = str(uuid.uuid4())
             self.vps_to_win = vps_to_win
@@ -126,8 +144,24 @@ class Game:
                 discard_limit=discard_limit,
                 friendly_robber=friendly_robber,
                 number_placement=number_placement,
+                seed=self.seed,
             )
-            self.playable_actions = generate_playable_actions(self.state)
+
+    @property
+    def playable_actions(self) -> List[Action]:
+        if self._playable_actions is None:
+            self._playable_actions = generate_playable_actions(self.state)
+        return self._playable_actions
+
+    @playable_actions.setter
+    def playable_actions(self, playable_actions: List[Action]):
+        self._playable_actions = playable_actions
+
+    def __setstate__(self, state):
+        # games pickled before playable_actions was generated lazily
+        if "playable_actions" in state:
+            state["_playable_actions"] = state.pop("playable_actions")
+        self.__dict__.update(state)
 
     def play(self, accumulators=[], decide_fn=None):
         """Executes game until a player wins or exceeded TURNS_LIMIT.
@@ -144,11 +178,16 @@ class Game:
         """
         for accumulator in accumulators:
             accumulator.before(self)
-        while self.winning_color() is None and self.state.num_turns < TURNS_LIMIT:
-            self.play_tick(decide_fn=decide_fn, accumulators=accumulators)
+        winning_color = self.winning_color()
+        while winning_color is None and self.state.num_turns < TURNS_LIMIT:
+            action_record = self.play_tick(
+                decide_fn=decide_fn, accumulators=accumulators
+            )
+            if action_record.action.action_type in VICTORY_POINT_ACTION_TYPES:
+                winning_color = self.winning_color()
         for accumulator in accumulators:
             accumulator.after(self)
-        return self.winning_color()
+        return winning_color
 
     def play_tick(self, decide_fn=None, accumulators=[]):
         """Advances game by one ply (player decision).
@@ -162,11 +201,14 @@ class Game:
         """
         # Ask Player for action
         player = self.state.current_player()
-        action = (
-            decide_fn(player, self, self.playable_actions)
-            if decide_fn is not None
-            else player.decide(self, self.playable_actions)
-        )
+        validate_action = True
+        if decide_fn is not None:
+            action = decide_fn(player, self, self.playable_actions)
+        elif player.samples_actions:
+            action = player.sample_action(self)
+            validate_action = False  # sampled among playable actions
+        else:
+            action = player.decide(self, self.playable_actions)
 
         # Call accumulator.step here, because we want game_before_action, action
         if len(accumulators) > 0:
@@ -174,26 +216,93 @@ class Game:
                 accumulator.step(self, action)
 
         # Apply Action, and do Move Generation
-        return self.execute(action)
+        return self.execute(action, validate_action)
+
+    def advance_until(
+        self,
+        until: Union[Color, Callable[["Game"], bool]],
+        max_ticks: Optional[int] = None,
+        decide_fn=None,
+    ) -> List[ActionRecord]:
+        """Plays ticks until the given color must decide (or the given
+        predicate of this game is true), the game ends or exceeds TURNS_LIMIT,
+        or max_ticks ticks were played. Useful to fast-forward bot plies.
+
+        Args:
+            until (Union[Color, Callable[[Game], bool]]): Color to stop at, or
+                function that returns True where to stop.
+            max_ticks (int, optional): Most ticks to play. Defaults to None (no limit).
+            decide_fn (function, optional): See .play_tick. Defaults to None.
+
+        Returns:
+            List[ActionRecord]: records of the executed actions, in order
+        """
+        state = self.state
+        records = []
+        while (
+            len(records) != max_ticks
+            and self.winning_color() is None
+            and state.num_turns < TURNS_LIMIT
+        ):
+            if isinstance(until, Color):
+                if state.current_color() == until:
+                    break
+            elif until(self):
+                break
+            records.append(self.play_tick(decide_fn))
+        return records
 
     def execute(
         self,
-        action: Action,
+        action: Union[Action, int],
         validate_action: bool = True,
         action_record: ActionRecord = None,
     ) -> ActionRecord:
-        """Internal call that carries out decided action by player"""
-        if validate_action and not is_valid_action(
-            self.playable_actions, self.state, action
-        ):
-            raise ValueError(
-                f"{action} not playable right now. playable_actions={self.playable_actions}"
-            )
+        """Internal call that carries out decided action by player. Action can
+        also be given by its id in self.state.action_table."""
+        if isinstance(action, int):
+            action = self.state.action_table.from_id(action)
+        if validate_action:
+            self._validate_action(action)
 
         action_record = apply_action(self.state, action, action_record)
-        self.playable_actions = generate_playable_actions(self.state)
+        self._playable_actions = None
         return action_record
 
+    def execute_with_undo(
+        self,
+        action: Union[Action, int],
+        validate_action: bool = True,
+        action_record: ActionRecord = None,
+    ) -> Tuple[ActionRecord, Tuple[ActionUndo, List[Action]]]:
+        """Like .execute, but also returns a token to pass to .undo to revert
+        this game to how it was before the action. Tokens must be undone in
+        reverse order. Useful for search without copying the game per action.
+        """
+        if isinstance(action, int):
+            action = self.state.action_table.from_id(action)
+        if validate_action:
+            self._validate_action(action)
+
+        action_record, state_undo = apply_action_with_undo(
+            self.state, action, action_record
+        )
+        undo = (state_undo, self._playable_actions)
+        self._playable_actions = None
+        return action_record, undo
+
+    def undo(self, undo: Tuple[ActionUndo, List[Action]]):
+        """Reverts the action that returned the given .execute_with_undo token"""
+        state_undo, playable_actions = undo
+        unapply_action(self.state, state_undo)
+        self.playable_actions = playable_actions
+
+    def _validate_action(self, action: Action):
+        if not is_valid_action(self.playable_actions, self.state, action):
+            raise ValueError(
+                f"{action} not playable right now. playable_actions={self.playable_actions}"
+            )
+
     def winning_color(self) -> Union[Color, None]:
         """Gets winning color
 
@@ -202,15 +311,20 @@ class Game:
         """
         result = None
         for color in self.state.colors:
-            key = player_key(self.state, color)
-            if (
-                self.state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"]
-                >= self.vps_to_win
-            ):
+            if get_actual_victory_points(self.state, color) >= self.vps_to_win:
                 result = color
 
         return result
 
+    @property
+    def rng(self) -> random.Random:
+        """This game's random stream. See State.rng."""
+        return self.state.rng
+
+    def state_hash(self) -> int:
+        """64-bit Zobrist hash of the current position. See State.hash."""
+        return self.state.hash
+
     def copy(self) -> "Game":
         """Creates a copy of this Game, that can be modified without
         repercusions on this one (useful for simulations).
@@ -224,5 +338,33 @@ class Game:
         game_copy.vps_to_win = self.vps_to_win
         game_copy.friendly_robber = self.friendly_robber
         game_copy.state = self.state.copy()
-        game_copy.playable_actions = self.playable_actions
+        game_copy._playable_actions = self._playable_actions
         return game_copy
+
+    def to_bytes(self) -> bytes:
+        """Compact binary snapshot of this game (players aside), e.g. to store
+        it or send it to another process. See catanatron/serialization.py.
+
+        Returns:
+            bytes: Snapshot, to load with Game.from_bytes.
+        """
+        from catanatron.serialization import game_to_bytes
+
+        return game_to_bytes(self)
+
+    @staticmethod
+    def from_bytes(data: bytes, players: Optional[Sequence[Player]] = None) -> "Game":
+        """Loads a game from Game.to_bytes.
+
+        Args:
+            data (bytes): Snapshot.
+            players (List[Player], optional): Players to seat, matched by color.
+                Defaults to players that can't decide (enough to inspect the
+                game or to play it with a decide_fn).
+
+        Returns:
+            Game: Game equal to the one snapshotted.
+        """
+        from catanatron.serialization import game_from_bytes
+
+        return game_from_bytes(data, players)
@@ -74,6 +74,15 @@ def get_action_array(
     return actions_array
 
 
+@lru_cache(maxsize=None)
+def get_action_index(
+    player_colors: Tuple[Color], map_type: Literal["BASE", "TOURNAMENT", "MINI"]
+):
+    """Inverse of get_action_array: (action_type, value) to its index"""
+    actions_array = get_action_array(player_colors, map_type)
+    return {action: i for i, action in enumerate(actions_array)}
+
+
 ACTION_TYPES = [i for i in ActionType]
 
 
@@ -87,8 +96,8 @@ def to_action_space(
     map_type: Literal["BASE", "TOURNAMENT", "MINI"],
 ):
     """maps action to space_action equivalent integer"""
-    actions_array = get_action_array(player_colors, map_type)
-    return actions_array.index((action.action_type, action.value))
+    action_index = get_action_index(player_colors, map_type)
+    return action_index[(action.action_type, action.value)]
 
 
 def from_action_space(
@@ -167,10 +167,9 @@ class CatanatronEnv(gym.Env):
     ):
         super().reset(seed=seed)
 
-        if seed is not None:
-            # Ensure map generation uses the same seed as the game.
-            random.seed(seed)
-        catan_map = build_map(self.map_type)
+        # Ensure map generation is reproducible from the same seed as the game.
+        rng = random.Random(seed) if seed is not None else random
+        catan_map = build_map(self.map_type, rng=rng)
         for player in self.players:
             player.reset_state()
         self.game = Game(
@@ -202,11 +201,7 @@ class CatanatronEnv(gym.Env):
         return np.array([sample[i] for i in self.features], dtype=self.dtype)
 
     def _advance_until_p0_decision(self):
-        while (
-            self.game.winning_color() is None
-            and self.game.state.current_color() != self.p0.color
-        ):
-            self.game.play_tick()  # will play bot
+        self.game.advance_until(self.p0.color)  # will play bots
 
     def render(self):
         """Render the game state.
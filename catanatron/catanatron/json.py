@@ -86,7 +86,7 @@ class GameEncoder(json.JSONEncoder):
                 "nodes": nodes,
                 "edges": list(edges.values()),
                 "action_records": [self.default(a) for a in obj.state.action_records],
-                "player_state": obj.state.player_state,
+                "player_state": dict(obj.state.player_state),
                 "colors": obj.state.colors,
                 "bot_colors": list(
                     map(
@@ -0,0 +1,125 @@
+"""
+Compact, persistent log of the ActionRecords of a game.
+
+Each entry of an ActionLog is one int that packs the action's id (see
+models/action_table.py) with a code for its result. The log is a chain of
+nodes that point to their parent, and appending returns a new node, so
+copies of a State share every entry logged before the copy was made and
+copying is O(1) however long the game is.
+
+ActionRecord objects are only built when someone asks for them (see
+ActionLog.records). Records that can't be packed (player-to-player trades,
+unexpected results) are stored as they are.
+"""
+
+from typing import List, Optional
+
+from catanatron.models.action_table import ActionTable
+from catanatron.models.enums import DEVELOPMENT_CARDS, RESOURCES, ActionRecord
+
+# Every result apply_action produces: nothing, dice, a resource or a dev card.
+RESULTS = [
+    None,
+    *[(a, b) for a in range(1, 7) for b in range(1, 7)],
+    *RESOURCES,
+    *DEVELOPMENT_CARDS,
+]
+RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+NUM_RESULTS = len(RESULTS)
+# Codes NUM_RESULTS and up also put the result in the action's value, as
+#   apply_action does for rolls and bought cards.
+NUM_CODES = 2 * NUM_RESULTS
+
+
+class ActionLog:
+    """Immutable log of ActionRecords. append and pop return new logs that
+    share this one's entries.
+
+    Attributes:
+        action_table (ActionTable): Decodes packed entries.
+        parent (Optional[ActionLog]): Log without the last entry (None if empty).
+        entry (Union[int, ActionRecord]): Last entry.
+    """
+
+    __slots__ = ("action_table", "parent", "entry", "_length", "_records")
+
+    def __init__(self, action_table: ActionTable, parent=None, entry=None):
+        self.action_table = action_table
+        self.parent: Optional[ActionLog] = parent
+        self.entry = entry
+        self._length = 0 if parent is None else parent._length + 1
+        self._records: Optional[List[ActionRecord]] = None
+
+    def __len__(self):
+        return self._length
+
+    def append(self, action_record: ActionRecord) -> "ActionLog":
+        action, result = action_record
+        try:
+            action_id = self.action_table.ids.get(action)
+            result_code = RESULT_CODES.get(result)
+            if action_id is None and result_code and action.value == result:
+                action_id = self.action_table.ids.get(action._replace(value=None))
+                result_code += NUM_RESULTS
+        except TypeError:  # unhashable (e.g. list) values
+            action_id = None
+        if action_id is None or result_code is None:
+            entry = action_record
+        else:
+            entry = action_id * NUM_CODES + result_code
+        return ActionLog(self.action_table, self, entry)
+
+    def pop(self) -> "ActionLog":
+        """Log without the last entry"""
+        if self.parent is None:
+            raise IndexError("pop from empty ActionLog")
+        return self.parent
+
+    def last(self) -> ActionRecord:
+        if self.parent is None:
+            raise IndexError("empty ActionLog")
+        return self._decode(self.entry)
+
+    def records(self) -> List[ActionRecord]:
+        """All ActionRecords, oldest first. The list is cached: don't mutate it."""
+        if self._records is None:
+            self._records = [self._decode(entry) for entry in self.entries()]
+        return self._records
+
+    def records_after(self, start: int) -> List[ActionRecord]:
+        """ActionRecords past the first start ones, oldest first. Only walks
+        those entries, so it's O(len(self) - start) instead of O(len(self))."""
+        return [self._decode(entry) for entry in self.entries(start)]
+
+    def entries(self, start: int = 0) -> list:
+        """Packed entries (or unpacked ActionRecords) past the first start
+        ones, oldest first."""
+        entries = []
+        log = self
+        while log._length > start:
+            entries.append(log.entry)
+            log = log.parent
+        entries.reverse()
+        return entries
+
+    def __reduce__(self):
+        # flat, so that long logs don't hit pickle's recursion limit
+        return (log_from_entries, (self.action_table, self.entries()))
+
+    def _decode(self, entry) -> ActionRecord:
+        if isinstance(entry, ActionRecord):
+            return entry
+        action_id, result_code = divmod(entry, NUM_CODES)
+        action = self.action_table.actions[action_id]
+        if result_code >= NUM_RESULTS:
+            result = RESULTS[result_code - NUM_RESULTS]
+            return ActionRecord(action._replace(value=result), result)
+        return ActionRecord(action, RESULTS[result_code])
+
+
+def log_from_entries(action_table: ActionTable, entries) -> ActionLog:
+    """Inverse of ActionLog.entries"""
+    log = ActionLog(action_table)
+    for entry in entries:
+        log = ActionLog(action_table, log, entry)
+    return log
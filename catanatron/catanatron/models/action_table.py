@@ -0,0 +1,155 @@
+"""
+Stable integer ids for the actions of a game.
+
+An ActionTable lists every action that move generation can produce for a
+given set of colors and map layout, and assigns each a small int id. The
+Action objects in the table are built once and shared (interned), so move
+generation can hand them out instead of allocating new namedtuples, and
+ids make action masks, policies and logs cheap.
+
+Player-to-player trade actions (OFFER_TRADE, ACCEPT_TRADE, REJECT_TRADE and
+CONFIRM_TRADE) carry arbitrary trade tuples and so have no id.
+"""
+
+import functools
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from catanatron.models.enums import RESOURCES, Action, ActionType
+from catanatron.models.map import CatanMap
+from catanatron.models.player import Color
+from catanatron.models.topology import EDGE_INDEX, EDGES
+
+# Actions whose value is always None.
+SIMPLE_ACTION_TYPES = (
+    ActionType.ROLL,
+    ActionType.END_TURN,
+    ActionType.BUY_DEVELOPMENT_CARD,
+    ActionType.PLAY_KNIGHT_CARD,
+    ActionType.PLAY_ROAD_BUILDING,
+    ActionType.CANCEL_TRADE,
+)
+
+
+class ActionTable:
+    """All id-able actions of games with the given colors and map layout.
+
+    Attributes:
+        colors (Tuple[Color]): Colors in the table, in Color enum order (so
+            ids don't depend on seating order).
+        actions (List[Action]): Interned action for each id.
+        ids (Dict[Action, int]): Inverse of actions. BUILD_ROAD actions are
+            found with either orientation of their edge.
+    """
+
+    def __init__(self, colors: Tuple[Color, ...], land_nodes, land_tiles):
+        self.colors = colors
+        self._key = (colors, land_nodes, land_tiles)
+        self.actions: List[Action] = []
+        self.ids: Dict[Action, int] = dict()
+
+        land_edges = [(a, b) for a, b in EDGES if a in land_nodes and b in land_nodes]
+        self._settlement_ids = []
+        self._city_ids = []
+        self._road_ids = []
+        for color in colors:
+            for action_type in SIMPLE_ACTION_TYPES:
+                self._add(Action(color, action_type, None))
+            for resource in RESOURCES:
+                self._add(Action(color, ActionType.DISCARD_RESOURCE, resource))
+            for resource in RESOURCES:
+                self._add(Action(color, ActionType.PLAY_MONOPOLY, resource))
+            for i, first_card in enumerate(RESOURCES):
+                self._add(Action(color, ActionType.PLAY_YEAR_OF_PLENTY, (first_card,)))
+                for second_card in RESOURCES[i:]:
+                    cards = (first_card, second_card)
+                    self._add(Action(color, ActionType.PLAY_YEAR_OF_PLENTY, cards))
+
+            settlement_ids = dict()
+            city_ids = dict()
+            for node_id in sorted(land_nodes):
+                action = Action(color, ActionType.BUILD_SETTLEMENT, node_id)
+                settlement_ids[node_id] = self._add(action)
+                city_ids[node_id] = self._add(
+                    Action(color, ActionType.BUILD_CITY, node_id)
+                )
+            road_ids = [-1] * len(EDGES)
+            for a, b in land_edges:
+                road_id = self._add(Action(color, ActionType.BUILD_ROAD, (a, b)))
+                self.ids[Action(color, ActionType.BUILD_ROAD, (b, a))] = road_id
+                road_ids[EDGE_INDEX[(a, b)]] = road_id
+            self._settlement_ids.append(settlement_ids)
+            self._city_ids.append(city_ids)
+            self._road_ids.append(road_ids)
+
+            victims = [None] + [other for other in colors if other != color]
+            for coordinate in land_tiles:
+                for victim in victims:
+                    value = (coordinate, victim)
+                    self._add(Action(color, ActionType.MOVE_ROBBER, value))
+
+            for rate in [4, 3, 2]:
+                for given in RESOURCES:
+                    for asked in RESOURCES:
+                        if given != asked:
+                            trade = (*[given] * rate, *[None] * (4 - rate), asked)
+                            self._add(Action(color, ActionType.MARITIME_TRADE, trade))
+        self._color_index = {color: i for i, color in enumerate(colors)}
+
+    def __reduce__(self):
+        # unpickle to the shared table, keeping actions interned
+        return (_get_action_table, self._key)
+
+    def _add(self, action: Action) -> int:
+        action_id = len(self.actions)
+        self.actions.append(action)
+        self.ids[action] = action_id
+        return action_id
+
+    def __len__(self):
+        return len(self.actions)
+
+    def to_id(self, action: Action) -> int:
+        """Raises KeyError if action has no id (e.g. player-to-player trades)"""
+        return self.ids[action]
+
+    def get_id(self, action: Action) -> Optional[int]:
+        return self.ids.get(action)
+
+    def from_id(self, action_id: int) -> Action:
+        return self.actions[action_id]
+
+    def to_ids(self, actions: Iterable[Action]) -> List[int]:
+        ids = self.ids
+        return [ids[action] for action in actions]
+
+    def intern(self, action: Action) -> Action:
+        """Returns the table's Action equal to action (or action itself)."""
+        action_id = self.ids.get(action)
+        return action if action_id is None else self.actions[action_id]
+
+    # ===== Fast paths for move generation
+    def settlement_actions(self, color: Color, node_ids) -> List[Action]:
+        ids = self._settlement_ids[self._color_index[color]]
+        return [self.actions[ids[node_id]] for node_id in node_ids]
+
+    def city_actions(self, color: Color, node_ids) -> List[Action]:
+        ids = self._city_ids[self._color_index[color]]
+        return [self.actions[ids[node_id]] for node_id in node_ids]
+
+    def road_actions(self, color: Color, edges) -> List[Action]:
+        ids = self._road_ids[self._color_index[color]]
+        return [self.actions[ids[EDGE_INDEX[edge]]] for edge in edges]
+
+
+def get_action_table(colors: Iterable[Color], catan_map: CatanMap) -> ActionTable:
+    """Shared ActionTable for games with these colors and this map's layout.
+    Maps that only differ in resources or numbers share a table."""
+    colors = tuple(color for color in Color if color in colors)
+    return _get_action_table(
+        colors, frozenset(catan_map.land_nodes), tuple(catan_map.land_tiles.keys())
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _get_action_table(colors, land_nodes, land_tiles) -> ActionTable:
+    return ActionTable(colors, land_nodes, land_tiles)
@@ -1,11 +1,33 @@
 """
 Move-generation functions (these return a list of actions that can be taken
 by current player). Main function is generate_playable_actions.
+
+Action families are cached in board.move_cache. The board replaces that
+dict with an empty one whenever a settlement, city or road is placed, which
+invalidates every family that depends on the board (or on buildings_by_color,
+which changes in lockstep). Inputs that live outside the board are part of
+each family's cache key:
+
+    roads, settlements, cities, initial roads: nothing else (money and
+        pieces left are checked before looking at the cache).
+    robber moves: robber coordinate, which players have cards and, with
+        friendly_robber, which players have less than 3 victory points.
+
+Year of Plenty (depends only on the bank) and Monopoly options are cached
+at module level, and so are maritime trades, keyed by the hand and bank
+capped at the amounts that matter (skipped early when no resource in hand
+reaches the player's best trade rate). Cached lists are shared; public
+functions return copies.
+
+playable_action_families exposes the actions grouped as the caches hold
+them, so sample_playable_action can pick one without building the whole
+list (see Player.samples_actions).
 """
 
+import functools
 import operator as op
 from functools import reduce
-from typing import Any, Dict, List, Set, Tuple, Union
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
 
 from catanatron.models.decks import (
     CITY_COST_FREQDECK,
@@ -32,63 +54,73 @@ from catanatron.models.enums import (
 from catanatron.state import State
 from catanatron.state_functions import (
     get_actual_victory_points,
+    get_cities_available,
     get_player_buildings,
     get_player_freqdeck,
+    get_roads_available,
+    get_settlements_available,
     player_can_afford_dev_card,
-    player_can_play_dev,
+    player_playable_dev_cards,
     player_has_rolled,
-    player_key,
     player_num_resource_cards,
     player_resource_freqdeck_contains,
 )
 
 
 def generate_playable_actions(state: State) -> List[Action]:
+    return [action for family in playable_action_families(state) for action in family]
+
+
+def playable_action_families(state: State) -> List[Sequence[Action]]:
+    """Playable actions grouped by family (e.g. all settlements, all maritime
+    trades), in generate_playable_actions order. Lists may be shared with the
+    move caches: don't mutate them. Each family has a single action type.
+    """
     action_prompt = state.current_prompt
     color = state.current_color()
 
     if action_prompt == ActionPrompt.BUILD_INITIAL_SETTLEMENT:
-        return settlement_possibilities(state, color, True)
+        return [_settlement_actions(state, color, True)]
     elif action_prompt == ActionPrompt.BUILD_INITIAL_ROAD:
-        return initial_road_possibilities(state, color)
+        return [_initial_road_actions(state, color)]
     elif action_prompt == ActionPrompt.MOVE_ROBBER:
-        return robber_possibilities(state, color)
+        return [_robber_actions(state, color)]
     elif action_prompt == ActionPrompt.PLAY_TURN:
         if state.is_road_building:
-            return road_building_possibilities(state, color, False)
-        actions = []
+            return [_road_actions(state, color, False)]
+        families: List[Sequence[Action]] = []
         # Allow playing dev cards before and after rolling
-        if player_can_play_dev(state, color, "YEAR_OF_PLENTY"):
-            actions.extend(year_of_plenty_possibilities(color, state.resource_freqdeck))
-        if player_can_play_dev(state, color, "MONOPOLY"):
-            actions.extend(monopoly_possibilities(color))
-        if player_can_play_dev(state, color, "KNIGHT"):
-            actions.append(Action(color, ActionType.PLAY_KNIGHT_CARD, None))
-        if (
-            player_can_play_dev(state, color, "ROAD_BUILDING")
-            and len(road_building_possibilities(state, color, False)) > 0
-        ):
-            actions.append(Action(color, ActionType.PLAY_ROAD_BUILDING, None))
+        dev_cards = player_playable_dev_cards(state, color)
+        if "YEAR_OF_PLENTY" in dev_cards:
+            families.append(
+                _year_of_plenty_actions(color, tuple(state.resource_freqdeck))
+            )
+        if "MONOPOLY" in dev_cards:
+            families.append(_monopoly_actions(color))
+        if "KNIGHT" in dev_cards:
+            families.append(_simple_actions(color, ActionType.PLAY_KNIGHT_CARD))
+        if "ROAD_BUILDING" in dev_cards and len(_road_actions(state, color, False)) > 0:
+            families.append(_simple_actions(color, ActionType.PLAY_ROAD_BUILDING))
         if not player_has_rolled(state, color):
-            actions.append(Action(color, ActionType.ROLL, None))
+            families.append(_simple_actions(color, ActionType.ROLL))
         else:
-            actions.append(Action(color, ActionType.END_TURN, None))
-            actions.extend(road_building_possibilities(state, color))
-            actions.extend(settlement_possibilities(state, color))
-            actions.extend(city_possibilities(state, color))
+            families.append(_simple_actions(color, ActionType.END_TURN))
+            families.append(_road_actions(state, color))
+            families.append(_settlement_actions(state, color))
+            families.append(_city_actions(state, color))
 
             can_buy_dev_card = (
                 player_can_afford_dev_card(state, color)
                 and len(state.development_listdeck) > 0
             )
             if can_buy_dev_card:
-                actions.append(Action(color, ActionType.BUY_DEVELOPMENT_CARD, None))
+                families.append(_simple_actions(color, ActionType.BUY_DEVELOPMENT_CARD))
 
             # Trade
-            actions.extend(maritime_trade_possibilities(state, color))
-        return actions
+            families.append(_maritime_trade_actions(state, color))
+        return families
     elif action_prompt == ActionPrompt.DISCARD:
-        return discard_possibilities(state, color)
+        return [discard_possibilities(state, color)]
     elif action_prompt == ActionPrompt.DECIDE_TRADE:
         actions = [Action(color, ActionType.REJECT_TRADE, state.current_trade)]
 
@@ -98,30 +130,126 @@ def generate_playable_actions(state: State) -> List[Action]:
         if freqdeck_contains(freqdeck, asked):
             actions.append(Action(color, ActionType.ACCEPT_TRADE, state.current_trade))
 
-        return actions
+        return [[action] for action in actions]
     elif action_prompt == ActionPrompt.DECIDE_ACCEPTEES:
         # you should be able to accept for each of the "accepting players"
-        actions = [Action(color, ActionType.CANCEL_TRADE, None)]
-
+        confirmations = []
         for other_color, accepted in zip(state.colors, state.acceptees):
             if accepted:
-                actions.append(
+                confirmations.append(
                     Action(
                         color,
                         ActionType.CONFIRM_TRADE,
                         (*state.current_trade[:10], other_color),
                     )
                 )
-        return actions
+        return [_simple_actions(color, ActionType.CANCEL_TRADE), confirmations]
     else:
         raise RuntimeError("Unknown ActionPrompt: " + str(action_prompt))
 
 
+def count_playable_actions(state: State) -> Dict[ActionType, int]:
+    """Number of playable actions per action type, without building them
+    all (cached families are only measured)."""
+    counts: Dict[ActionType, int] = dict()
+    for family in playable_action_families(state):
+        if len(family) > 0:
+            action_type = family[0].action_type
+            counts[action_type] = counts.get(action_type, 0) + len(family)
+    return counts
+
+
+def sample_playable_action(
+    state: State, rng, weights: Optional[Dict[ActionType, int]] = None
+) -> Action:
+    """Picks a playable action at random, without building the list of all of
+    them. Draws exactly like rng.choice(generate_playable_actions(state)) (or,
+    with weights, like choosing from that list with each action repeated
+    weights.get(action_type, 1) times), so results match either.
+
+    Args:
+        state (State): State to pick an action in.
+        rng (random.Random): Random stream to draw from.
+        weights (Dict[ActionType, int], optional): Integer weight per action
+            type. Defaults to uniform.
+    """
+    families = playable_action_families(state)
+    if weights is None:
+        index = rng.randrange(sum(map(len, families)))
+        for family in families:
+            if index < len(family):
+                return family[index]
+            index -= len(family)
+    else:
+        family_weights = [
+            weights.get(family[0].action_type, 1) if len(family) > 0 else 0
+            for family in families
+        ]
+        index = rng.randrange(sum(len(f) * w for f, w in zip(families, family_weights)))
+        for family, weight in zip(families, family_weights):
+            if index < len(family) * weight:
+                return family[index // weight]
+            index -= len(family) * weight
+    raise IndexError("No playable actions")
+
+
+def weighted_choice(
+    actions: Sequence[Action], rng, weights: Dict[ActionType, int]
+) -> Action:
+    """Like sample_playable_action with weights, but from a given list of
+    actions: draws like rng.choice on it with each action repeated
+    weights.get(action_type, 1) times, without building that list.
+    """
+    action_weights = [weights.get(action.action_type, 1) for action in actions]
+    index = rng.randrange(sum(action_weights))
+    for action, weight in zip(actions, action_weights):
+        if index < weight:
+            return action
+        index -= weight
+    raise IndexError("No actions")
+
+
+def generate_playable_action_ids(state: State) -> List[int]:
+    """Like generate_playable_actions, but returns ids per state.action_table.
+    Player-to-player trade actions have no ids and are left out."""
+    get_id = state.action_table.ids.get
+    action_ids = []
+    for action in generate_playable_actions(state):
+        action_id = get_id(action)
+        if action_id is not None:
+            action_ids.append(action_id)
+    return action_ids
+
+
+def _cached(state, key, compute) -> List[Action]:
+    cache = state.board.move_cache
+    actions = cache.get(key)
+    if actions is None:
+        actions = compute()
+        cache[key] = actions
+    return actions
+
+
+@functools.lru_cache(maxsize=None)
+def _simple_actions(color, action_type) -> List[Action]:
+    return [Action(color, action_type, None)]
+
+
 def monopoly_possibilities(color) -> List[Action]:
+    return list(_monopoly_actions(color))
+
+
+@functools.lru_cache(maxsize=None)
+def _monopoly_actions(color) -> List[Action]:
     return [Action(color, ActionType.PLAY_MONOPOLY, card) for card in RESOURCES]
 
 
 def year_of_plenty_possibilities(color, freqdeck: List[int]) -> List[Action]:
+    return list(_year_of_plenty_actions(color, tuple(freqdeck)))
+
+
+@functools.lru_cache(maxsize=1024)
+def _year_of_plenty_actions(color, freqdeck: Tuple[int, ...]) -> List[Action]:
     options: Set[Union[Tuple[FastResource, FastResource], Tuple[FastResource]]] = set()
     for i, first_card in enumerate(RESOURCES):
         for j in range(i, len(RESOURCES)):
@@ -145,10 +273,12 @@ def year_of_plenty_possibilities(color, freqdeck: List[int]) -> List[Action]:
 
 
 def road_building_possibilities(state, color, check_money=True) -> List[Action]:
-    key = player_key(state, color)
+    return list(_road_actions(state, color, check_money))
 
+
+def _road_actions(state, color, check_money=True) -> List[Action]:
     # Check if can't build any more roads.
-    has_roads_available = state.player_state[f"{key}_ROADS_AVAILABLE"] > 0
+    has_roads_available = get_roads_available(state, color) > 0
     if not has_roads_available:
         return []
 
@@ -157,58 +287,87 @@ def road_building_possibilities(state, color, check_money=True) -> List[Action]:
     if check_money and not has_money:
         return []
 
-    buildable_edges = state.board.buildable_edges(color)
-    return [Action(color, ActionType.BUILD_ROAD, edge) for edge in buildable_edges]
+    return _cached(
+        state,
+        ("roads", color),
+        lambda: state.action_table.road_actions(
+            color, state.board.buildable_edges(color)
+        ),
+    )
 
 
 def settlement_possibilities(state, color, initial_build_phase=False) -> List[Action]:
-    if initial_build_phase:
-        buildable_node_ids = state.board.buildable_node_ids(
-            color, initial_build_phase=True
-        )
-        return [
-            Action(color, ActionType.BUILD_SETTLEMENT, node_id)
-            for node_id in buildable_node_ids
-        ]
-    else:
-        key = player_key(state, color)
+    return list(_settlement_actions(state, color, initial_build_phase))
+
+
+def _settlement_actions(state, color, initial_build_phase=False) -> List[Action]:
+    if not initial_build_phase:
         has_money = player_resource_freqdeck_contains(
             state, color, SETTLEMENT_COST_FREQDECK
         )
-        has_settlements_available = (
-            state.player_state[f"{key}_SETTLEMENTS_AVAILABLE"] > 0
-        )
-        if has_money and has_settlements_available:
-            buildable_node_ids = state.board.buildable_node_ids(color)
-            return [
-                Action(color, ActionType.BUILD_SETTLEMENT, node_id)
-                for node_id in buildable_node_ids
-            ]
-        else:
+        has_settlements_available = get_settlements_available(state, color) > 0
+        if not (has_money and has_settlements_available):
             return []
 
+    return _cached(
+        state,
+        ("settlements", color, initial_build_phase),
+        lambda: state.action_table.settlement_actions(
+            color,
+            state.board.buildable_node_ids(
+                color, initial_build_phase=initial_build_phase
+            ),
+        ),
+    )
+
 
 def city_possibilities(state, color) -> List[Action]:
-    key = player_key(state, color)
+    return list(_city_actions(state, color))
 
+
+def _city_actions(state, color) -> List[Action]:
     can_buy_city = player_resource_freqdeck_contains(state, color, CITY_COST_FREQDECK)
     if not can_buy_city:
         return []
 
-    has_cities_available = state.player_state[f"{key}_CITIES_AVAILABLE"] > 0
+    has_cities_available = get_cities_available(state, color) > 0
     if not has_cities_available:
         return []
 
-    return [
-        Action(color, ActionType.BUILD_CITY, node_id)
-        for node_id in get_player_buildings(state, color, SETTLEMENT)
-    ]
+    return _cached(
+        state,
+        ("cities", color),
+        lambda: state.action_table.city_actions(
+            color, get_player_buildings(state, color, SETTLEMENT)
+        ),
+    )
 
 
 def robber_possibilities(state, color) -> List[Action]:
-    actions = _robber_possibilities_without_friendly_robber(state, color)
+    return list(_robber_actions(state, color))
+
+
+def _robber_actions(state, color) -> List[Action]:
+    has_cards = tuple(
+        [player_num_resource_cards(state, other) >= 1 for other in state.colors]
+    )
     if not state.friendly_robber:
-        return actions
+        key = ("robber", color, state.board.robber_coordinate, has_cards)
+        return _cached(
+            state,
+            key,
+            lambda: _robber_possibilities_without_friendly_robber(state, color),
+        )
+
+    low_vp = tuple(
+        [get_actual_victory_points(state, other) < 3 for other in state.colors]
+    )
+    key = ("friendly_robber", color, state.board.robber_coordinate, has_cards, low_vp)
+    return _cached(state, key, lambda: _friendly_robber_possibilities(state, color))
+
+
+def _friendly_robber_possibilities(state, color) -> List[Action]:
+    actions = _robber_possibilities_without_friendly_robber(state, color)
 
     filtered_actions = list(
         filter(
@@ -220,6 +379,12 @@ def robber_possibilities(state, color) -> List[Action]:
 
 
 def _robber_possibilities_without_friendly_robber(state, color) -> List[Action]:
+    can_steal_from = {
+        other
+        for other in state.colors
+        if other != color and player_num_resource_cards(state, other) >= 1
+    }
+    intern = state.action_table.intern
     actions = []
     for coordinate, tile in state.board.map.land_tiles.items():
         if coordinate == state.board.robber_coordinate:
@@ -230,21 +395,16 @@ def _robber_possibilities_without_friendly_robber(state, color) -> List[Action]:
         to_steal_from = set()  # set of player_indexs
         for node_id in tile.nodes.values():
             building = state.board.buildings.get(node_id, None)
-            if building is not None:
-                candidate_color = building[0]
-                if (
-                    player_num_resource_cards(state, candidate_color) >= 1
-                    and color != candidate_color  # can't play yourself
-                ):
-                    to_steal_from.add(candidate_color)
+            if building is not None and building[0] in can_steal_from:
+                to_steal_from.add(building[0])
 
         if len(to_steal_from) == 0:
-            actions.append(Action(color, ActionType.MOVE_ROBBER, (coordinate, None)))
+            action = Action(color, ActionType.MOVE_ROBBER, (coordinate, None))
+            actions.append(intern(action))
         else:
             for enemy_color in to_steal_from:
-                actions.append(
-                    Action(color, ActionType.MOVE_ROBBER, (coordinate, enemy_color))
-                )
+                value = (coordinate, enemy_color)
+                actions.append(intern(Action(color, ActionType.MOVE_ROBBER, value)))
 
     return actions
 
@@ -268,14 +428,25 @@ def _robber_action_blocks_low_vp_enemy(state, color, action) -> bool:
 
 
 def initial_road_possibilities(state, color) -> List[Action]:
+    return list(_initial_road_actions(state, color))
+
+
+def _initial_road_actions(state, color) -> List[Action]:
     # Must be connected to last settlement
     last_settlement_node_id = state.buildings_by_color[color][SETTLEMENT][-1]
 
-    buildable_edges = filter(
-        lambda edge: last_settlement_node_id in edge,
-        state.board.buildable_edges(color),
+    return _cached(
+        state,
+        ("initial_roads", color),
+        lambda: state.action_table.road_actions(
+            color,
+            [
+                edge
+                for edge in state.board.buildable_edges(color)
+                if last_settlement_node_id in edge
+            ],
+        ),
     )
-    return [Action(color, ActionType.BUILD_ROAD, edge) for edge in buildable_edges]
 
 
 def discard_possibilities(state: State, color) -> List[Action]:
@@ -298,22 +469,45 @@ def ncr(n, r):
 
 
 def maritime_trade_possibilities(state, color) -> List[Action]:
-    hand_freqdeck = [
-        player_num_resource_cards(state, color, resource) for resource in RESOURCES
-    ]
+    return list(_maritime_trade_actions(state, color))
+
+
+def _maritime_trade_actions(state, color) -> List[Action]:
+    hand_freqdeck = get_player_freqdeck(state, color)
     port_resources = state.board.get_player_port_resources(color)
-    trade_offers = inner_maritime_trade_possibilities(
-        hand_freqdeck, state.resource_freqdeck, port_resources
+    best_rate = 4
+    if None in port_resources:
+        best_rate = 3
+    if len(port_resources) > (None in port_resources):
+        best_rate = 2
+    if max(hand_freqdeck) < best_rate:
+        return []  # most hands can't trade at all; skip building offers
+
+    # Offers only depend on which amounts reach a rate (all rates are <= 4)
+    #   and on which resources the bank has.
+    return _cached_maritime_trade_actions(
+        color,
+        tuple(min(amount, 4) for amount in hand_freqdeck),
+        tuple(min(amount, 1) for amount in state.resource_freqdeck),
+        frozenset(port_resources),
     )
 
-    return list(
-        map(lambda t: Action(color, ActionType.MARITIME_TRADE, t), trade_offers)
+
+@functools.lru_cache(maxsize=4096)
+def _cached_maritime_trade_actions(
+    color, hand_freqdeck, bank_freqdeck, port_resources
+) -> List[Action]:
+    trade_offers = inner_maritime_trade_possibilities(
+        hand_freqdeck, bank_freqdeck, port_resources
     )
+    return [Action(color, ActionType.MARITIME_TRADE, t) for t in trade_offers]
 
 
 def inner_maritime_trade_possibilities(hand_freqdeck, bank_freqdeck, port_resources):
-    """This inner function is to make this logic more shareable"""
-    trade_offers = set()
+    """This inner function is to make this logic more shareable. Offers come
+    in RESOURCES order (not a set), so bots breaking ties by order play the
+    same games under any PYTHONHASHSEED."""
+    trade_offers = []
 
     # Get lowest rate per resource
     rates: Dict[FastResource, int] = {WOOD: 4, BRICK: 4, SHEEP: 4, WHEAT: 4, ORE: 4}
@@ -335,6 +529,6 @@ def inner_maritime_trade_possibilities(hand_freqdeck, bank_freqdeck, port_resour
                     and freqdeck_count(bank_freqdeck, j_resource) > 0
                 ):
                     trade_offer = tuple(resource_out + [j_resource])
-                    trade_offers.add(trade_offer)
+                    trade_offers.append(trade_offer)
 
     return trade_offers
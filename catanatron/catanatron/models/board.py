@@ -1,39 +1,64 @@
-import pickle
-import copy
 from collections import defaultdict
-from typing import Any, Set, Dict, Tuple, List
-import functools
-
-import networkx as nx  # type: ignore
+from typing import Dict, List, Set, Tuple
 
 from catanatron.models.player import Color
 from catanatron.models.map import (
     BASE_MAP_TEMPLATE,
     MINI_MAP_TEMPLATE,
-    NUM_NODES,
     CatanMap,
     NodeId,
 )
-from catanatron.models.enums import FastBuildingType, SETTLEMENT, CITY
+from catanatron.models.enums import RESOURCES, FastBuildingType, SETTLEMENT, CITY
+from catanatron.models.longest_road import longest_road, longest_road_length
+from catanatron.models.topology import (
+    EDGE_INDEX,
+    EDGES,
+    NODE_DISTANCES,
+    NODE_EDGES,
+    NODE_EDGES_MASK,
+    NODE_NEIGHBORS,
+    NODE_NEIGHBORS_MASK,
+    NUM_GRAPH_NODES,
+    get_edges,
+    iter_bits,
+    nodes_mask,
+)
+
+try:
+    import networkx as nx  # type: ignore
+except ImportError:  # networkx is optional; see models/topology.py
+    nx = None
 
 
-# Used to find relationships between nodes and edges
 base_map = CatanMap.from_template(BASE_MAP_TEMPLATE)
 mini_map = CatanMap.from_template(MINI_MAP_TEMPLATE)
-STATIC_GRAPH = nx.Graph()
-for tile in base_map.tiles.values():
-    STATIC_GRAPH.add_nodes_from(tile.nodes.values())
-    STATIC_GRAPH.add_edges_from(tile.edges.values())
+# Graph of the base map, for callers that want networkx algorithms. The game
+#   itself uses the tables in models/topology.py instead.
+STATIC_GRAPH = None
+if nx is not None:
+    STATIC_GRAPH = nx.Graph()
+    for tile in base_map.tiles.values():
+        STATIC_GRAPH.add_nodes_from(tile.nodes.values())
+        STATIC_GRAPH.add_edges_from(tile.edges.values())
+
+
+def get_map_masks(catan_map: CatanMap):
+    """Static bitboards of a map: (land nodes, land edges, {resource: port nodes})"""
+    land_nodes = nodes_mask(catan_map.land_nodes)
+    land_edges = 0
+    for i, (a, b) in enumerate(EDGES):
+        if land_nodes >> a & 1 and land_nodes >> b & 1:
+            land_edges |= 1 << i
+    port_nodes = {
+        resource: nodes_mask(node_ids)
+        for resource, node_ids in catan_map.port_nodes.items()
+    }
+    return land_nodes, land_edges, port_nodes
 
 
-@functools.lru_cache(1)
 def get_node_distances():
-    return nx.floyd_warshall(STATIC_GRAPH)
-
-
-@functools.lru_cache(3)  # None, range(54), range(24)
-def get_edges(land_nodes=None):
-    return list(STATIC_GRAPH.subgraph(land_nodes or range(NUM_NODES)).edges())
+    """get_node_distances()[a][b] is the number of edges between nodes a and b"""
+    return NODE_DISTANCES
 
 
 class Board:
@@ -45,19 +70,38 @@ class Board:
         roads (Dict[EdgeId, Color]): Mapping from edge
             to Color (if there is a road there). Contains inverted
             edges as well for ease of querying.
-        connected_components (Dict[Color, List[Set[NodeId]]]): Cache
-            datastructure to speed up maintaining longest road computation.
-            To be queried by Color. Value is a list of node sets.
+        component_parents (Dict[Color, List[int]]): Union-find forest of
+            each player's road components: parent of every node id (itself
+            for roots and for nodes in no component). Lists are replaced,
+            never mutated, so copies share them.
+        component_masks (Dict[Color, Dict[NodeId, int]]): Root node id to
+            the node bitboard of its component. Components are the nodes a
+            player reaches from their buildings through their own roads,
+            enemy buildings excluded (they cut roads). Per-color dicts are
+            replaced, never mutated, so copies share them.
         board_buildable_ids (Set[NodeId]): Cache of buildable node ids in board.
+        move_cache (Dict): Move generation cache owned by models/actions.py.
+            Replaced with an empty dict on every build.
         road_color (Color): Color of player with longest road.
         road_length (int): Number of roads of longest road
         robber_coordinate (Coordinate): Coordinate where robber is.
+        settlement_bits, city_bits (Dict[Color, int]): Node bitboards of
+            each player's buildings. Kept in sync with buildings.
+        road_bits (Dict[Color, int]): Edge bitboards (see EDGE_INDEX) of
+            each player's roads. Kept in sync with roads.
+        component_node_bits (Dict[Color, int]): Union of the component_masks
+            of each player, as a node bitboard.
+        buildable_node_bits (int): Same as board_buildable_ids, as a bitboard.
+        payouts (Dict[int, Tuple]): Dice number to the (tile_id, node_id, color,
+            resource_index, amount) entries of the buildings it pays, robber
+            aside. Updated on every settlement and city; replaced, never
+            mutated, so copies share it.
     """
 
     def __init__(self, catan_map=None, initialize=True):
-        self.buildable_subgraph: Any = None
         self.buildable_edges_cache = {}
         self.player_port_resources_cache = {}
+        self.move_cache = {}
         if initialize:
             self.map: CatanMap = catan_map or CatanMap.from_template(
                 BASE_MAP_TEMPLATE
@@ -66,9 +110,6 @@ class Board:
             self.buildings: Dict[NodeId, Tuple[Color, FastBuildingType]] = dict()
             self.roads = dict()  # (node_id, node_id) => color
 
-            # color => int{}[] (list of node_id sets) one per component
-            #   nodes in sets are incidental (might not be owned by player)
-            self.connected_components: Any = defaultdict(list)
             self.board_buildable_ids = set(self.map.land_nodes)
             self.road_lengths = defaultdict(int)
             self.road_color = None
@@ -80,8 +121,25 @@ class Board:
                 self.map.land_tiles.keys(),
             ).__next__()
 
-            # Cache buildable subgraph
-            self.buildable_subgraph = STATIC_GRAPH.subgraph(self.map.land_nodes)
+            (
+                self.land_node_bits,
+                self.land_edge_bits,
+                self.port_node_bits,
+            ) = get_map_masks(self.map)
+            self.settlement_bits = {color: 0 for color in Color}
+            self.city_bits = {color: 0 for color in Color}
+            self.road_bits = {color: 0 for color in Color}
+            self.component_node_bits = {color: 0 for color in Color}
+            self.component_parents = {
+                color: list(range(NUM_GRAPH_NODES)) for color in Color
+            }
+            self.component_masks: Dict[Color, Dict[NodeId, int]] = {
+                color: {} for color in Color
+            }
+            self.occupied_node_bits = 0
+            self.occupied_edge_bits = 0
+            self.buildable_node_bits = self.land_node_bits
+            self.payouts: Dict[int, Tuple] = dict()
 
     def build_settlement(self, color, node_id, initial_build_phase=False):
         """Adds a settlement, and ensures is a valid place to build.
@@ -105,84 +163,70 @@ class Board:
             raise ValueError("Invalid Settlement Placement: a building exists there")
 
         self.buildings[node_id] = (color, SETTLEMENT)
+        self._update_payouts(color, node_id, 1)
+        node_bit = 1 << node_id
+        self.settlement_bits[color] |= node_bit
+        self.occupied_node_bits |= node_bit
 
         previous_road_color = self.road_color
         if initial_build_phase:
-            self.connected_components[color].append({node_id})
+            self.component_masks[color] = {
+                **self.component_masks[color],
+                node_id: node_bit,
+            }
+            self.component_node_bits[color] |= node_bit
         else:
-            # Maybe cut connected components.
-            edges_by_color = defaultdict(list)
-            for edge in STATIC_GRAPH.edges(node_id):
-                edges_by_color[self.roads.get(edge, None)].append(edge)
-
-            for edge_color, edges in edges_by_color.items():
-                if edge_color == color or edge_color is None:
-                    continue  # ignore
-                if len(edges) == 2:  # rip, edge_color has been plowed
-                    # consider cut was at b=node_id for edges (a, b) and (b, c)
-                    a = [n for n in edges[0] if n != node_id].pop()
-                    c = [n for n in edges[1] if n != node_id].pop()
-
-                    # do dfs from a adding all encountered nodes
-                    a_nodeset = self.dfs_walk(a, edge_color)
-                    c_nodeset = self.dfs_walk(c, edge_color)
-
-                    # split this components on here.
-                    b_index = self._get_connected_component_index(node_id, edge_color)
-                    del self.connected_components[edge_color][b_index]
-                    self.connected_components[edge_color].append(a_nodeset)
-                    self.connected_components[edge_color].append(c_nodeset)
-
-                    # Update longest road by plowed player. Compare again with all
+            # Cut other players' components that reached node_id.
+            for edge_color, component_bits in self.component_node_bits.items():
+                if edge_color == color or not component_bits & node_bit:
+                    continue
+                self._cut_component(edge_color, node_id)
+
+                if self.road_bits[edge_color] & NODE_EDGES_MASK[node_id]:
+                    # Update longest road of the cut player. Compare again with all
                     self.road_lengths[edge_color] = max(
-                        *[
-                            len(longest_acyclic_path(self, component, edge_color))
-                            for component in self.connected_components[edge_color]
-                        ]
-                    )
-                    self.road_color, self.road_length = max(
-                        self.road_lengths.items(), key=lambda e: e[1]
+                        self._road_length(edge_color, component)
+                        for component in self.component_masks[edge_color].values()
                     )
+                    self._update_longest_road_holder()
 
         self.board_buildable_ids.discard(node_id)
-        for n in STATIC_GRAPH.neighbors(node_id):
+        for n in NODE_NEIGHBORS[node_id]:
             self.board_buildable_ids.discard(n)
+        self.buildable_node_bits &= ~(node_bit | NODE_NEIGHBORS_MASK[node_id])
 
         self.buildable_edges_cache = {}  # Reset buildable_edges
         self.player_port_resources_cache = {}  # Reset port resources
+        self.move_cache = {}  # Reset move generation (see models/actions.py)
         return previous_road_color, self.road_color, self.road_lengths
 
-    def dfs_walk(self, node_id, color):
-        """Generates set of nodes that are "connected" to given node.
-
-        Args:
-            node_id (int): Where to start search/walk.
-            color (Color): Player color asking
-
-        Returns:
-            Set[int]: Nodes that are "connected" to this one
-                by roads of the color player.
+    def _cut_component(self, color, node_id):
+        """Removes node_id (now an enemy building) from its component, and
+        splits what remains into the parts still connected by color's roads.
         """
-        agenda = [node_id]  # assuming node_id is owned.
-        visited = set()
-
-        while len(agenda) != 0:
-            n = agenda.pop()
-            visited.add(n)
-
-            if self.is_enemy_node(n, color):
-                continue  # end of the road
-
-            neighbors = [v for v in STATIC_GRAPH.neighbors(n) if v not in visited]
-            expandable = [v for v in neighbors if self.roads.get((n, v), None) == color]
-            agenda.extend(expandable)
-
-        return visited
-
-    def _get_connected_component_index(self, node_id, color):
-        for i, component in enumerate(self.connected_components[color]):
-            if node_id in component:
-                return i
+        parents = self.component_parents[color].copy()
+        masks = self.component_masks[color].copy()
+        remaining = masks.pop(find_root(parents, node_id)) & ~(1 << node_id)
+        parents[node_id] = node_id
+        road_bits = self.road_bits[color]
+        while remaining:
+            root = (remaining & -remaining).bit_length() - 1
+            component = 1 << root
+            agenda = [root]
+            while agenda:
+                n = agenda.pop()
+                parents[n] = root
+                for v in NODE_NEIGHBORS[n]:
+                    v_bit = 1 << v
+                    if remaining & v_bit and not component & v_bit:
+                        if road_bits >> EDGE_INDEX[(n, v)] & 1:
+                            component |= v_bit
+                            agenda.append(v)
+            masks[root] = component
+            remaining &= ~component
+        self.component_parents[color] = parents
+        self.component_masks[color] = masks
+        self.component_node_bits[color] &= ~(1 << node_id)
 
     def build_road(self, color, edge):
         buildable = self.buildable_edges(color)
@@ -192,79 +236,114 @@ class Board:
 
         self.roads[edge] = color
         self.roads[inverted_edge] = color
+        edge_bit = 1 << EDGE_INDEX[edge]
+        self.road_bits[color] |= edge_bit
+        self.occupied_edge_bits |= edge_bit
 
-        # Find connected components corresponding to edge nodes (buildings).
+        # Extend or merge the components of the edge nodes.
         a, b = edge
-        a_index = self._get_connected_component_index(a, color)
-        b_index = self._get_connected_component_index(b, color)
-
-        # Extend or merge components
-        if a_index is None and not self.is_enemy_node(a, color):
-            component = self.connected_components[color][b_index]
-            component.add(a)
-        elif b_index is None and not self.is_enemy_node(b, color):
-            component = self.connected_components[color][a_index]
-            component.add(b)
-        elif a_index is not None and b_index is not None and a_index != b_index:
-            # Merge both components into one and delete the other.
-            component = set.union(
-                self.connected_components[color][a_index],
-                self.connected_components[color][b_index],
-            )
-            self.connected_components[color][a_index] = component
-            del self.connected_components[color][b_index]
+        component_bits = self.component_node_bits[color]
+        parents = self.component_parents[color].copy()
+        masks = self.component_masks[color].copy()
+        if not component_bits >> a & 1 and not self.is_enemy_node(a, color):
+            root = find_root(parents, b)
+            parents[a] = root
+            masks[root] |= 1 << a
+            self.component_node_bits[color] |= 1 << a
+        elif not component_bits >> b & 1 and not self.is_enemy_node(b, color):
+            root = find_root(parents, a)
+            parents[b] = root
+            masks[root] |= 1 << b
+            self.component_node_bits[color] |= 1 << b
+        elif component_bits >> a & 1 and component_bits >> b & 1:
+            root = find_root(parents, a)
+            b_root = find_root(parents, b)
+            if b_root != root:
+                parents[b_root] = root
+                masks[root] |= masks.pop(b_root)
         else:
-            # In this case, a_index == b_index, which means that the edge
-            # is already part of one component. No actions needed.
-            chosen_index = a_index if a_index is not None else b_index
-            component = self.connected_components[color][chosen_index]
+            # Road into an enemy building; it doesn't join the component.
+            root = find_root(parents, a if component_bits >> a & 1 else b)
+        self.component_parents[color] = parents
+        self.component_masks[color] = masks
 
         # find longest path on component under question
         previous_road_color = self.road_color
-        candidate_length = len(longest_acyclic_path(self, component, color))
+        candidate_length = self._road_length(color, masks[root])
         self.road_lengths[color] = max(self.road_lengths[color], candidate_length)
         if candidate_length >= 5 and candidate_length > self.road_length:
             self.road_color = color
             self.road_length = candidate_length
 
         self.buildable_edges_cache = {}  # Reset buildable_edges
+        self.move_cache = {}  # Reset move generation (see models/actions.py)
         return previous_road_color, self.road_color, self.road_lengths
 
+    def _update_longest_road_holder(self):
+        """After road_lengths go down: the holder keeps it on ties, and no one
+        holds it under 5 roads."""
+        longest = max(self.road_lengths.values())
+        if longest < 5:
+            self.road_color, self.road_length = None, 0
+        elif self.road_color is None or self.road_lengths[self.road_color] < longest:
+            self.road_color = max(self.road_lengths, key=self.road_lengths.get)
+            self.road_length = longest
+        else:
+            self.road_length = longest
+
+    def _component_road_length(self, component, color):
+        return self._road_length(color, nodes_mask(component))
+
+    def _road_length(self, color, component_bits):
+        return longest_road_length(
+            component_bits, self.road_bits[color], self.enemy_node_bits(color)
+        )
+
     def build_city(self, color, node_id):
         building = self.buildings.get(node_id, None)
         if building is None or building[0] != color or building[1] != SETTLEMENT:
             raise ValueError("Invalid City Placement: no player settlement there")
 
         self.buildings[node_id] = (color, CITY)
+        self._update_payouts(color, node_id, 2)
+        self.settlement_bits[color] &= ~(1 << node_id)
+        self.city_bits[color] |= 1 << node_id
+        self.move_cache = {}  # Reset move generation (see models/actions.py)
+
+    def _update_payouts(self, color, node_id, amount):
+        """Sets what node_id pays to color on each of its tiles' numbers"""
+        payouts = self.payouts.copy()
+        for tile in self.map.adjacent_tiles[node_id]:
+            if tile.number is None:
+                continue  # desert
+            entries = payouts.get(tile.number, ())
+            entries = tuple(e for e in entries if e[:2] != (tile.id, node_id))
+            resource_index = RESOURCES.index(tile.resource)
+            entry = (tile.id, node_id, color, resource_index, amount)
+            payouts[tile.number] = entries + (entry,)
+        self.payouts = payouts
 
     def buildable_node_ids(self, color: Color, initial_build_phase=False):
         if initial_build_phase:
-            return sorted(list(self.board_buildable_ids))
+            return list(iter_bits(self.buildable_node_bits))
 
-        subgraphs = self.find_connected_components(color)
-        nodes = set().union(*subgraphs)
-        return sorted(list(nodes.intersection(self.board_buildable_ids)))
+        return list(
+            iter_bits(self.component_node_bits[color] & self.buildable_node_bits)
+        )
 
     def buildable_edges(self, color: Color):
         """List of (n1,n2) tuples. Edges are in n1 < n2 order."""
         if color in self.buildable_edges_cache:
             return self.buildable_edges_cache[color]
 
-        expandable = set()
-
-        # All nodes for this color.
-        # TODO(tonypr): Explore caching for 'expandable_nodes'?
-        # The 'expandable_nodes' set should only increase in size monotonically I think.
-        # We can take advantage of that.
-        expandable_nodes = set()
-        expandable_nodes = expandable_nodes.union(*self.connected_components[color])
+        candidate_edges = 0
+        for node_id in iter_bits(self.component_node_bits[color]):
+            candidate_edges |= NODE_EDGES_MASK[node_id]
+        candidate_edges &= self.land_edge_bits & ~self.occupied_edge_bits
 
-        candidate_edges = self.buildable_subgraph.edges(expandable_nodes)
-        for edge in candidate_edges:
-            if self.get_edge_color(edge) is None:
-                expandable.add(tuple(sorted(edge)))
-
-        self.buildable_edges_cache[color] = list(expandable)
+        self.buildable_edges_cache[color] = [
+            EDGES[i] for i in iter_bits(candidate_edges)
+        ]
         return self.buildable_edges_cache[color]
 
     def get_player_port_resources(self, color):
@@ -272,10 +351,12 @@ class Board:
         if color in self.player_port_resources_cache:
             return self.player_port_resources_cache[color]
 
-        resources = set()
-        for resource, node_ids in self.map.port_nodes.items():
-            if any(self.is_friendly_node(node_id, color) for node_id in node_ids):
-                resources.add(resource)
+        owned_nodes = self.settlement_bits[color] | self.city_bits[color]
+        resources = {
+            resource
+            for resource, port_nodes in self.port_node_bits.items()
+            if port_nodes & owned_nodes
+        }
 
         self.player_port_resources_cache[color] = resources
         return resources
@@ -283,11 +364,17 @@ class Board:
     def find_connected_components(self, color: Color):
         """
         Returns:
-            nx.Graph[]: connected subgraphs. subgraphs
-                might include nodes that color doesnt own (on the way and on ends),
-                just to make it is "closed" and easier for buildable_nodes to operate.
+            Set[NodeId][]: connected subgraphs, by lowest node id. subgraphs
+                are the nodes of color's buildings and the ends of its roads,
+                except nodes with enemy buildings (which cut roads through them).
         """
-        return self.connected_components[color]
+        masks = sorted(self.component_masks[color].values(), key=lambda m: m & -m)
+        return [set(iter_bits(mask)) for mask in masks]
+
+    @property
+    def connected_components(self) -> Dict[Color, List[Set[NodeId]]]:
+        """find_connected_components of every color"""
+        return {color: self.find_connected_components(color) for color in Color}
 
     def continuous_roads_by_player(self, color: Color):
         paths = []
@@ -301,22 +388,83 @@ class Board:
         board.map = self.map  # reuse since its immutable
         board.buildings = self.buildings.copy()
         board.roads = self.roads.copy()
-        board.connected_components = pickle.loads(
-            pickle.dumps(self.connected_components)
-        )
         board.board_buildable_ids = self.board_buildable_ids.copy()
         board.road_lengths = self.road_lengths.copy()
         board.road_color = self.road_color
         board.road_length = self.road_length
 
         board.robber_coordinate = self.robber_coordinate
-        board.buildable_subgraph = self.buildable_subgraph
-        board.buildable_edges_cache = copy.deepcopy(self.buildable_edges_cache)
-        board.player_port_resources_cache = copy.deepcopy(
-            self.player_port_resources_cache
-        )
+
+        board.land_node_bits = self.land_node_bits
+        board.land_edge_bits = self.land_edge_bits
+        board.port_node_bits = self.port_node_bits
+        board.settlement_bits = self.settlement_bits.copy()
+        board.city_bits = self.city_bits.copy()
+        board.road_bits = self.road_bits.copy()
+        board.component_node_bits = self.component_node_bits.copy()
+        board.component_parents = self.component_parents.copy()
+        board.component_masks = self.component_masks.copy()
+        board.occupied_node_bits = self.occupied_node_bits
+        board.occupied_edge_bits = self.occupied_edge_bits
+        board.buildable_node_bits = self.buildable_node_bits
+        board.payouts = self.payouts
+        # Caches are shared: invalidation replaces the dicts instead of
+        #   mutating them, and cached values are never mutated either.
+        board.buildable_edges_cache = self.buildable_edges_cache
+        board.player_port_resources_cache = self.player_port_resources_cache
+        board.move_cache = self.move_cache
         return board
 
+    def snapshot(self, include_buildable_ids=False):
+        """Captures the derived, non-building parts of the board so that
+        restore() can undo a build_* call or robber move. Buildings and roads
+        themselves are reverted by the caller (see apply_action.unapply_action).
+        """
+        return (
+            self.component_parents.copy(),
+            self.component_masks.copy(),
+            self.board_buildable_ids.copy() if include_buildable_ids else None,
+            self.road_lengths.copy(),
+            self.road_color,
+            self.road_length,
+            self.robber_coordinate,
+            self.buildable_edges_cache,
+            self.player_port_resources_cache,
+            self.move_cache,
+            self.settlement_bits.copy(),
+            self.city_bits.copy(),
+            self.road_bits.copy(),
+            self.component_node_bits.copy(),
+            self.occupied_node_bits,
+            self.occupied_edge_bits,
+            self.buildable_node_bits,
+            self.payouts,
+        )
+
+    def restore(self, snapshot):
+        (
+            self.component_parents,
+            self.component_masks,
+            board_buildable_ids,
+            self.road_lengths,
+            self.road_color,
+            self.road_length,
+            self.robber_coordinate,
+            self.buildable_edges_cache,
+            self.player_port_resources_cache,
+            self.move_cache,
+            self.settlement_bits,
+            self.city_bits,
+            self.road_bits,
+            self.component_node_bits,
+            self.occupied_node_bits,
+            self.occupied_edge_bits,
+            self.buildable_node_bits,
+            self.payouts,
+        ) = snapshot
+        if board_buildable_ids is not None:
+            self.board_buildable_ids = board_buildable_ids
+
     # ===== Helper functions
     def get_node_color(self, node_id):
         # using try-except instead of .get for performance
@@ -336,6 +484,12 @@ class Board:
         node_color = self.get_node_color(node_id)
         return node_color is not None and node_color != color
 
+    def enemy_node_bits(self, color):
+        """Node bitboard of buildings not owned by color."""
+        return self.occupied_node_bits & ~(
+            self.settlement_bits[color] | self.city_bits[color]
+        )
+
     def is_enemy_road(self, edge, color):
         edge_color = self.get_edge_color(edge)
         return edge_color is not None and self.get_edge_color(edge) != color
@@ -347,34 +501,20 @@ class Board:
         return self.get_edge_color(edge) == color
 
 
-def longest_acyclic_path(board: Board, node_set: Set[int], color: Color):
-    paths = []
-    for start_node in node_set:
-        # do DFS when reach leaf node, stop and add to paths
-        paths_from_this_node = []
-        agenda: List[Tuple[int, Any]] = [(start_node, [])]
-        while len(agenda) > 0:
-            node, path_thus_far = agenda.pop()
-
-            able_to_navigate = False
-            for neighbor_node in STATIC_GRAPH.neighbors(node):
-                edge = tuple(sorted((node, neighbor_node)))
-
-                # Must travel on a friendly road.
-                if not board.is_friendly_road(edge, color):
-                    continue
-
-                # Can't expand past an enemy node.
-                if board.is_enemy_node(neighbor_node, color):
-                    continue
-
-                if edge not in path_thus_far:
-                    agenda.append((neighbor_node, path_thus_far + [edge]))
-                    able_to_navigate = True
-
-            if not able_to_navigate:  # then it is leaf node
-                paths_from_this_node.append(path_thus_far)
+def find_root(parents: List[int], node_id: NodeId) -> NodeId:
+    """Root of node_id in a union-find forest. Compresses the path to it,
+    so parents must not be shared (see Board.component_parents).
+    """
+    root = node_id
+    while parents[root] != root:
+        root = parents[root]
+    while parents[node_id] != root:
+        parents[node_id], node_id = root, parents[node_id]
+    return root
 
-        paths.extend(paths_from_this_node)
 
-    return max(paths, key=len)
+def longest_acyclic_path(board: Board, node_set: Set[int], color: Color):
+    """Edges of the longest road color can walk starting from node_set."""
+    return longest_road(
+        nodes_mask(node_set), board.road_bits[color], board.enemy_node_bits(color)
+    )
@@ -0,0 +1,115 @@
+"""
+Longest road computation over bitboards (see models/topology.py).
+
+A road network is described by three masks: the nodes a road may start
+from, the player's road edges, and the nodes it may not pass through
+(enemy buildings), although it may end at them. The search walks edges
+removing them from the roads mask as it goes, so no path lists are built.
+Results only depend on those three ints, so they are memoized across
+boards: the many copies of a game explored by search players keep asking
+about the same road networks.
+"""
+
+import functools
+from typing import List
+
+from catanatron.models.map import EdgeId
+from catanatron.models.topology import EDGES, NODE_EDGES_MASK, iter_bits
+
+
+def longest_road_length(start_nodes: int, roads: int, blocked_nodes: int) -> int:
+    """Number of edges in the longest trail that starts at one of start_nodes,
+    uses each edge in roads at most once and never goes past a blocked node
+    (a road into one counts, but ends the trail there). Trails may also start
+    at a blocked node, with a road into start_nodes.
+    """
+    return _cached_longest_road_length(
+        start_nodes, roads, blocked_nodes & _touched_nodes(roads)
+    )
+
+
+def longest_road(start_nodes: int, roads: int, blocked_nodes: int) -> List[EdgeId]:
+    """Like longest_road_length, but returns the edges of one such trail."""
+    best: List[EdgeId] = []
+    for node in iter_bits(start_nodes):
+        path = _longest_path_from(node, roads, blocked_nodes)
+        if len(path) > len(best):
+            best = path
+    for edge, node in _edges_from_blocked_nodes(start_nodes, roads, blocked_nodes):
+        path = [EDGES[edge]]
+        path += _longest_path_from(node, roads & ~(1 << edge), blocked_nodes)
+        if len(path) > len(best):
+            best = path
+    return best
+
+
+def _edges_from_blocked_nodes(start_nodes: int, roads: int, blocked_nodes: int):
+    """(edge, node) for each road from a blocked node into a start node.
+    A trail with enemy buildings at both ends can only start at one of them.
+    """
+    for blocked_node in iter_bits(blocked_nodes):
+        for edge in iter_bits(NODE_EDGES_MASK[blocked_node] & roads):
+            a, b = EDGES[edge]
+            node = b if a == blocked_node else a
+            if start_nodes >> node & 1 and not blocked_nodes >> node & 1:
+                yield edge, node
+
+
+def _touched_nodes(roads: int) -> int:
+    nodes = 0
+    for edge in iter_bits(roads):
+        a, b = EDGES[edge]
+        nodes |= (1 << a) | (1 << b)
+    return nodes
+
+
+@functools.lru_cache(maxsize=8192)
+def _cached_longest_road_length(
+    start_nodes: int, roads: int, blocked_nodes: int
+) -> int:
+    num_roads = roads.bit_count()
+    memo = dict()
+    best = 0
+    for node in iter_bits(start_nodes):
+        best = max(best, _longest_from(node, roads, blocked_nodes, memo))
+        if best == num_roads:
+            return best  # can't do better than using every road
+    for edge, node in _edges_from_blocked_nodes(start_nodes, roads, blocked_nodes):
+        length = 1 + _longest_from(node, roads & ~(1 << edge), blocked_nodes, memo)
+        best = max(best, length)
+    return best
+
+
+def _longest_from(node: int, roads: int, blocked_nodes: int, memo) -> int:
+    key = (node, roads)
+    if key in memo:
+        return memo[key]
+
+    best = 0
+    for edge in iter_bits(NODE_EDGES_MASK[node] & roads):
+        a, b = EDGES[edge]
+        neighbor = b if a == node else a
+        if blocked_nodes >> neighbor & 1:
+            length = 1  # can't expand past an enemy node
+        else:
+            length = 1 + _longest_from(
+                neighbor, roads & ~(1 << edge), blocked_nodes, memo
+            )
+        if length > best:
+            best = length
+
+    memo[key] = best
+    return best
+
+
+def _longest_path_from(node: int, roads: int, blocked_nodes: int) -> List[EdgeId]:
+    best: List[EdgeId] = []
+    for edge in iter_bits(NODE_EDGES_MASK[node] & roads):
+        a, b = EDGES[edge]
+        neighbor = b if a == node else a
+        path = [EDGES[edge]]
+        if not blocked_nodes >> neighbor & 1:
+            path += _longest_path_from(neighbor, roads & ~(1 << edge), blocked_nodes)
+        if len(path) > len(best):
+            best = path
+    return best
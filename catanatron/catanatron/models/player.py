@@ -1,4 +1,3 @@
-import random
 import builtins
 
 from enum import Enum
@@ -24,6 +23,23 @@ class Player:
     the database via pickle.
     """
 
+    # Players that just pick a playable action at random can set this and
+    #   implement .sample_action. Game.play_tick then calls it instead of
+    #   .decide, without building the list of playable actions. Subclasses
+    #   that override .decide get it reset to False (see __init_subclass__).
+    samples_actions = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # sample_action stands in for the .decide of the class that set
+        #   samples_actions. If a more derived class overrides .decide,
+        #   sampling would silently skip it.
+        mro = cls.__mro__
+        decide_owner = next(klass for klass in mro if "decide" in vars(klass))
+        flag_owner = next(klass for klass in mro if "samples_actions" in vars(klass))
+        if mro.index(decide_owner) < mro.index(flag_owner):
+            cls.samples_actions = False
+
     def __init__(self, color, is_bot=True):
         """Initialize the player
 
@@ -44,10 +60,24 @@ class Player:
         """
         raise NotImplementedError
 
+    def sample_action(self, game):
+        """Should return a random playable action (e.g. with
+        models/actions.py sample_playable_action). Only called if
+        samples_actions is True, instead of .decide.
+
+        Args:
+            game (Game): complete game state. read-only.
+        """
+        raise NotImplementedError
+
     def reset_state(self):
         """Hook for resetting state between games"""
         pass
 
+    def close(self):
+        """Hook for releasing resources (e.g. worker processes) once done"""
+        pass
+
     def __repr__(self):
         return f"{type(self).__name__}:{self.color.value}"
 
@@ -84,5 +114,12 @@ class HumanPlayer(Player):
 class RandomPlayer(Player):
     """Random AI player that selects an action randomly from the list of playable_actions"""
 
+    samples_actions = True
+
     def decide(self, game, playable_actions):
-        return random.choice(playable_actions)
+        return game.rng.choice(playable_actions)
+
+    def sample_action(self, game):
+        from catanatron.models.actions import sample_playable_action
+
+        return sample_playable_action(game.state, game.rng)
@@ -0,0 +1,127 @@
+"""
+Static node/edge relationships of the base board, as plain tables.
+
+Every map in the game is a subset of the base map's nodes and edges, so
+these tables serve all maps. The base map graph includes the nodes around
+water tiles, so it has more than the NUM_NODES land nodes; land nodes are
+the first NUM_NODES ids. Edges are numbered by EDGE_INDEX. Small integer
+ids let sets of nodes or edges be stored as bitboards: Python ints where
+node n (or edge i) is bit n (or bit i).
+
+Neighbor lists keep the order in which the base map's tiles list their
+nodes and edges (the same order networkx used to report them), so code that
+walks them visits nodes in the same order as before.
+"""
+
+import functools
+from collections import deque
+from typing import Dict, List, Tuple
+
+from catanatron.models.map import (
+    BASE_MAP_TEMPLATE,
+    NUM_NODES,
+    CatanMap,
+    EdgeId,
+    NodeId,
+)
+
+
+def _base_map_adjacency() -> Dict[NodeId, List[NodeId]]:
+    base_map = CatanMap.from_template(BASE_MAP_TEMPLATE)
+    adjacency: Dict[NodeId, List[NodeId]] = dict()
+    for tile in base_map.tiles.values():
+        for node_id in tile.nodes.values():
+            adjacency.setdefault(node_id, [])
+        for a, b in tile.edges.values():
+            for u, v in [(a, b), (b, a)]:
+                neighbors = adjacency.setdefault(u, [])
+                if v not in neighbors:
+                    neighbors.append(v)
+    return adjacency
+
+
+_ADJACENCY = _base_map_adjacency()
+
+# Node ids in base map order (land nodes come first).
+GRAPH_NODES: Tuple[NodeId, ...] = tuple(_ADJACENCY.keys())
+NUM_GRAPH_NODES = len(GRAPH_NODES)
+assert sorted(GRAPH_NODES) == list(range(NUM_GRAPH_NODES))
+
+# NODE_NEIGHBORS[n] are the nodes adjacent to n.
+NODE_NEIGHBORS: Tuple[Tuple[NodeId, ...], ...] = tuple(
+    tuple(_ADJACENCY[node_id]) for node_id in range(NUM_GRAPH_NODES)
+)
+# NODE_EDGES[n] are the (n, neighbor) edges incident to n.
+NODE_EDGES: Tuple[Tuple[EdgeId, ...], ...] = tuple(
+    tuple((node_id, neighbor) for neighbor in neighbors)
+    for node_id, neighbors in enumerate(NODE_NEIGHBORS)
+)
+
+# EDGES[i] is the (a, b) edge with a < b that EDGE_INDEX maps to i.
+EDGES: List[EdgeId] = sorted(
+    {(min(a, b), max(a, b)) for edges in NODE_EDGES for a, b in edges}
+)
+EDGE_INDEX: Dict[EdgeId, int] = dict()
+for _i, (_a, _b) in enumerate(EDGES):
+    EDGE_INDEX[(_a, _b)] = _i
+    EDGE_INDEX[(_b, _a)] = _i
+
+NODE_NEIGHBORS_MASK: List[int] = [0] * NUM_GRAPH_NODES
+NODE_EDGES_MASK: List[int] = [0] * NUM_GRAPH_NODES
+for _i, (_a, _b) in enumerate(EDGES):
+    NODE_NEIGHBORS_MASK[_a] |= 1 << _b
+    NODE_NEIGHBORS_MASK[_b] |= 1 << _a
+    NODE_EDGES_MASK[_a] |= 1 << _i
+    NODE_EDGES_MASK[_b] |= 1 << _i
+
+
+def _all_pairs_distances() -> Tuple[Tuple[int, ...], ...]:
+    rows = []
+    for source in range(NUM_GRAPH_NODES):
+        distances = [-1] * NUM_GRAPH_NODES
+        distances[source] = 0
+        queue = deque([source])
+        while queue:
+            node_id = queue.popleft()
+            for neighbor in NODE_NEIGHBORS[node_id]:
+                if distances[neighbor] == -1:
+                    distances[neighbor] = distances[node_id] + 1
+                    queue.append(neighbor)
+        rows.append(tuple(distances))
+    return tuple(rows)
+
+
+# NODE_DISTANCES[a][b] is the number of edges between nodes a and b.
+NODE_DISTANCES = _all_pairs_distances()
+
+
+@functools.lru_cache(3)  # None, range(54), range(24)
+def get_edges(land_nodes=None) -> List[EdgeId]:
+    """Edges between the given nodes (all land nodes by default). Each edge is
+    listed once, oriented from the node that comes first in GRAPH_NODES."""
+    nodes = frozenset(land_nodes or range(NUM_NODES))
+    edges = []
+    seen = set()
+    for node_id in GRAPH_NODES:
+        if node_id not in nodes:
+            continue
+        for neighbor in NODE_NEIGHBORS[node_id]:
+            if neighbor in nodes and neighbor not in seen:
+                edges.append((node_id, neighbor))
+        seen.add(node_id)
+    return edges
+
+
+def iter_bits(mask: int):
+    """Yields the indices of the set bits of mask, in increasing order."""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def nodes_mask(node_ids) -> int:
+    mask = 0
+    for node_id in node_ids:
+        mask |= 1 << node_id
+    return mask
@@ -1,23 +1,124 @@
+import contextlib
+import functools
 import math
 import time
-from collections import defaultdict
-import random
+from array import array
+from collections import OrderedDict, defaultdict
 
 from catanatron.game import Game
+from catanatron.models.actions import sample_playable_action
 from catanatron.models.player import Player
-from catanatron.players.playouts import run_playout
-from catanatron.players.tree_search_utils import execute_spectrum, list_prunned_actions
+from catanatron.players.playouts import (
+    PersistentPool,
+    map_games,
+    parallel_map,
+    run_playout,
+    worker_pool,
+)
+from catanatron.players.tree_search_utils import (
+    execute_outcome,
+    list_prunned_actions,
+    list_spectrum,
+)
+from catanatron.players.value import DEFAULT_WEIGHTS, get_value_fn
+from catanatron.players.weighted_random import WEIGHTS_BY_ACTION_TYPE
 
 SIMULATIONS = 10
 epsilon = 1e-8
 EXP_C = 2**0.5
 
+# Ways MCTSPlayer can use workers > 1:
+#   "root": each worker searches its own tree; root statistics are summed.
+#   "tree": one tree; leaves are selected in batches of workers, with
+#       their playouts played in parallel (see StateNode.run_simulations).
+PARALLEL_MODES = ("root", "tree")
+
+# Visits (without wins) that each pending playout of a tree parallel batch
+#   adds to its path until backpropagated, so the rest of the batch explores
+#   other paths instead of piling onto the current best one.
+VIRTUAL_LOSS = 3
+
+# With progressive widening, nodes visited n times consider their first
+#   ceil(WIDENING_C * n ** WIDENING_ALPHA) actions, by WEIGHTS_BY_ACTION_TYPE.
+WIDENING_C = 2
+WIDENING_ALPHA = 0.5
+
+# Truncated rollouts score their last position with a value function (see
+#   players/value.py), softmaxed over colors in units of VALUE_SCALE. So each
+#   public VP of lead multiplies the odds of winning by e.
+VALUE_SCALE = DEFAULT_WEIGHTS["public_vps"]
+END_OF_TURN = "turn"  # rollout_plies to play until the current turn ends
+
+# Games of non-root nodes a tree keeps materialized (see StateNode.game)
+MAX_CACHED_GAMES = 64
+
 
 class MCTSPlayer(Player):
-    def __init__(self, color, num_simulations=SIMULATIONS, prunning=False):
+    """Monte Carlo Tree Search. Keeps the tree between decisions, and starts
+    the next one from the subtree of what actually happened since (see
+    StateNode.find), if the tree has it.
+
+    With workers > 1, splits the simulations across that many processes, as
+    per parallel_mode (see PARALLEL_MODES). Root parallel trees live in the
+    workers, so they aren't kept between decisions. Tree parallel workers
+    are a PersistentPool kept between decisions, so call .close when done.
+
+    num_simulations is a maximum: if given, searches stop after time_budget_ms,
+    and if stop_early, as soon as the decision is clear (see
+    StateNode.is_decided), leaving easy decisions almost instant.
+
+    With progressive_widening, nodes add actions to search as they get visits
+    (see WIDENING_C), most promising types first.
+
+    If rollout_plies is given, simulations don't play until the end of the
+    game, but only rollout_plies random plies (or until the end of the turn,
+    with END_OF_TURN), and score that position with value_fn (see
+    evaluate_position). Much cheaper, so many more simulations fit in the
+    same budget. rollout_mix blends in the result of a full playout.
+    """
+
+    def __init__(
+        self,
+        color,
+        num_simulations=SIMULATIONS,
+        prunning=False,
+        workers=1,
+        parallel_mode="root",
+        time_budget_ms=None,
+        stop_early=False,
+        progressive_widening=False,
+        rollout_plies=None,
+        value_fn="base_fn",
+        rollout_mix=0.0,
+    ):
         super().__init__(color)
         self.num_simulations = int(num_simulations)
-        self.prunning = bool(prunning)
+        self.prunning = str(prunning).lower() != "false"
+        self.workers = int(workers)
+        if parallel_mode not in PARALLEL_MODES:
+            raise ValueError(f"parallel_mode must be one of {PARALLEL_MODES}")
+        self.parallel_mode = parallel_mode
+        self.time_budget_ms = (
+            None
+            if str(time_budget_ms).lower() in ("", "none")
+            else float(time_budget_ms)
+        )
+        self.stop_early = str(stop_early).lower() != "false"
+        self.progressive_widening = str(progressive_widening).lower() != "false"
+        if str(rollout_plies).lower() in ("", "none"):
+            self.evaluate = None  # full playouts
+        else:
+            if rollout_plies != END_OF_TURN:
+                rollout_plies = int(rollout_plies)
+            get_value_fn(value_fn, None)  # raises ValueError if unknown
+            self.evaluate = functools.partial(
+                evaluate_position,
+                rollout_plies=rollout_plies,
+                value_fn=value_fn,
+                rollout_mix=float(rollout_mix),
+            )
+        self.root = None
+        self.pool = PersistentPool(self.workers)
 
     def decide(self, game: Game, playable_actions):
         actions = list_prunned_actions(game) if self.prunning else playable_actions
@@ -25,110 +126,588 @@ class MCTSPlayer(Player):
             return actions[0]
 
         start = time.time()
-        root = StateNode(self.color, game.copy(), None, self.prunning)
-        for _ in range(self.num_simulations):
-            root.run_simulation()
+        if self.workers > 1 and self.parallel_mode == "root":
+            return self.decide_root_parallel(game)
+
+        root = self.root.find(game) if self.root is not None else None
+        if root is None:
+            root = StateNode(
+                self.color,
+                game.copy(),
+                None,
+                self.prunning,
+                widening=self.progressive_widening,
+                evaluate=self.evaluate,
+            )
+        root.run_simulations(
+            self.num_simulations,
+            self.workers,
+            self.time_budget_ms,
+            self.stop_early,
+            pool=self.pool.get(),
+        )
+        self.root = root
 
         # print(
         #     f"{str(self)} took {time.time() - start} secs to decide {len(playable_actions)}"
         # )
-        return root.choose_best_action()
+        return root.most_visited_action()
+
+    def decide_root_parallel(self, game: Game):
+        """Searches independent trees in self.workers processes, and chooses
+        as StateNode.most_visited_action would with their summed statistics.
+        """
+        searches = []
+        for i in range(self.workers):
+            num_simulations = self.num_simulations // self.workers
+            num_simulations += i < self.num_simulations % self.workers
+            if num_simulations > 0:  # copies, so that each tree has its own rng
+                searches.append((game.copy(), num_simulations))
+        search = functools.partial(
+            search_root_stats,
+            self.color,
+            self.prunning,
+            time_budget_ms=self.time_budget_ms,
+            stop_early=self.stop_early,
+            widening=self.progressive_widening,
+            evaluate=self.evaluate,
+        )
+
+        children_stats = defaultdict(list)
+        for _, tree_children_stats in parallel_map(search, searches):
+            for action, outcomes in tree_children_stats.items():
+                stats = children_stats[action]
+                if len(stats) == 0:
+                    stats.extend([proba, 0, 0] for proba, _, _ in outcomes)
+                for stat, (_, wins, outcome_visits) in zip(stats, outcomes):
+                    stat[1] += wins
+                    stat[2] += outcome_visits
+
+        self.root = None
+        return max(
+            game.playable_actions,
+            key=lambda action: (
+                sum(visits for _, _, visits in children_stats[action]),
+                sum(wins for _, wins, _ in children_stats[action]),
+            ),
+        )
+
+    def reset_state(self):
+        self.root = None
+
+    def close(self):
+        self.pool.close()
 
     def __repr__(self):
         return super().__repr__() + f"({self.num_simulations}:{self.prunning})"
 
 
+class SearchTree:
+    """What the nodes of a search tree share: their visits and wins, in arrays
+    indexed by node id (instead of a Python number per node), and an LRU
+    cache of up to max_cached_games materialized games (see StateNode.game).
+    """
+
+    def __init__(self, rng, max_cached_games=None):
+        self.visits = array("q")
+        self.wins = array("d")
+        self.games = OrderedDict()  # node id to Game, least recently used first
+        self.max_cached_games = max_cached_games or MAX_CACHED_GAMES
+        self.rng = rng  # to sample outcomes of selected actions
+
+    def add_node(self) -> int:
+        self.visits.append(0)
+        self.wins.append(0)
+        return len(self.visits) - 1
+
+    def cache_game(self, node_id, game: Game):
+        self.games[node_id] = game
+        if len(self.games) > self.max_cached_games:
+            self.games.popitem(last=False)
+
+    def extract(self, root) -> "SearchTree":
+        """Moves the subtree of root (a node of this tree) into a new tree,
+        renumbering its nodes, with their statistics and cached games. So
+        trees kept across decisions only hold what's still reachable.
+        """
+        tree = SearchTree(self.rng, self.max_cached_games)
+        new_ids = {}
+        agenda = [root]
+        while agenda:
+            node = agenda.pop()
+            new_id = tree.add_node()
+            tree.visits[new_id] = self.visits[node.id]
+            tree.wins[new_id] = self.wins[node.id]
+            new_ids[node.id] = new_id
+            node.tree, node.id = tree, new_id
+            if not node.is_leaf():
+                agenda.extend(
+                    c for outcomes in node.children.values() for c, _ in outcomes
+                )
+        for node_id, game in self.games.items():  # least recently used first
+            if node_id in new_ids:
+                tree.games[new_ids[node_id]] = game
+        return tree
+
+
 class StateNode:
-    def __init__(self, color, game: Game, parent, prunning=False):
+    """Node of the search tree. Only holds its edges (parent, children and the
+    outcome from its parent's position), with its statistics in the shared
+    SearchTree. Games are materialized when read (see .game), which is when
+    selected, by replaying outcomes from the closest ancestor with one. So
+    most children of wide nodes never copy a game, and a tree holds at most
+    MAX_CACHED_GAMES games besides the root's, however long the search.
+
+    Leaves are scored with evaluate(game, color), a win probability, if given
+    (see evaluate_position). Otherwise by whether a full playout wins.
+    """
+
+    __slots__ = (
+        "level",
+        "color",
+        "parent",
+        "tree",
+        "id",
+        "_game",
+        "outcome",
+        "children",
+        "actions",
+        "prunning",
+        "widening",
+        "unexpanded_actions",
+        "evaluate",
+        "terminal",
+        "result",
+    )
+
+    def __init__(
+        self,
+        color,
+        game: Game,
+        parent,
+        prunning=False,
+        outcome=None,
+        widening=False,
+        evaluate=None,
+    ):
         self.level = 0 if parent is None else parent.level + 1
         self.color = color  # color of player carrying out MCTS
         self.parent = parent
-        self.game = game  # state
+        self.tree = SearchTree(game.rng) if parent is None else parent.tree
+        self.id = self.tree.add_node()
+        self._game = game  # kept if given (e.g. roots), else cached in tree.games
+        # (option_action, option_action_record) from parent's game to this one.
+        #   Once materialized, (action, action_record) of what happened (so
+        #   replays are exact), or () if nothing did (e.g. an imagined steal).
+        self.outcome = outcome
         self.children = []
+        self.actions = None  # playable actions, once expanded
         self.prunning = prunning
+        self.widening = widening
+        self.unexpanded_actions = ()  # by prior, if widening
+        self.evaluate = evaluate
 
-        self.wins = 0
-        self.visits = 0
+        self.terminal = None  # whether game has a winner, once known
         self.result = None  # set if terminal
 
+    @property
+    def visits(self):
+        return self.tree.visits[self.id]
+
+    @visits.setter
+    def visits(self, visits):
+        self.tree.visits[self.id] = visits
+
+    @property
+    def wins(self):
+        return self.tree.wins[self.id]
+
+    @wins.setter
+    def wins(self, wins):
+        self.tree.wins[self.id] = wins
+
+    @property
+    def game(self) -> Game:
+        if self._game is not None:
+            return self._game
+        games = self.tree.games
+        if self.id in games:
+            games.move_to_end(self.id)
+            return games[self.id]
+
+        path = []
+        node = self
+        while node._game is None and node.id not in games:
+            path.append(node)
+            node = node.parent
+        game = node.game.copy()
+        for node in reversed(path):
+            if node.outcome:
+                record = execute_outcome(game, *node.outcome)
+                node.outcome = () if record is None else (record.action, record)
+        self.tree.cache_game(self.id, game)
+        return game
+
+    @game.setter
+    def game(self, game: Game):
+        self._game = game
+        self.tree.games.pop(self.id, None)
+
     def run_simulation(self):
+        tmp = self.select_leaf()
+        if tmp.is_terminal():
+            value = tmp.result == self.color
+        elif self.evaluate is not None:
+            value = self.evaluate(tmp.game, self.color)
+        else:
+            value = tmp.playout() == self.color
+
+        # backpropagate
+        tmp.backpropagate(value)
+
+    def run_simulations(
+        self,
+        num_simulations,
+        num_workers=1,
+        time_budget_ms=None,
+        stop_early=False,
+        pool=None,
+    ):
+        """Runs up to num_simulations simulations, fewer if time_budget_ms runs
+        out or, if stop_early, once is_decided for the simulations left.
+
+        With num_workers > 1, selects leaves in batches of num_workers and plays
+        their playouts in parallel, in pool if given (e.g. a player's
+        PersistentPool), else in a worker_pool kept for the whole search.
+        Until backpropagated, each selected path carries VIRTUAL_LOSS extra
+        visits without wins, steering the rest of the batch to other leaves.
+
+        Returns:
+            int: Number of simulations run.
+        """
+        start = time.perf_counter()
+        deadline = None if time_budget_ms is None else start + time_budget_ms / 1000
+        done = 0
+        if pool is not None:
+            pool_context = contextlib.nullcontext(pool)
+        else:
+            pool_context = worker_pool(num_workers)
+        with pool_context as pool:
+            while done < num_simulations:
+                batch_size = min(num_workers, num_simulations - done)
+                if batch_size <= 1:
+                    self.run_simulation()
+                else:
+                    self.run_simulation_batch(batch_size, pool)
+                done += batch_size
+
+                if deadline is None and not stop_early:
+                    continue
+                now = time.perf_counter()
+                if deadline is not None and now >= deadline:
+                    break
+                remaining = num_simulations - done
+                if deadline is not None:  # at the rate so far
+                    remaining = min(
+                        remaining,
+                        int(done * (deadline - now) / max(now - start, 1e-9)),
+                    )
+                if stop_early and self.is_decided(remaining):
+                    break
+        return done
+
+    def run_simulation_batch(self, batch_size, pool=None):
+        """Runs batch_size simulations, with their playouts mapped in pool
+        (see playouts.worker_pool), or serially if None."""
+        leaves = [self.select_leaf(VIRTUAL_LOSS) for _ in range(batch_size)]
+        # copies, so that playouts from the same leaf differ
+        games = [leaf.game.copy() for leaf in leaves if not leaf.is_terminal()]
+        if self.evaluate is not None:
+            evaluate = functools.partial(self.evaluate, color=self.color)
+            playout_values = iter(map_games(pool, evaluate, games))
+        else:
+            winners = map_games(pool, run_playout, games)
+            playout_values = (winner == self.color for winner in winners)
+        for leaf in leaves:
+            if not leaf.is_terminal():
+                value = next(playout_values)
+            else:
+                value = leaf.result == self.color
+            leaf.backpropagate(value, VIRTUAL_LOSS)
+
+    def is_decided(self, remaining_simulations):
+        """Whether the most visited action will stay so: either it leads by
+        more visits than remaining_simulations, or the confidence interval of
+        its win rate is above everyone else's.
+        """
+        if len(self.children) < 2:
+            return len(self.children) == 1
+        stats = sorted(map(self.action_visits_and_wins, self.children), reverse=True)
+        (visits, wins), others = stats[0], stats[1:]
+        if visits - others[0][0] > remaining_simulations:
+            return True
+        if any(other_visits == 0 for other_visits, _ in others):
+            return False
+
+        log_visits = math.log(self.visits)
+        lower_bound = wins / visits - EXP_C * (log_visits / visits) ** 0.5
+        return all(
+            other_wins / other_visits + EXP_C * (log_visits / other_visits) ** 0.5
+            < lower_bound
+            for other_visits, other_wins in others
+        )
+
+    def select_leaf(self, virtual_loss=0):
+        """Walks down (counting visits) to the node to playout from, expanding
+        the leaf it reaches if not terminal. virtual_loss more visits are
+        added along the way, for .backpropagate to take back."""
         # select
         tmp = self
-        tmp.visits += 1
+        tmp.visits += 1 + virtual_loss
         while not tmp.is_leaf():
             tmp = tmp.select()
-            tmp.visits += 1
+            tmp.visits += 1 + virtual_loss
 
         if not tmp.is_terminal():
             # expand
             tmp.expand()
             tmp = tmp.select()
-            tmp.visits += 1
+            tmp.visits += 1 + virtual_loss
+        return tmp
 
-            # playout
-            result = tmp.playout()
-        else:
-            result = self.game.winning_color()
+    def find(self, game: Game):
+        """Finds the node of game's position, following the action records game
+        has past this node's position. The found node becomes a root (keeping
+        its subtree and statistics) on a copy of game.
 
-        # backpropagate
-        tmp.backpropagate(result == self.color)
+        Returns:
+            StateNode: or None if the position isn't in this tree.
+        """
+        log = self.game.state.action_log
+        game_log = game.state.action_log
+        if game.id != self.game.id or len(game_log) < len(log):
+            return None
+
+        node = self
+        for record in game_log.records_after(len(log)):
+            if node.is_leaf():
+                return None
+            node = next(
+                (
+                    child
+                    for outcomes in node.children.values()
+                    for child, _ in outcomes
+                    if child.happened(record)
+                ),
+                None,
+            )
+            if node is None:
+                return None
+
+        # e.g. imagined steals and dev cards can differ in hidden information
+        if node.game.state.hash != game.state.hash:
+            return None
+        node.parent = None
+        node.tree.extract(node)
+        node.game = game.copy()
+        return node
+
+    def happened(self, record):
+        """Whether record is what led from the parent's position to this one"""
+        if not self.outcome or self.outcome[0] != record.action:
+            return False
+        self.game  # materializes outcome into what happened, if anything
+        return len(self.outcome) == 2 and self.outcome[1] == record
 
     def is_leaf(self):
         return len(self.children) == 0
 
     def is_terminal(self):
-        return self.game.winning_color() is not None
+        if self.terminal is None:
+            self.result = self.game.winning_color()
+            self.terminal = self.result is not None
+        return self.terminal
 
     def expand(self):
-        children = defaultdict(list)
         playable_actions = self.game.playable_actions
         actions = list_prunned_actions(self.game) if self.prunning else playable_actions
-        for action in actions:
-            outcomes = execute_spectrum(self.game, action)
-            for state, proba in outcomes:
-                children[action].append(
-                    (StateNode(self.color, state, self, self.prunning), proba)
-                )
-        self.children = children
+        self.actions = playable_actions
+        self.children = defaultdict(list)
+        if self.widening:
+            self.unexpanded_actions = sorted(
+                reversed(actions),
+                key=lambda a: WEIGHTS_BY_ACTION_TYPE.get(a.action_type, 1),
+            )  # popped from the end: most promising (then first) first
+            self.widen()
+        else:
+            for action in actions:
+                self.add_children(action)
+
+    def add_children(self, action):
+        for option_action, option_action_record, proba in list_spectrum(
+            self.game, action
+        ):
+            child = StateNode(
+                self.color,
+                None,
+                self,
+                self.prunning,
+                (option_action, option_action_record),
+                self.widening,
+                self.evaluate,
+            )
+            self.children[action].append((child, proba))
+
+    def widen(self):
+        """Adds the next unexpanded actions, up to as many as visits allow"""
+        num_actions = math.ceil(WIDENING_C * max(self.visits, 1) ** WIDENING_ALPHA)
+        while self.unexpanded_actions and len(self.children) < num_actions:
+            self.add_children(self.unexpanded_actions.pop())
 
     def select(self):
         """select a child StateNode"""
+        if self.unexpanded_actions:
+            self.widen()
         action = self.choose_best_action()
 
         # Idea: Allow randomness to guide to next children too
         children = self.children[action]
         children_states = list(map(lambda c: c[0], children))
         children_probas = list(map(lambda c: c[1], children))
-        return random.choices(children_states, weights=children_probas, k=1)[0]
+        rng = self.tree.rng
+        return rng.choices(children_states, weights=children_probas, k=1)[0]
 
     def choose_best_action(self):
+        actions = (
+            self.actions if self.actions is not None else self.game.playable_actions
+        )
         scores = []
-        for action in self.game.playable_actions:
+        for action in actions:
             score = self.action_children_expected_score(action)
             scores.append(score)
 
         idx = max(range(len(scores)), key=lambda i: scores[i])
-        action = self.game.playable_actions[idx]
+        action = actions[idx]
         return action
 
+    def most_visited_action(self):
+        """Action to play once searched: the most visited one (as is_decided
+        assumes), breaking ties by wins. Unlike choose_best_action, without
+        the exploration bonus, which is only there to guide the search.
+        """
+        if self.is_leaf():
+            return self.choose_best_action()
+        return max(self.children, key=self.action_visits_and_wins)
+
+    def action_visits_and_wins(self, action):
+        outcomes = self.children.get(action, ())
+        return (
+            sum(child.visits for child, _ in outcomes),
+            sum(child.wins for child, _ in outcomes),
+        )
+
     def action_children_expected_score(self, action):
-        score = 0
-        for child, proba in self.children[action]:
-            score += proba * (
-                child.wins / (child.visits + epsilon)
-                + EXP_C
-                * (math.log(self.visits + epsilon) / (child.visits + epsilon)) ** 0.5
-            )
-        return score
+        wins, visits = self.tree.wins, self.tree.visits
+        stats = [
+            (proba, wins[child.id], visits[child.id])
+            for child, proba in self.children.get(action, ())
+        ]
+        return expected_score(stats, visits[self.id])
 
     def playout(self):
         return run_playout(self.game)
 
-    def backpropagate(self, value):
-        self.wins += value
+    def backpropagate(self, value, virtual_loss=0):
+        """Adds value to the wins up to the root, and takes back the
+        virtual_loss visits .select_leaf added."""
+        wins, visits = self.tree.wins, self.tree.visits
+        wins[self.id] += value
+        visits[self.id] -= virtual_loss
 
         tmp = self
         while tmp.parent is not None:
             tmp = tmp.parent
 
-            tmp.wins += value
+            wins[tmp.id] += value
+            visits[tmp.id] -= virtual_loss
+
+
+def expected_score(stats, visits):
+    """UCT score of an action, weighting its (proba, wins, visits) outcome
+    stats by proba. visits is the parent's visits."""
+    score = 0
+    for proba, child_wins, child_visits in stats:
+        score += proba * (
+            child_wins / (child_visits + epsilon)
+            + EXP_C * (math.log(visits + epsilon) / (child_visits + epsilon)) ** 0.5
+        )
+    return score
+
+
+def evaluate_position(
+    game: Game, color, rollout_plies=None, value_fn="base_fn", rollout_mix=0.0
+) -> float:
+    """Probability of color winning game, estimated by a random rollout.
+
+    Args:
+        rollout_plies (int | str, optional): Plies to play before scoring the
+            position with value_fn, or END_OF_TURN to play until the current
+            turn ends. If None, plays until the end of the game instead.
+        value_fn (str, optional): Name of the value function (see
+            value.get_value_fn) whose values of each color are softmaxed (see
+            VALUE_SCALE) into color's probability.
+        rollout_mix (float, optional): Weight of the result of a full playout
+            in the returned value (as with AlphaGo's lambda).
+    """
+    if rollout_plies is None:
+        return float(run_playout(game) == color)
+    value = truncated_rollout_value(game, color, rollout_plies, value_fn)
+    if rollout_mix > 0:
+        value = (1 - rollout_mix) * value + rollout_mix * (run_playout(game) == color)
+    return value
+
+
+def truncated_rollout_value(game: Game, color, rollout_plies, value_fn):
+    game = game.copy()
+    state = game.state
+    num_turns = state.num_turns
+    plies = 0
+    while game.winning_color() is None:
+        if rollout_plies == END_OF_TURN:
+            if state.num_turns != num_turns:
+                break
+        elif plies >= rollout_plies:
+            break
+        action = sample_playable_action(state, game.rng)
+        game.execute(action, validate_action=False)
+        plies += 1
+
+    winner = game.winning_color()
+    if winner is not None:
+        return float(winner == color)
+    fn = get_value_fn(value_fn, None)
+    values = {c: fn(game, c) / VALUE_SCALE for c in state.colors}
+    max_value = max(values.values())
+    odds = {c: math.exp(v - max_value) for c, v in values.items()}
+    return odds[color] / sum(odds.values())
+
+
+def search_root_stats(
+    color,
+    prunning,
+    search,
+    time_budget_ms=None,
+    stop_early=False,
+    widening=False,
+    evaluate=None,
+):
+    """Runs a (game, num_simulations) search. Returns the root visits and, by
+    action, the (proba, wins, visits) of each outcome child."""
+    game, num_simulations = search
+    root = StateNode(color, game, None, prunning, widening=widening, evaluate=evaluate)
+    root.run_simulations(num_simulations, 1, time_budget_ms, stop_early)
+    children_stats = {
+        action: [(proba, child.wins, child.visits) for child, proba in outcomes]
+        for action, outcomes in root.children.items()
+    }
+    return root.visits, children_stats
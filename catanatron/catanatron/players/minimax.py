@@ -1,10 +1,13 @@
 import time
-import random
 from typing import Any
 
 from catanatron.game import Game
 from catanatron.models.player import Player
-from catanatron.players.tree_search_utils import expand_spectrum, list_prunned_actions
+from catanatron.players.tree_search_utils import (
+    execute_outcome_with_undo,
+    list_prunned_actions,
+    list_spectrum,
+)
 from catanatron.players.value import (
     DEFAULT_WEIGHTS,
     get_value_fn,
@@ -57,11 +60,11 @@ class AlphaBetaPlayer(Player):
         if len(actions) == 1:
             return actions[0]
 
-        if self.epsilon is not None and random.random() < self.epsilon:
-            return random.choice(playable_actions)
+        if self.epsilon is not None and game.rng.random() < self.epsilon:
+            return game.rng.choice(playable_actions)
 
         start = time.time()
-        state_id = str(len(game.state.action_records))
+        state_id = str(len(game.state.action_log))
         node = DebugStateNode(state_id, self.color)  # i think it comes from outside
         deadline = start + MAX_SEARCH_TIME_SECS
         result = self.alphabeta(
@@ -102,24 +105,28 @@ class AlphaBetaPlayer(Player):
             return None, value
 
         maximizingPlayer = game.state.current_color() == self.color
+        # Outcomes are searched in place with game.execute_with_undo/game.undo.
         actions = self.get_actions(game)  # list of actions.
-        action_outcomes = expand_spectrum(game, actions)  # action => (game, proba)[]
 
         if maximizingPlayer:
             best_action = None
             best_value = float("-inf")
-            for i, (action, outcomes) in enumerate(action_outcomes.items()):
+            for i, action in enumerate(actions):
                 action_node = DebugActionNode(action)
 
                 expected_value = 0
-                for j, (outcome, proba) in enumerate(outcomes):
+                outcomes = list_spectrum(game, action)
+                for j, (option_action, option_record, proba) in enumerate(outcomes):
+                    undo = execute_outcome_with_undo(game, option_action, option_record)
                     out_node = DebugStateNode(
-                        f"{node.label} {i} {j}", outcome.state.current_color()
+                        f"{node.label} {i} {j}", game.state.current_color()
                     )
 
                     result = self.alphabeta(
-                        outcome, depth - 1, alpha, beta, deadline, out_node
+                        game, depth - 1, alpha, beta, deadline, out_node
                     )
+                    if undo is not None:
+                        game.undo(undo)
                     value = result[1]
                     expected_value += proba * value
 
@@ -141,18 +148,22 @@ class AlphaBetaPlayer(Player):
         else:
             best_action = None
             best_value = float("inf")
-            for i, (action, outcomes) in enumerate(action_outcomes.items()):
+            for i, action in enumerate(actions):
                 action_node = DebugActionNode(action)
 
                 expected_value = 0
-                for j, (outcome, proba) in enumerate(outcomes):
+                outcomes = list_spectrum(game, action)
+                for j, (option_action, option_record, proba) in enumerate(outcomes):
+                    undo = execute_outcome_with_undo(game, option_action, option_record)
                     out_node = DebugStateNode(
-                        f"{node.label} {i} {j}", outcome.state.current_color()
+                        f"{node.label} {i} {j}", game.state.current_color()
                     )
 
                     result = self.alphabeta(
-                        outcome, depth - 1, alpha, beta, deadline, out_node
+                        game, depth - 1, alpha, beta, deadline, out_node
                     )
+                    if undo is not None:
+                        game.undo(undo)
                     value = result[1]
                     expected_value += proba * value
 
@@ -255,22 +266,25 @@ class SameTurnAlphaBetaPlayer(AlphaBetaPlayer):
             return None, value
 
         actions = self.get_actions(game)  # list of actions.
-        action_outcomes = expand_spectrum(game, actions)  # action => (game, proba)[]
 
         best_action = None
         best_value = float("-inf")
-        for i, (action, outcomes) in enumerate(action_outcomes.items()):
+        for i, action in enumerate(actions):
             action_node = DebugActionNode(action)
 
             expected_value = 0
-            for j, (outcome, proba) in enumerate(outcomes):
+            outcomes = list_spectrum(game, action)
+            for j, (option_action, option_record, proba) in enumerate(outcomes):
+                undo = execute_outcome_with_undo(game, option_action, option_record)
                 out_node = DebugStateNode(
-                    f"{node.label} {i} {j}", outcome.state.current_color()
+                    f"{node.label} {i} {j}", game.state.current_color()
                 )
 
                 result = self.alphabeta(
-                    outcome, depth - 1, alpha, beta, deadline, out_node
+                    game, depth - 1, alpha, beta, deadline, out_node
                 )
+                if undo is not None:
+                    game.undo(undo)
                 value = result[1]
                 expected_value += proba * value
 
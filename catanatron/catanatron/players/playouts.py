@@ -1,14 +1,26 @@
+import contextlib
+import functools
+import os
+import pickle
+import sys
 import time
-import random
+import traceback
 import multiprocessing
+import multiprocessing.pool
 from collections import Counter
+from typing import Callable, List, Optional, Sequence
 
-from catanatron.game import Game
-from catanatron.models.player import Player
+from catanatron.game import TURNS_LIMIT, Game
+from catanatron.models.actions import sample_playable_action
+from catanatron.models.player import Color, Player
 
 DEFAULT_NUM_PLAYOUTS = 25
 USE_MULTIPROCESSING = True
 NUM_WORKERS = multiprocessing.cpu_count()
+# On Linux, workers are forked from the deciding process, so they read its
+#   games copy-on-write instead of receiving them pickled through a Pool.
+USE_FORK = sys.platform.startswith("linux")
+NO_WINNER = 255  # byte workers send for games without winner
 
 PLAYOUTS_BUDGET = 100
 
@@ -19,11 +31,14 @@ PLAYOUTS_BUDGET = 100
 #   on intial placement. 4.187309980392456 secs on initial road.
 # Multithreaded, on different actions
 class GreedyPlayoutsPlayer(Player):
-    """For each playable action, play N random playouts."""
+    """For each playable action, play N random playouts. In a PersistentPool
+    started on the first decision, so call .close when done with the player.
+    """
 
     def __init__(self, color, num_playouts=DEFAULT_NUM_PLAYOUTS):
         super().__init__(color)
         self.num_playouts = int(num_playouts)
+        self.pool = PersistentPool()
 
     def decide(self, game: Game, playable_actions):
         if len(playable_actions) == 1:
@@ -33,15 +48,19 @@ class GreedyPlayoutsPlayer(Player):
         # num_playouts = PLAYOUTS_BUDGET // len(playable_actions)
         num_playouts = self.num_playouts
 
-        best_action = None
-        max_wins = None
+        # Play all actions' playouts in one go, so workers start once per decision
+        games = []
         for action in playable_actions:
             action_applied_game_copy = game.copy()
             action_applied_game_copy.execute(action)
+            games.extend(action_applied_game_copy.copy() for _ in range(num_playouts))
+        winners = map_games(self.pool.get(), run_playout, games)
 
-            counter = run_playouts(action_applied_game_copy, num_playouts)
-
-            wins = counter[self.color]
+        best_action = None
+        max_wins = None
+        for i, action in enumerate(playable_actions):
+            action_winners = winners[i * num_playouts : (i + 1) * num_playouts]
+            wins = action_winners.count(self.color)
             if max_wins is None or wins > max_wins:
                 best_action = action
                 max_wins = wins
@@ -52,28 +71,190 @@ class GreedyPlayoutsPlayer(Player):
         )
         return best_action
 
+    def close(self):
+        self.pool.close()
+
 
 def run_playouts(action_applied_game_copy, num_playouts):
     start = time.time()
     params = []
     for _ in range(num_playouts):
-        params.append(action_applied_game_copy)
-    if USE_MULTIPROCESSING:
-        with multiprocessing.Pool(NUM_WORKERS) as p:
-            counter = Counter(p.map(run_playout, params))
-    else:
-        counter = Counter(map(run_playout, params))
+        # distinct copies, so that each playout gets its own random stream
+        params.append(action_applied_game_copy.copy())
+    counter = Counter(run_playouts_of(params))
     duration = time.time() - start
     # print(f"{num_playouts} playouts took: {duration}. Results: {counter}")
     return counter
 
 
+def run_playouts_of(
+    games: Sequence[Game], num_workers: Optional[int] = None
+) -> List[Optional[Color]]:
+    """Winning color (or None) of a playout from each game, in order.
+    Runs them in num_workers (defaults to NUM_WORKERS) processes if
+    USE_MULTIPROCESSING. Results don't depend on the number of workers.
+    """
+    num_workers = min(num_workers or NUM_WORKERS, len(games))
+    if not USE_MULTIPROCESSING or num_workers <= 1:
+        return list(map(run_playout, games))
+    if USE_FORK:
+        return fork_playouts(games, num_workers)
+
+    # playouts don't use the Player objects, so workers don't need them
+    with multiprocessing.Pool(num_workers) as p:
+        snapshots = [game.to_bytes() for game in games]
+        return p.map(run_playout_from_bytes, snapshots)
+
+
+def fork_playouts(games: Sequence[Game], num_workers: int) -> List[Optional[Color]]:
+    """Like run_playouts_of, in os.fork() children that send back one byte
+    per winner."""
+    return fork_map(run_playout, games, num_workers, _dump_winners, _load_winners)
+
+
+def _dump_winners(winners: List[Optional[Color]]) -> bytes:
+    colors = list(Color)
+    return bytes(NO_WINNER if w is None else colors.index(w) for w in winners)
+
+
+def _load_winners(data: bytes) -> List[Optional[Color]]:
+    colors = list(Color)
+    return [None if code == NO_WINNER else colors[code] for code in data]
+
+
+def parallel_map(function, items: Sequence, num_workers: Optional[int] = None):
+    """[function(item) for item in items], in num_workers (defaults to
+    NUM_WORKERS) processes if USE_MULTIPROCESSING. Forked on Linux, so
+    function and items are only pickled elsewhere (results always are).
+    """
+    num_workers = min(num_workers or NUM_WORKERS, len(items))
+    if not USE_MULTIPROCESSING or num_workers <= 1:
+        return list(map(function, items))
+    if USE_FORK:
+        return fork_map(function, items, num_workers)
+
+    with multiprocessing.Pool(num_workers) as p:
+        return p.map(function, items)
+
+
+@contextlib.contextmanager
+def worker_pool(num_workers: Optional[int] = None):
+    """Context with a long-lived pool of num_workers (defaults to NUM_WORKERS)
+    processes, for many map_games calls without forking each time. The pool
+    is None if not USE_MULTIPROCESSING or num_workers <= 1.
+    """
+    num_workers = num_workers or NUM_WORKERS
+    if not USE_MULTIPROCESSING or num_workers <= 1:
+        yield None
+        return
+    with multiprocessing.Pool(num_workers) as pool:
+        yield pool
+
+
+class PersistentPool:
+    """A worker_pool kept across calls (e.g. across a player's decisions),
+    started on first use and stopped by .close. Pickles without its workers.
+    """
+
+    def __init__(self, num_workers: Optional[int] = None):
+        self.num_workers = num_workers
+        self.pool = None
+
+    def get(self) -> Optional[multiprocessing.pool.Pool]:
+        """The pool to pass to map_games (None if it would be a worker_pool)"""
+        num_workers = self.num_workers or NUM_WORKERS
+        if self.pool is None and USE_MULTIPROCESSING and num_workers > 1:
+            self.pool = multiprocessing.Pool(num_workers)
+        return self.pool
+
+    def close(self):
+        """Stops the workers, if started. .get starts new ones."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def __getstate__(self):
+        return {"num_workers": self.num_workers, "pool": None}
+
+    def __del__(self):
+        self.close()
+
+
+def map_games(pool, function, games: Sequence[Game]) -> list:
+    """[function(game) for game in games], in pool's processes if any (see
+    worker_pool). Games are sent to them with Game.to_bytes."""
+    if pool is None:
+        return list(map(function, games))
+    snapshots = [game.to_bytes() for game in games]
+    return pool.map(functools.partial(_call_from_bytes, function), snapshots)
+
+
+def _call_from_bytes(function, data: bytes):
+    return function(Game.from_bytes(data))
+
+
+def fork_map(
+    function,
+    items: Sequence,
+    num_workers: int,
+    dumps: Callable[[list], bytes] = pickle.dumps,
+    loads: Callable[[bytes], list] = pickle.loads,
+) -> list:
+    """[function(item) for item in items], in os.fork() children. Each maps
+    every num_workers-th item, and writes dumps(results) to a pipe (or the
+    traceback, if it fails).
+
+    Raises:
+        RuntimeError: If a worker fails, with its traceback.
+    """
+    workers = []
+    for i in range(num_workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # child: map, report and exit without cleanup
+            status = 1
+            try:
+                os.close(read_fd)
+                try:
+                    data = dumps(list(map(function, items[i::num_workers])))
+                    status = 0
+                except BaseException:
+                    data = traceback.format_exc().encode()
+                while data:
+                    data = data[os.write(write_fd, data) :]
+            finally:
+                os._exit(status)
+        os.close(write_fd)
+        workers.append((pid, read_fd))
+
+    results: list = [None] * len(items)
+    error = None
+    for i, (pid, read_fd) in enumerate(workers):
+        with os.fdopen(read_fd, "rb") as pipe:
+            data = pipe.read()
+        _, status = os.waitpid(pid, 0)
+        if error is not None:
+            continue
+        if status != 0:
+            error = data.decode(errors="replace") or f"exit status {status}"
+        else:
+            results[i::num_workers] = loads(data)
+    if error is not None:
+        raise RuntimeError(f"Worker process failed:\n{error}")
+    return results
+
+
 def run_playout(action_applied_game_copy):
+    # Plays uniformly at random, sampling actions without building the list
+    #   of playable actions every tick.
     game_copy = action_applied_game_copy.copy()
-    game_copy.play(decide_fn=decide_fn)
+    state = game_copy.state
+    while game_copy.winning_color() is None and state.num_turns < TURNS_LIMIT:
+        action = sample_playable_action(state, game_copy.rng)
+        game_copy.execute(action, validate_action=False)
     return game_copy.winning_color()
 
 
-def decide_fn(self, game, playable_actions):
-    index = random.randrange(0, len(playable_actions))
-    return playable_actions[index]
+def run_playout_from_bytes(data: bytes):
+    return run_playout(Game.from_bytes(data))
@@ -1,7 +1,5 @@
-import random
-
 from catanatron.state_functions import (
-    player_key,
+    get_actual_victory_points,
 )
 from catanatron.models.player import Player
 from catanatron.game import Game
@@ -21,15 +19,14 @@ class VictoryPointPlayer(Player):
         best_value = float("-inf")
         best_actions = []
         for action in playable_actions:
-            game_copy = game.copy()
-            game_copy.execute(action)
+            _, undo = game.execute_with_undo(action)
+            value = get_actual_victory_points(game.state, self.color)
+            game.undo(undo)
 
-            key = player_key(game_copy.state, self.color)
-            value = game_copy.state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"]
             if value == best_value:
                 best_actions.append(action)
             if value > best_value:
                 best_value = value
                 best_actions = [action]
 
-        return random.choice(best_actions)
+        return game.rng.choice(best_actions)
@@ -43,14 +43,13 @@ def execute_deterministic(game, action):
     return [(copy, 1)]
 
 
-def execute_spectrum(game: Game, action: Action):
-    """Returns [(game_copy, proba), ...] tuples for result of given action.
-    Result probas should add up to 1. Does not modify self"""
+def list_spectrum(game: Game, action: Action):
+    """Returns [(option_action, option_action_record, proba), ...] tuples for
+    the possible results of given action, without executing any of them.
+    Result probas should add up to 1."""
     if action.action_type in DETERMINISTIC_ACTIONS:
-        return execute_deterministic(game, action)
+        return [(action, None, 1)]
     elif action.action_type == ActionType.BUY_DEVELOPMENT_CARD:
-        results = []
-
         # Get the possible deck from the perspective of the current player
         # by getting all face down cards
         current_deck = game.state.development_listdeck.copy()
@@ -59,40 +58,34 @@ def execute_spectrum(game: Game, action: Action):
                 number = get_dev_cards_in_hand(game.state, color, card)
                 current_deck += [card] * number
 
-        for card in set(current_deck):
-            option_action = Action(action.color, action.action_type, card)
-            option_game = game.copy()
-            try:
-                option_game.execute(option_action, validate_action=False)
-            except Exception:
-                # ignore exceptions, since player might imagine impossible outcomes.
-                # ignoring means the value function of this node will be flattened,
-                # to the one before.
-                pass
-            results.append((option_game, current_deck.count(card) / len(current_deck)))
-        return results
+        return [
+            (
+                Action(action.color, action.action_type, card),
+                None,
+                current_deck.count(card) / len(current_deck),
+            )
+            for card in set(current_deck)
+        ]
     elif action.action_type == ActionType.ROLL:
         results = []
         for roll in range(2, 13):
             outcome = (roll // 2, math.ceil(roll / 2))
 
             option_action = Action(action.color, action.action_type, outcome)
-            option_game = game.copy()
-            option_game.execute(option_action, validate_action=False)
-            results.append((option_game, number_probability(roll)))
+            results.append((option_action, None, number_probability(roll)))
         return results
     elif action.action_type == ActionType.MOVE_ROBBER:
         (coordinate, robbed_color) = action.value
         if robbed_color is None:  # no one to steal, then deterministic
-            return execute_deterministic(game, action)
+            return [(action, None, 1)]
 
-        results = []
         opponent_hand = get_player_freqdeck(game.state, robbed_color)
         opponent_hand_size = sum(opponent_hand)
         if opponent_hand_size == 0:
             # Nothing to steal
-            return execute_deterministic(game, action)
+            return [(action, None, 1)]
 
+        results = []
         for card in RESOURCES:
             option_action = Action(
                 action.color,
@@ -100,24 +93,72 @@ def execute_spectrum(game: Game, action: Action):
                 (coordinate, robbed_color),
             )
             option_action_record = ActionRecord(action=option_action, result=card)
-            option_game = game.copy()
-            try:
-                option_game.execute(
-                    option_action,
-                    validate_action=False,
-                    action_record=option_action_record,
-                )
-            except Exception:
-                # ignore exceptions, since player might imagine impossible outcomes.
-                # ignoring means the value function of this node will be flattened,
-                # to the one before.
-                pass
-            results.append((option_game, 1 / 5.0))
+            results.append((option_action, option_action_record, 1 / 5.0))
         return results
     else:
         raise RuntimeError("Unknown ActionType " + str(action.action_type))
 
 
+def is_imagined_outcome(option_action: Action, option_action_record):
+    """Outcomes that the searching player imagines (e.g. stealing a card the
+    opponent might not have) are allowed to fail when executed."""
+    return (
+        option_action.action_type == ActionType.BUY_DEVELOPMENT_CARD
+        or option_action_record is not None
+    )
+
+
+def execute_spectrum(game: Game, action: Action):
+    """Returns [(game_copy, proba), ...] tuples for result of given action.
+    Result probas should add up to 1. Does not modify self"""
+    results = []
+    for option_action, option_action_record, proba in list_spectrum(game, action):
+        option_game = game.copy()
+        execute_outcome(option_game, option_action, option_action_record)
+        results.append((option_game, proba))
+    return results
+
+
+def execute_outcome(game: Game, option_action, option_action_record):
+    """Executes one of the list_spectrum outcomes on game (in-place).
+
+    Returns:
+        ActionRecord: of what happened, or None if the outcome was impossible.
+    """
+    try:
+        return game.execute(
+            option_action,
+            validate_action=False,
+            action_record=option_action_record,
+        )
+    except Exception:
+        if not is_imagined_outcome(option_action, option_action_record):
+            raise
+        # ignore exceptions, since player might imagine impossible outcomes.
+        # ignoring means the value function of this node will be flattened,
+        # to the one before.
+
+
+def execute_outcome_with_undo(game: Game, option_action, option_action_record):
+    """In-place version of execute_spectrum for one of the list_spectrum outcomes.
+
+    Returns:
+        Undo token for game.undo, or None if the outcome was impossible (in which
+        case game is left untouched, and so its value is the one before).
+    """
+    try:
+        _, undo = game.execute_with_undo(
+            option_action,
+            validate_action=False,
+            action_record=option_action_record,
+        )
+        return undo
+    except Exception:
+        if not is_imagined_outcome(option_action, option_action_record):
+            raise
+        return None
+
+
 def expand_spectrum(game, actions):
     """Consumes game if playable_actions not specified"""
     children = defaultdict(list)
@@ -185,11 +226,12 @@ def prune_robber_actions(current_color, game, actions):
     production_features = build_production_features(True)
 
     def impact(action):
-        game_copy = game.copy()
-        game_copy.execute(action)
-
-        our_production_sample = production_features(game_copy, current_color)
-        enemy_production_sample = production_features(game_copy, current_color)
+        _, undo = game.execute_with_undo(action)
+        try:
+            our_production_sample = production_features(game, current_color)
+            enemy_production_sample = production_features(game, current_color)
+        finally:
+            game.undo(undo)
         production = value_production(our_production_sample, "P0")
         enemy_production = value_production(enemy_production_sample, "P1")
 
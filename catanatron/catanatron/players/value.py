@@ -1,9 +1,7 @@
-import random
-
 from catanatron.state_functions import (
     get_longest_road_length,
     get_played_dev_cards,
-    player_key,
+    get_visible_victory_points,
     player_num_dev_cards,
     player_num_resource_cards,
 )
@@ -62,7 +60,6 @@ def base_fn(params=DEFAULT_WEIGHTS):
         production = value_production(our_production_sample, "P0")
         enemy_production = value_production(enemy_production_sample, "P1", False)
 
-        key = player_key(game.state, p0_color)
         longest_road_length = get_longest_road_length(game.state, p0_color)
 
         reachability_sample = reachability_features(game, p0_color, 2)
@@ -103,7 +100,7 @@ def base_fn(params=DEFAULT_WEIGHTS):
         )
 
         return float(
-            game.state.player_state[f"{key}_VICTORY_POINTS"] * params["public_vps"]
+            get_visible_victory_points(game.state, p0_color) * params["public_vps"]
             + production * params["production"]
             + enemy_production * params["enemy_production"]
             + reachable_production_at_zero * params["reachable_production_0"]
@@ -162,17 +159,18 @@ class ValueFunctionPlayer(Player):
         if len(playable_actions) == 1:
             return playable_actions[0]
 
-        if self.epsilon is not None and random.random() < self.epsilon:
-            return random.choice(playable_actions)
+        if self.epsilon is not None and game.rng.random() < self.epsilon:
+            return game.rng.choice(playable_actions)
 
         best_value = float("-inf")
         best_action = None
         for action in playable_actions:
-            game_copy = game.copy()
-            game_copy.execute(action)
-
-            value_fn = get_value_fn(self.value_fn_builder_name, self.params)
-            value = value_fn(game_copy, self.color)
+            _, undo = game.execute_with_undo(action)
+            try:
+                value_fn = get_value_fn(self.value_fn_builder_name, self.params)
+                value = value_fn(game, self.color)
+            finally:
+                game.undo(undo)
             if value > best_value:
                 best_value = value
                 best_action = action
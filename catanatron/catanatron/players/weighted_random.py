@@ -1,7 +1,9 @@
-import random
-
 from catanatron.models.player import Player
-from catanatron.models.actions import ActionType
+from catanatron.models.actions import (
+    ActionType,
+    sample_playable_action,
+    weighted_choice,
+)
 
 
 WEIGHTS_BY_ACTION_TYPE = {
@@ -17,10 +19,10 @@ class WeightedRandomPlayer(Player):
     to actions that are likely better (cities > settlements > dev cards).
     """
 
+    samples_actions = True
+
     def decide(self, game, playable_actions):
-        bloated_actions = []
-        for action in playable_actions:
-            weight = WEIGHTS_BY_ACTION_TYPE.get(action.action_type, 1)
-            bloated_actions.extend([action] * weight)
+        return weighted_choice(playable_actions, game.rng, WEIGHTS_BY_ACTION_TYPE)
 
-        return random.choice(bloated_actions)
+    def sample_action(self, game):
+        return sample_playable_action(game.state, game.rng, WEIGHTS_BY_ACTION_TYPE)
@@ -0,0 +1,75 @@
+"""
+Contains GameReplay, to rebuild any position of a game from its action log.
+"""
+
+from typing import Dict, List, Sequence
+
+from catanatron.game import Game
+from catanatron.models.enums import ActionRecord
+
+DEFAULT_CHECKPOINT_EVERY = 64
+
+
+class GameReplay:
+    """Rebuilds the Game at any state index (see state_functions.get_state_index)
+    by re-applying the recorded ActionRecords, with their recorded chance
+    results, to a copy of the initial game. Actions aren't validated, so
+    playable actions are only generated if the returned game is asked for them.
+
+    Positions every checkpoint_every actions are kept (as Game copies, which
+    share their action log) when first replayed, so rebuilding a position
+    replays at most checkpoint_every - 1 actions after that.
+
+    Replayed positions are equal to the original ones, except for their
+    random stream (recorded results aren't drawn from it).
+
+    Attributes:
+        action_records (List[ActionRecord]): Records of the whole game.
+        checkpoints (Dict[int, Game]): State index to Game at that index.
+    """
+
+    def __init__(
+        self,
+        initial_game: Game,
+        action_records: Sequence[ActionRecord],
+        checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+    ):
+        """
+        Args:
+            initial_game (Game): Game at some state index (usually 0). Not mutated.
+            action_records (Sequence[ActionRecord]): All records of the game
+                (from index 0), e.g. game.state.action_records at its end.
+            checkpoint_every (int, optional): Plies between checkpoints.
+        """
+        self.action_records: List[ActionRecord] = list(action_records)
+        self.checkpoint_every = checkpoint_every
+        start = len(initial_game.state.action_log)
+        self.checkpoints: Dict[int, Game] = {start: initial_game.copy()}
+
+    def __len__(self):
+        """Number of state indexes, i.e. the index after the last action + 1"""
+        return len(self.action_records) + 1
+
+    def at(self, state_index: int) -> Game:
+        """Game as it was after the first state_index actions.
+
+        Raises:
+            IndexError: If state_index is before the initial game or after the
+                last record.
+        """
+        if not 0 <= state_index <= len(self.action_records):
+            raise IndexError(f"state_index {state_index} out of range")
+        start = max(
+            (index for index in self.checkpoints if index <= state_index),
+            default=None,
+        )
+        if start is None:
+            raise IndexError(f"state_index {state_index} is before the initial game")
+
+        game = self.checkpoints[start].copy()
+        for index in range(start, state_index):
+            record = self.action_records[index]
+            game.execute(record.action, validate_action=False, action_record=record)
+            if (index + 1) % self.checkpoint_every == 0:
+                self.checkpoints.setdefault(index + 1, game.copy())
+        return game
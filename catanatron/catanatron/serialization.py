@@ -0,0 +1,516 @@
+"""
+Compact binary snapshots of a Game. See Game.to_bytes and Game.from_bytes.
+
+The format only holds plain numbers: the map as its template plus tile
+layout, the board's buildings, roads and road networks, player state, bank,
+dev deck, prompt flags, the random stream and the packed action log (see
+models/action_log.py). Loading never imports or calls classes named in the
+data, so unlike pickle it is safe to load bytes from untrusted sources.
+
+Player objects aren't stored; only each seat's color and is_bot flag. Pass
+players to game_from_bytes to get them back.
+
+Everything else (caches, bitboards, dice payouts, zobrist hash) is rebuilt
+on load. Bump FORMAT_VERSION whenever the layout, or the action ids of
+models/action_table.py, change.
+"""
+
+import functools
+import random
+import struct
+import sys
+from array import array
+from collections import defaultdict
+from typing import Any, List, Optional, Sequence
+
+from catanatron.game import Game
+from catanatron.models.action_log import log_from_entries
+from catanatron.models.action_table import get_action_table
+from catanatron.models.board import Board
+from catanatron.models.enums import (
+    CITY,
+    DEVELOPMENT_CARDS,
+    RESOURCES,
+    ROAD,
+    SETTLEMENT,
+    Action,
+    ActionPrompt,
+    ActionRecord,
+    ActionType,
+)
+from catanatron.models.map import (
+    BASE_MAP_TEMPLATE,
+    MINI_MAP_TEMPLATE,
+    CatanMap,
+    LandTile,
+    MapTemplate,
+    Port,
+    Water,
+    initialize_tiles,
+)
+from catanatron.models.player import Color, Player
+from catanatron.models.topology import EDGE_INDEX, iter_bits
+from catanatron.state import _PLAYER_INITIAL_VALUES, NUM_PLAYER_STATE_FIELDS, State
+from catanatron.zobrist import board_hash, player_state_hash
+
+MAGIC = b"CTRN"
+FORMAT_VERSION = 2
+
+MAP_TEMPLATES = [BASE_MAP_TEMPLATE, MINI_MAP_TEMPLATE]
+COLORS = list(Color)
+ACTION_TYPES = list(ActionType)
+ACTION_PROMPTS = list(ActionPrompt)
+BUILDING_TYPES = [SETTLEMENT, CITY, ROAD]
+# resources and dev cards, with None (e.g. desert, 3:1 port) as 0
+CARDS = [None, *RESOURCES, *DEVELOPMENT_CARDS]
+NO_COLOR = 255
+UNPACKED_ENTRY = 0xFFFFFFFF
+
+
+def game_to_bytes(game: Game) -> bytes:
+    state = game.state
+    board = state.board
+    colors = state.colors
+    color_index = {color: COLORS.index(color) for color in colors}
+    out = _Writer()
+
+    out.raw(MAGIC)
+    out.u8(FORMAT_VERSION)
+
+    # Game
+    out.string(game.id)
+    out.big_int(game.seed)
+    out.u8(game.vps_to_win)
+    out.u8(game.friendly_robber)
+
+    # Seats
+    out.u8(len(colors))
+    for player in state.players:
+        out.u8(color_index[player.color])
+        out.u8(player.is_bot)
+    out.u8(state.discard_limit)
+    out.u8(state.friendly_robber)
+
+    # Map
+    catan_map = board.map
+    out.u8(_template_index(catan_map))
+    for tile in catan_map.tiles.values():
+        if isinstance(tile, LandTile):
+            out.u8(CARDS.index(tile.resource))
+            out.u8(tile.number or 0)
+        elif isinstance(tile, Port):
+            out.u8(CARDS.index(tile.resource))
+
+    # Board
+    out.u8(list(catan_map.land_tiles.keys()).index(board.robber_coordinate))
+    out.u8(len(board.buildings))
+    for node_id, (color, building_type) in board.buildings.items():
+        out.u8(node_id)
+        out.u8(color_index[color])
+        out.u8(BUILDING_TYPES.index(building_type))
+    roads = list(board.roads.keys())[::2]  # each road is stored both ways
+    out.u8(len(roads))
+    for edge in roads:
+        out.u8(edge[0])
+        out.u8(edge[1])
+        out.u8(color_index[board.roads[edge]])
+    component_masks = {c: masks for c, masks in board.component_masks.items() if masks}
+    out.u8(len(component_masks))
+    for color, masks in component_masks.items():
+        out.u8(color_index[color])
+        out.u8(len(masks))
+        for mask in masks.values():
+            out.big_int(mask)
+    out.u8(len(board.road_lengths))
+    for color, length in board.road_lengths.items():
+        out.u8(color_index[color])
+        out.u8(length)
+    out.u8(NO_COLOR if board.road_color is None else color_index[board.road_color])
+    out.u8(board.road_length)
+    out.big_int(board.buildable_node_bits)
+
+    # State
+    out.array("h", state.player_state_array)
+    out.array("B", state.resource_freqdeck)
+    out.array("B", [CARDS.index(card) for card in state.development_listdeck])
+    out.u8(len(state.buildings_by_color))
+    for color, buildings in state.buildings_by_color.items():
+        out.u8(color_index[color])
+        out.u8(len(buildings))
+        for building_type, node_ids in buildings.items():
+            out.u8(BUILDING_TYPES.index(building_type))
+            if building_type == ROAD:
+                out.array("B", [node_id for edge in node_ids for node_id in edge])
+            else:
+                out.array("B", node_ids)
+    out.u16(state.num_turns)
+    out.u8(state.current_player_index)
+    out.u8(state.current_turn_index)
+    out.u8(ACTION_PROMPTS.index(state.current_prompt))
+    out.u8(state.is_initial_build_phase)
+    out.u8(state.is_discarding)
+    out.array("B", state.discard_counts)
+    out.u8(state.is_moving_knight)
+    out.u8(state.is_road_building)
+    out.u8(state.free_roads_available)
+    out.u8(state.is_resolving_trade)
+    out.array("h", state.current_trade)
+    out.array("B", state.acceptees)
+
+    # Random stream
+    out.big_int(state.seed)
+    out.u32(state._forks)
+    if state._rng is None:
+        out.u8(0)
+    else:
+        version, internal_state, gauss_next = state._rng.getstate()
+        out.u8(1)
+        out.u8(version)
+        out.array("I", internal_state)
+        out.u8(gauss_next is not None)
+        if gauss_next is not None:
+            out.raw(struct.pack("<d", gauss_next))
+
+    # Action log (records that can't be packed are written after the ints)
+    entries = state.action_log.entries()
+    unpacked = [
+        (i, entry) for i, entry in enumerate(entries) if isinstance(entry, tuple)
+    ]
+    out.array(
+        "I",
+        [UNPACKED_ENTRY if isinstance(entry, tuple) else entry for entry in entries],
+    )
+    out.u32(len(unpacked))
+    for i, (action, result) in unpacked:
+        out.u32(i)
+        out.u8(COLORS.index(action.color))
+        out.u8(ACTION_TYPES.index(action.action_type))
+        out.value(action.value)
+        out.value(result)
+
+    return out.getvalue()
+
+
+def game_from_bytes(data: bytes, players: Optional[Sequence[Player]] = None) -> Game:
+    """Loads a Game written by game_to_bytes.
+
+    Args:
+        data (bytes): Output of game_to_bytes.
+        players (Sequence[Player], optional): Players to seat, matched by color.
+            Defaults to plain Player objects (that can't decide), which is
+            enough to inspect or replay the game.
+
+    Raises:
+        ValueError: If data isn't a snapshot in a supported version.
+    """
+    reader = _Reader(data)
+    if reader.raw(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a catanatron game snapshot")
+    version = reader.u8()
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported game snapshot version: {version}")
+
+    game = Game(players=[], initialize=False)
+    game.id = reader.string()
+    game.seed = reader.big_int()
+    game.vps_to_win = reader.u8()
+    game.friendly_robber = bool(reader.u8())
+
+    # Seats
+    num_players = reader.u8()
+    players_by_color = {player.color: player for player in players or []}
+    seats = []
+    for _ in range(num_players):
+        color = COLORS[reader.u8()]
+        is_bot = bool(reader.u8())
+        seats.append(players_by_color.get(color) or Player(color, is_bot))
+    state = State([], None, initialize=False)
+    state.players = seats
+    state.colors = tuple(player.color for player in seats)
+    state.color_to_index = {color: i for i, color in enumerate(state.colors)}
+    state.discard_limit = reader.u8()
+    state.friendly_robber = bool(reader.u8())
+
+    # Map
+    catan_map = _read_map(reader, reader.u8())
+
+    # Board
+    board = Board(catan_map)
+    board.robber_coordinate = list(catan_map.land_tiles.keys())[reader.u8()]
+    for _ in range(reader.u8()):
+        node_id = reader.u8()
+        color = COLORS[reader.u8()]
+        building_type = BUILDING_TYPES[reader.u8()]
+        board.buildings[node_id] = (color, building_type)
+        bits = board.settlement_bits if building_type == SETTLEMENT else board.city_bits
+        bits[color] |= 1 << node_id
+        board.occupied_node_bits |= 1 << node_id
+        board._update_payouts(color, node_id, 1 if building_type == SETTLEMENT else 2)
+    for _ in range(reader.u8()):
+        edge = (reader.u8(), reader.u8())
+        color = COLORS[reader.u8()]
+        board.roads[edge] = color
+        board.roads[(edge[1], edge[0])] = color
+        board.road_bits[color] |= 1 << EDGE_INDEX[edge]
+        board.occupied_edge_bits |= 1 << EDGE_INDEX[edge]
+    for _ in range(reader.u8()):
+        color = COLORS[reader.u8()]
+        masks = {}
+        for _ in range(reader.u8()):
+            mask = reader.big_int()
+            root = (mask & -mask).bit_length() - 1
+            for node_id in iter_bits(mask):
+                board.component_parents[color][node_id] = root
+            masks[root] = mask
+            board.component_node_bits[color] |= mask
+        board.component_masks[color] = masks
+    for _ in range(reader.u8()):
+        color = COLORS[reader.u8()]
+        board.road_lengths[color] = reader.u8()
+    road_color = reader.u8()
+    board.road_color = None if road_color == NO_COLOR else COLORS[road_color]
+    board.road_length = reader.u8()
+    board.buildable_node_bits = reader.big_int()
+    board.board_buildable_ids = set(iter_bits(board.buildable_node_bits))
+    state.board = board
+
+    # State
+    state.player_state_array = [
+        (
+            bool(value)
+            if isinstance(_PLAYER_INITIAL_VALUES[i % NUM_PLAYER_STATE_FIELDS], bool)
+            else value
+        )
+        for i, value in enumerate(reader.array("h"))
+    ]
+    state.resource_freqdeck = reader.array("B")
+    state.development_listdeck = [CARDS[code] for code in reader.array("B")]
+    state.buildings_by_color = dict()
+    for _ in range(reader.u8()):
+        color = COLORS[reader.u8()]
+        buildings = defaultdict(list)
+        for _ in range(reader.u8()):
+            building_type = BUILDING_TYPES[reader.u8()]
+            node_ids = reader.array("B")
+            if building_type == ROAD:
+                node_ids = list(zip(node_ids[::2], node_ids[1::2]))
+            buildings[building_type] = node_ids
+        state.buildings_by_color[color] = buildings
+    state.num_turns = reader.u16()
+    state.current_player_index = reader.u8()
+    state.current_turn_index = reader.u8()
+    state.current_prompt = ACTION_PROMPTS[reader.u8()]
+    state.is_initial_build_phase = bool(reader.u8())
+    state.is_discarding = bool(reader.u8())
+    state.discard_counts = reader.array("B")
+    state.is_moving_knight = bool(reader.u8())
+    state.is_road_building = bool(reader.u8())
+    state.free_roads_available = reader.u8()
+    state.is_resolving_trade = bool(reader.u8())
+    state.current_trade = tuple(reader.array("h"))
+    state.acceptees = tuple(bool(accepted) for accepted in reader.array("B"))
+
+    # Random stream
+    state.seed = reader.big_int()
+    state._forks = reader.u32()
+    state._rng = None
+    if reader.u8():
+        version = reader.u8()
+        internal_state = tuple(reader.array("I"))
+        gauss_next = struct.unpack("<d", reader.raw(8))[0] if reader.u8() else None
+        state._rng = random.Random()
+        state._rng.setstate((version, internal_state, gauss_next))
+
+    # Action log
+    state.action_table = get_action_table(state.colors, catan_map)
+    entries: List[Any] = reader.array("I")
+    for _ in range(reader.u32()):
+        i = reader.u32()
+        color = COLORS[reader.u8()]
+        action_type = ACTION_TYPES[reader.u8()]
+        action = Action(color, action_type, reader.value())
+        entries[i] = ActionRecord(action, reader.value())
+    state.action_log = log_from_entries(state.action_table, entries)
+
+    state.zobrist = player_state_hash(state.player_state_array) ^ board_hash(board)
+    game.state = state
+    return game
+
+
+def _template_index(catan_map: CatanMap) -> int:
+    for i, template in enumerate(MAP_TEMPLATES):
+        if _has_topology(catan_map, template):
+            return i
+    raise ValueError("Only maps with the topology of a known template are supported")
+
+
+def _has_topology(catan_map: CatanMap, template: MapTemplate) -> bool:
+    if list(catan_map.tiles.keys()) != list(template.topology.keys()):
+        return False
+    for coordinate, tile_type in template.topology.items():
+        tile = catan_map.tiles[coordinate]
+        if isinstance(tile_type, tuple):  # is port
+            if not isinstance(tile, Port) or tile.direction != tile_type[1]:
+                return False
+        elif type(tile) is not tile_type:
+            return False
+    return True
+
+
+def _read_map(reader: "_Reader", template_index: int) -> CatanMap:
+    template = MAP_TEMPLATES[template_index]
+    layout_size = sum(
+        2 if tile_type == LandTile else 1
+        for tile_type in template.topology.values()
+        if tile_type != Water
+    )
+    return _build_map(template_index, reader.raw(layout_size))
+
+
+@functools.lru_cache(maxsize=64)
+def _build_map(template_index: int, layout: bytes) -> CatanMap:
+    """Maps are never mutated, so games loaded with the same layout share one."""
+    template = MAP_TEMPLATES[template_index]
+    codes = iter(layout)
+    port_resources, tile_resources, numbers = [], [], []
+    for tile_type in template.topology.values():
+        if isinstance(tile_type, tuple):  # is port
+            port_resources.append(CARDS[next(codes)])
+        elif tile_type == LandTile:
+            tile_resources.append(CARDS[next(codes)])
+            number = next(codes)
+            if number:
+                numbers.append(number)
+    # initialize_tiles pops from the end
+    tiles = initialize_tiles(
+        template,
+        numbers[::-1],
+        port_resources[::-1],
+        tile_resources[::-1],
+        number_placement="random",
+    )
+    return CatanMap.from_tiles(tiles)
+
+
+class _Writer:
+    """Little-endian binary writer"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buffer)
+
+    def raw(self, data: bytes):
+        self.buffer += data
+
+    def u8(self, value: int):
+        self.buffer.append(value)
+
+    def u16(self, value: int):
+        self.buffer += struct.pack("<H", value)
+
+    def u32(self, value: int):
+        self.buffer += struct.pack("<I", value)
+
+    def big_int(self, value: int):
+        """Any int, as a sign byte, a length byte and its magnitude"""
+        magnitude = abs(value)
+        data = magnitude.to_bytes((magnitude.bit_length() + 7) // 8, "little")
+        self.u8(value < 0)
+        self.u8(len(data))
+        self.raw(data)
+
+    def string(self, value: str):
+        data = value.encode("utf-8")
+        self.u16(len(data))
+        self.raw(data)
+
+    def array(self, typecode: str, values):
+        values = array(typecode, values)
+        if sys.byteorder == "big":
+            values.byteswap()
+        self.u32(len(values))
+        self.raw(values.tobytes())
+
+    def value(self, value):
+        """Action values and results: None, ints, strings, colors and
+        (nested) tuples or lists of those."""
+        if value is None:
+            self.u8(_NONE)
+        elif isinstance(value, Color):
+            self.u8(_COLOR)
+            self.u8(COLORS.index(value))
+        elif isinstance(value, int):  # bools included
+            self.u8(_INT)
+            self.big_int(value)
+        elif isinstance(value, str):
+            self.u8(_STR)
+            self.string(value)
+        elif isinstance(value, (tuple, list)):
+            self.u8(_TUPLE if isinstance(value, tuple) else _LIST)
+            self.u16(len(value))
+            for item in value:
+                self.value(item)
+        else:
+            raise ValueError(f"Can't serialize {value!r}")
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = bytes(data)
+        self.offset = 0
+
+    def raw(self, size: int) -> bytes:
+        if self.offset + size > len(self.data):
+            raise ValueError("Truncated game snapshot")
+        data = self.data[self.offset : self.offset + size]
+        self.offset += size
+        return data
+
+    def u8(self) -> int:
+        try:
+            value = self.data[self.offset]
+        except IndexError:
+            raise ValueError("Truncated game snapshot")
+        self.offset += 1
+        return value
+
+    def u16(self) -> int:
+        return struct.unpack("<H", self.raw(2))[0]
+
+    def u32(self) -> int:
+        return struct.unpack("<I", self.raw(4))[0]
+
+    def big_int(self) -> int:
+        negative = self.u8()
+        magnitude = int.from_bytes(self.raw(self.u8()), "little")
+        return -magnitude if negative else magnitude
+
+    def string(self) -> str:
+        return self.raw(self.u16()).decode("utf-8")
+
+    def array(self, typecode: str) -> list:
+        values = array(typecode)
+        values.frombytes(self.raw(self.u32() * values.itemsize))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values.tolist()
+
+    def value(self):
+        tag = self.u8()
+        if tag == _NONE:
+            return None
+        if tag == _COLOR:
+            return COLORS[self.u8()]
+        if tag == _INT:
+            return self.big_int()
+        if tag == _STR:
+            return self.string()
+        if tag in (_TUPLE, _LIST):
+            items = [self.value() for _ in range(self.u16())]
+            return tuple(items) if tag == _TUPLE else items
+        raise ValueError(f"Invalid value tag: {tag}")
+
+
+_NONE, _INT, _STR, _COLOR, _TUPLE, _LIST = range(6)
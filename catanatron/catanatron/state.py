@@ -1,9 +1,11 @@
-import pickle
 import random
 from collections import defaultdict
-from typing import Any, Dict, List, Sequence, Tuple
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 from catanatron.models.map import BASE_MAP_TEMPLATE, CatanMap, NumberPlacement
+from catanatron.models.action_log import ActionLog
+from catanatron.models.action_table import get_action_table
 from catanatron.models.board import Board
 from catanatron.models.enums import (
     DEVELOPMENT_CARDS,
@@ -16,6 +18,12 @@ from catanatron.models.decks import (
     starting_resource_bank,
 )
 from catanatron.models.player import Color, Player
+from catanatron.zobrist import (
+    board_hash,
+    player_state_hash,
+    player_value_key,
+    volatile_hash,
+)
 
 # These will be prefixed by P0_, P1_, ...
 # Create Player State blueprint
@@ -42,6 +50,90 @@ for dev_card in DEVELOPMENT_CARDS:
     PLAYER_INITIAL_STATE[f"{dev_card}_IN_HAND"] = 0
     PLAYER_INITIAL_STATE[f"PLAYED_{dev_card}"] = 0
 
+# Player state is stored in a flat list, one block of NUM_PLAYER_STATE_FIELDS
+#   values per player (in seating order). These are the offsets within a block.
+PLAYER_STATE_FIELDS: Tuple[str, ...] = tuple(PLAYER_INITIAL_STATE.keys())
+PLAYER_STATE_INDEX: Dict[str, int] = {
+    field: i for i, field in enumerate(PLAYER_STATE_FIELDS)
+}
+NUM_PLAYER_STATE_FIELDS = len(PLAYER_STATE_FIELDS)
+RESOURCE_IN_HAND_INDEX = {r: PLAYER_STATE_INDEX[f"{r}_IN_HAND"] for r in RESOURCES}
+DEV_CARD_IN_HAND_INDEX = {
+    d: PLAYER_STATE_INDEX[f"{d}_IN_HAND"] for d in DEVELOPMENT_CARDS
+}
+PLAYED_DEV_CARD_INDEX = {
+    d: PLAYER_STATE_INDEX[f"PLAYED_{d}"] for d in DEVELOPMENT_CARDS
+}
+DEV_CARD_OWNED_AT_START_INDEX = {
+    d: PLAYER_STATE_INDEX[f"{d}_OWNED_AT_START"]
+    for d in DEVELOPMENT_CARDS
+    if f"{d}_OWNED_AT_START" in PLAYER_STATE_INDEX
+}
+_PLAYER_INITIAL_VALUES = [PLAYER_INITIAL_STATE[f] for f in PLAYER_STATE_FIELDS]
+
+# "P1_WOOD_IN_HAND" => position in the flat list, for up to 4 players.
+_PLAYER_STATE_KEY_OFFSETS: Dict[str, int] = {
+    f"P{index}_{field}": index * NUM_PLAYER_STATE_FIELDS + i
+    for index in range(4)
+    for i, field in enumerate(PLAYER_STATE_FIELDS)
+}
+
+
+def _fork_seed(seed: int, fork: int) -> int:
+    """Mixes seed and fork number into a new 64-bit seed (splitmix64)."""
+    z = (seed + fork * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return z ^ (z >> 31)
+
+
+class PlayerStateView(MutableMapping):
+    """Dict-like view over State.player_state_array.
+
+    Keeps the historical { "P0_HAS_ROAD": False, ... } interface for features,
+    JSON encoding and tests, while game logic indexes the flat list directly.
+    Reads and writes go through to the underlying list.
+    """
+
+    __slots__ = ("_state",)
+
+    def __init__(self, state: "State"):
+        self._state = state
+
+    def _offset(self, key: str) -> int:
+        offset = _PLAYER_STATE_KEY_OFFSETS.get(key)
+        if offset is None or offset >= len(self._state.player_state_array):
+            raise KeyError(key)
+        return offset
+
+    def __getitem__(self, key: str) -> Any:
+        return self._state.player_state_array[self._offset(key)]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        offset = self._offset(key)
+        state = self._state
+        previous = state.player_state_array[offset]
+        state.player_state_array[offset] = value
+        state.zobrist ^= player_value_key(offset, previous)
+        state.zobrist ^= player_value_key(offset, value)
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError("Player state keys cannot be deleted")
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self._state.colors)):
+            for field in PLAYER_STATE_FIELDS:
+                yield f"P{index}_{field}"
+
+    def __len__(self) -> int:
+        return len(self._state.player_state_array)
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
 
 class State:
     """Collection of variables representing state
@@ -53,8 +145,11 @@ class State:
             information that can be easily copiable.
         board (Board): Board state. Settlement locations, cities,
             roads, ect... See Board class.
-        player_state (Dict[str, Any]): See PLAYER_INITIAL_STATE. It will
-            contain one of each key in PLAYER_INITIAL_STATE but prefixed
+        player_state_array (List[Any]): Flat list with the values of
+            PLAYER_INITIAL_STATE for each player, in seating order. Index with
+            color_index * NUM_PLAYER_STATE_FIELDS + PLAYER_STATE_INDEX[field].
+        player_state (PlayerStateView): Dict-like view over player_state_array.
+            It will contain one of each key in PLAYER_INITIAL_STATE but prefixed
             with "P<index_of_player>".
             Example: { P0_HAS_ROAD: False, P1_SETTLEMENTS_AVAILABLE: 18, ... }
         color_to_index (Dict[Color, int]): Color to seating location cache
@@ -66,8 +161,9 @@ class State:
         buildings_by_color (Dict[Color, Dict[FastBuildingType, List]]): Cache of
             buildings. Can be used like: `buildings_by_color[Color.RED][SETTLEMENT]`
             to get a list of all node ids where RED has settlements.
-        action_records (List[ActionRecord]): Log of all actions taken with their results if
-            non-deterministic.
+        action_log (ActionLog): Compact log of all actions taken with their results
+            if non-deterministic. Shared between copies.
+        action_records (List[ActionRecord]): action_log as ActionRecords. Read-only.
         num_turns (int): number of turns thus far
         current_player_index (int): index per colors array of player that should be
             making a decision now. Not necesarilly the same as current_turn_index
@@ -83,6 +179,11 @@ class State:
             Building dev card.
         free_roads_available (int): Number of roads available left in Road Building
             phase.
+        zobrist (int): Incrementally maintained Zobrist hash of player_state_array
+            and board buildings, roads and robber. See .hash for the full hash.
+        action_table (ActionTable): Integer ids of the actions of this game.
+            Shared between copies.
+        seed (int): Seed of this state's random stream (see .rng).
     """
 
     def __init__(
@@ -92,36 +193,38 @@ class State:
         discard_limit=7,
         friendly_robber=False,
         number_placement: NumberPlacement = "official_spiral",
+        seed: Optional[int] = None,
         initialize=True,
     ):
         if initialize:
-            self.players = random.sample(players, len(players))
+            self.seed = seed if seed is not None else random.randrange(2**64)
+            self._rng: Optional[random.Random] = random.Random(self.seed)
+            self._forks = 0
+
+            self.players = self.rng.sample(players, len(players))
             self.colors = tuple([player.color for player in self.players])
             self.board = Board(
-                catan_map or CatanMap.from_template(BASE_MAP_TEMPLATE, number_placement)
+                catan_map
+                or CatanMap.from_template(
+                    BASE_MAP_TEMPLATE, number_placement, rng=self.rng
+                )
             )
             self.discard_limit = discard_limit
             self.friendly_robber = friendly_robber
 
-            # feature-ready dictionary
-            self.player_state = dict()
-            for index in range(len(self.colors)):
-                for key, value in PLAYER_INITIAL_STATE.items():
-                    self.player_state[f"P{index}_{key}"] = value
+            self.player_state_array = _PLAYER_INITIAL_VALUES * len(self.colors)
             self.color_to_index = {
                 color: index for index, color in enumerate(self.colors)
             }
 
             self.resource_freqdeck = starting_resource_bank()
             self.development_listdeck = starting_devcard_bank()
-            random.shuffle(self.development_listdeck)
+            self.rng.shuffle(self.development_listdeck)
 
             # Auxiliary attributes to implement game logic
             self.buildings_by_color: Dict[Color, Dict[Any, Any]] = {
                 p.color: defaultdict(list) for p in players
             }
-            # for undo and to show in the UI the action log
-            self.action_records: List[ActionRecord] = []
             self.num_turns = 0  # num_completed_turns
 
             # Current prompt / player
@@ -142,6 +245,47 @@ class State:
             self.current_trade: Tuple = (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
             self.acceptees = tuple(False for _ in self.colors)
 
+            self.zobrist = player_state_hash(self.player_state_array) ^ board_hash(
+                self.board
+            )
+            self.action_table = get_action_table(self.colors, self.board.map)
+            # for undo and to show in the UI the action log
+            self.action_log = ActionLog(self.action_table)
+
+    @property
+    def player_state(self) -> PlayerStateView:
+        """Feature-ready dictionary view of player_state_array"""
+        return PlayerStateView(self)
+
+    @property
+    def hash(self) -> int:
+        """64-bit Zobrist hash of this position. Covers buildings, roads, robber,
+        player hands and dev cards, bank, dev deck, prompt and current player.
+        Equal states (as reached through apply_action) have equal hashes."""
+        return self.zobrist ^ volatile_hash(self)
+
+    @property
+    def rng(self) -> random.Random:
+        """Random stream that all randomness of this game (dice, steals, shuffles
+        and bundled players) is drawn from. Copies get their own stream, forked
+        deterministically from this one's seed and number of copies made, so
+        simulating on copies never changes what this state will draw."""
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return self._rng
+
+    @property
+    def action_records(self) -> List[ActionRecord]:
+        return self.action_log.records()
+
+    def append_action_record(self, action_record: ActionRecord):
+        self.action_log = self.action_log.append(action_record)
+
+    def pop_action_record(self) -> ActionRecord:
+        action_record = self.action_log.last()
+        self.action_log = self.action_log.pop()
+        return action_record
+
     def current_player(self):
         """Helper for accessing Player instance who should decide next"""
         return self.players[self.current_player_index]
@@ -164,17 +308,21 @@ class State:
 
         state_copy.board = self.board.copy()
 
-        state_copy.player_state = self.player_state.copy()
+        state_copy.player_state_array = self.player_state_array.copy()
         state_copy.color_to_index = self.color_to_index
         state_copy.colors = self.colors  # immutable
 
         state_copy.resource_freqdeck = self.resource_freqdeck.copy()
         state_copy.development_listdeck = self.development_listdeck.copy()
 
-        state_copy.buildings_by_color = pickle.loads(
-            pickle.dumps(self.buildings_by_color)
-        )
-        state_copy.action_records = self.action_records.copy()
+        state_copy.buildings_by_color = {
+            color: defaultdict(
+                list, {key: value.copy() for key, value in buildings.items()}
+            )
+            for color, buildings in self.buildings_by_color.items()
+        }
+        # The action log is append-only; share it until either side appends.
+        state_copy.action_log = self.action_log  # immutable
         state_copy.num_turns = self.num_turns
 
         # Current prompt / player
@@ -193,5 +341,13 @@ class State:
         state_copy.is_resolving_trade = self.is_resolving_trade
         state_copy.current_trade = self.current_trade
         state_copy.acceptees = self.acceptees
+        state_copy.zobrist = self.zobrist
+        state_copy.action_table = self.action_table  # immutable
+
+        # Random.__init__ is slow, so copies only build their stream if used.
+        self._forks += 1
+        state_copy.seed = _fork_seed(self.seed, self._forks)
+        state_copy._rng = None
+        state_copy._forks = 0
 
         return state_copy
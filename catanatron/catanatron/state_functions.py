@@ -4,11 +4,11 @@ Some are helpers to _read_ information from state and keep the rest
 of the code decoupled from state representation.
 """
 
-import random
 from typing import Optional
 
 from catanatron.models.decks import ROAD_COST_FREQDECK, freqdeck_add
 from catanatron.models.enums import (
+    KNIGHT,
     VICTORY_POINT,
     WOOD,
     BRICK,
@@ -20,53 +20,89 @@ from catanatron.models.enums import (
     ROAD,
     FastResource,
 )
-from catanatron.state import State
+from catanatron.state import (
+    DEV_CARD_IN_HAND_INDEX,
+    DEV_CARD_OWNED_AT_START_INDEX,
+    NUM_PLAYER_STATE_FIELDS,
+    PLAYED_DEV_CARD_INDEX,
+    PLAYER_STATE_INDEX,
+    RESOURCE_IN_HAND_INDEX,
+    State,
+)
+from catanatron.zobrist import NUM_VALUES, PLAYER_VALUE_KEYS
+
+# Offsets within a player's block of State.player_state_array
+_VICTORY_POINTS = PLAYER_STATE_INDEX["VICTORY_POINTS"]
+_ROADS_AVAILABLE = PLAYER_STATE_INDEX["ROADS_AVAILABLE"]
+_SETTLEMENTS_AVAILABLE = PLAYER_STATE_INDEX["SETTLEMENTS_AVAILABLE"]
+_CITIES_AVAILABLE = PLAYER_STATE_INDEX["CITIES_AVAILABLE"]
+_HAS_ROAD = PLAYER_STATE_INDEX["HAS_ROAD"]
+_HAS_ARMY = PLAYER_STATE_INDEX["HAS_ARMY"]
+_HAS_ROLLED = PLAYER_STATE_INDEX["HAS_ROLLED"]
+_HAS_PLAYED_DEV_CARD = PLAYER_STATE_INDEX["HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"]
+_ACTUAL_VICTORY_POINTS = PLAYER_STATE_INDEX["ACTUAL_VICTORY_POINTS"]
+_LONGEST_ROAD_LENGTH = PLAYER_STATE_INDEX["LONGEST_ROAD_LENGTH"]
+_WOOD_IN_HAND = RESOURCE_IN_HAND_INDEX[WOOD]
+_BRICK_IN_HAND = RESOURCE_IN_HAND_INDEX[BRICK]
+_SHEEP_IN_HAND = RESOURCE_IN_HAND_INDEX[SHEEP]
+_WHEAT_IN_HAND = RESOURCE_IN_HAND_INDEX[WHEAT]
+_ORE_IN_HAND = RESOURCE_IN_HAND_INDEX[ORE]
+_PLAYED_KNIGHT = PLAYED_DEV_CARD_INDEX[KNIGHT]
+_PLAYABLE_DEV_CARD_INDEXES = [
+    (
+        dev_card,
+        DEV_CARD_IN_HAND_INDEX[dev_card],
+        DEV_CARD_OWNED_AT_START_INDEX[dev_card],
+    )
+    for dev_card in DEV_CARD_OWNED_AT_START_INDEX
+]
 
 
 def maintain_longest_road(state: State, previous_road_color, road_color, road_lengths):
     for color, length in road_lengths.items():
-        key = player_key(state, color)
-        state.player_state[f"{key}_LONGEST_ROAD_LENGTH"] = length
+        _assign(state, player_offset(state, color) + _LONGEST_ROAD_LENGTH, length)
 
-    # If road_color is not set or is the same as before, do nothing.
-    if road_color is None or (previous_road_color == road_color):
+    # If road_color is the same as before, do nothing.
+    if previous_road_color == road_color:
         return
 
-    # Set new longest road player and unset previous if any.
-    winner_key = player_key(state, road_color)
-    state.player_state[f"{winner_key}_HAS_ROAD"] = True
-    state.player_state[f"{winner_key}_VICTORY_POINTS"] += 2
-    state.player_state[f"{winner_key}_ACTUAL_VICTORY_POINTS"] += 2
+    # Set new longest road player if any (a settlement may cut the holder's
+    #   road under 5, leaving no one), and unset previous if any.
+    if road_color is not None:
+        winner = player_offset(state, road_color)
+        _assign(state, winner + _HAS_ROAD, True)
+        _increment(state, winner + _VICTORY_POINTS, 2)
+        _increment(state, winner + _ACTUAL_VICTORY_POINTS, 2)
     if previous_road_color is not None:
-        loser_key = player_key(state, previous_road_color)
-        state.player_state[f"{loser_key}_HAS_ROAD"] = False
-        state.player_state[f"{loser_key}_VICTORY_POINTS"] -= 2
-        state.player_state[f"{loser_key}_ACTUAL_VICTORY_POINTS"] -= 2
+        loser = player_offset(state, previous_road_color)
+        _assign(state, loser + _HAS_ROAD, False)
+        _increment(state, loser + _VICTORY_POINTS, -2)
+        _increment(state, loser + _ACTUAL_VICTORY_POINTS, -2)
 
 
 def maintain_largest_army(state: State, color, previous_army_color, previous_army_size):
-    candidate_size = get_played_dev_cards(state, color, "KNIGHT")
+    candidate_size = get_played_dev_cards(state, color, KNIGHT)
 
     # Skip if army is too small to be considered.
     if candidate_size < 3:
         return
 
     if previous_army_color is None:
-        winner_key = player_key(state, color)
-        state.player_state[f"{winner_key}_HAS_ARMY"] = True
-        state.player_state[f"{winner_key}_VICTORY_POINTS"] += 2
-        state.player_state[f"{winner_key}_ACTUAL_VICTORY_POINTS"] += 2
+        winner = player_offset(state, color)
+        _assign(state, winner + _HAS_ARMY, True)
+        _increment(state, winner + _VICTORY_POINTS, 2)
+        _increment(state, winner + _ACTUAL_VICTORY_POINTS, 2)
     elif previous_army_size < candidate_size and previous_army_color != color:
         # switch, remove previous points and award to new king
-        winner_key = player_key(state, color)
-        state.player_state[f"{winner_key}_HAS_ARMY"] = True
-        state.player_state[f"{winner_key}_VICTORY_POINTS"] += 2
-        state.player_state[f"{winner_key}_ACTUAL_VICTORY_POINTS"] += 2
-
-        loser_key = player_key(state, previous_army_color)
-        state.player_state[f"{loser_key}_HAS_ARMY"] = False
-        state.player_state[f"{loser_key}_VICTORY_POINTS"] -= 2
-        state.player_state[f"{loser_key}_ACTUAL_VICTORY_POINTS"] -= 2
+        winner = player_offset(state, color)
+        _assign(state, winner + _HAS_ARMY, True)
+        _increment(state, winner + _VICTORY_POINTS, 2)
+        _increment(state, winner + _ACTUAL_VICTORY_POINTS, 2)
+
+        loser = player_offset(state, previous_army_color)
+        _assign(state, loser + _HAS_ARMY, False)
+        _increment(state, loser + _VICTORY_POINTS, -2)
+        _increment(state, loser + _ACTUAL_VICTORY_POINTS, -2)
     # else: someone else has army and we dont compete
 
 
@@ -75,72 +111,83 @@ def player_key(state: State, color):
     return f"P{state.color_to_index[color]}"
 
 
+def player_offset(state: State, color):
+    """Start of color's block in state.player_state_array"""
+    return state.color_to_index[color] * NUM_PLAYER_STATE_FIELDS
+
+
 def get_enemy_colors(colors, player_color):
     return filter(lambda c: c != player_color, colors)
 
 
 def get_actual_victory_points(state: State, color):
-    key = player_key(state, color)
-    return state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"]
+    return state.player_state_array[
+        player_offset(state, color) + _ACTUAL_VICTORY_POINTS
+    ]
 
 
 def get_visible_victory_points(state: State, color):
-    key = player_key(state, color)
-    return state.player_state[f"{key}_VICTORY_POINTS"]
+    return state.player_state_array[player_offset(state, color) + _VICTORY_POINTS]
 
 
 def get_longest_road_color(state: State):
+    values = state.player_state_array
     for index in range(len(state.colors)):
-        if state.player_state[f"P{index}_HAS_ROAD"]:
+        if values[index * NUM_PLAYER_STATE_FIELDS + _HAS_ROAD]:
             return state.colors[index]
     return None
 
 
 def get_largest_army(state: State):
+    values = state.player_state_array
     for index in range(len(state.colors)):
-        if state.player_state[f"P{index}_HAS_ARMY"]:
-            return (
-                state.colors[index],
-                state.player_state[f"P{index}_PLAYED_KNIGHT"],
-            )
+        offset = index * NUM_PLAYER_STATE_FIELDS
+        if values[offset + _HAS_ARMY]:
+            return (state.colors[index], values[offset + _PLAYED_KNIGHT])
     return None, None
 
 
 def player_has_rolled(state: State, color):
-    key = player_key(state, color)
-    return state.player_state[f"{key}_HAS_ROLLED"]
+    return state.player_state_array[player_offset(state, color) + _HAS_ROLLED]
 
 
 def get_longest_road_length(state: State, color):
-    key = player_key(state, color)
-    return state.player_state[key + "_LONGEST_ROAD_LENGTH"]
+    return state.player_state_array[player_offset(state, color) + _LONGEST_ROAD_LENGTH]
+
+
+def get_roads_available(state: State, color):
+    return state.player_state_array[player_offset(state, color) + _ROADS_AVAILABLE]
+
+
+def get_settlements_available(state: State, color):
+    offset = player_offset(state, color)
+    return state.player_state_array[offset + _SETTLEMENTS_AVAILABLE]
+
+
+def get_cities_available(state: State, color):
+    return state.player_state_array[player_offset(state, color) + _CITIES_AVAILABLE]
 
 
 def get_played_dev_cards(state: State, color, dev_card=None):
-    key = player_key(state, color)
+    values = state.player_state_array
+    offset = player_offset(state, color)
     if dev_card is None:
-        return (
-            state.player_state[f"{key}_PLAYED_KNIGHT"]
-            + state.player_state[f"{key}_PLAYED_MONOPOLY"]
-            + state.player_state[f"{key}_PLAYED_ROAD_BUILDING"]
-            + state.player_state[f"{key}_PLAYED_YEAR_OF_PLENTY"]
+        return sum(
+            values[offset + PLAYED_DEV_CARD_INDEX[card]]
+            for card in PLAYED_DEV_CARD_INDEX
+            if card != VICTORY_POINT
         )
     else:
-        return state.player_state[f"{key}_PLAYED_{dev_card}"]
+        return values[offset + PLAYED_DEV_CARD_INDEX[dev_card]]
 
 
 def get_dev_cards_in_hand(state: State, color, dev_card=None):
-    key = player_key(state, color)
+    values = state.player_state_array
+    offset = player_offset(state, color)
     if dev_card is None:
-        return (
-            state.player_state[f"{key}_KNIGHT_IN_HAND"]
-            + state.player_state[f"{key}_MONOPOLY_IN_HAND"]
-            + state.player_state[f"{key}_ROAD_BUILDING_IN_HAND"]
-            + state.player_state[f"{key}_YEAR_OF_PLENTY_IN_HAND"]
-            + state.player_state[f"{key}_VICTORY_POINT_IN_HAND"]
-        )
+        return sum(values[offset + index] for index in DEV_CARD_IN_HAND_INDEX.values())
     else:
-        return state.player_state[f"{key}_{dev_card}_IN_HAND"]
+        return values[offset + DEV_CARD_IN_HAND_INDEX[dev_card]]
 
 
 def get_player_buildings(state: State, color_param, building_type_param):
@@ -149,45 +196,39 @@ def get_player_buildings(state: State, color_param, building_type_param):
 
 def get_player_freqdeck(state: State, color):
     """Returns a 'freqdeck' of a player's resource hand."""
-    key = player_key(state, color)
-    return [
-        state.player_state[f"{key}_WOOD_IN_HAND"],
-        state.player_state[f"{key}_BRICK_IN_HAND"],
-        state.player_state[f"{key}_SHEEP_IN_HAND"],
-        state.player_state[f"{key}_WHEAT_IN_HAND"],
-        state.player_state[f"{key}_ORE_IN_HAND"],
-    ]
+    offset = player_offset(state, color)
+    return state.player_state_array[offset + _WOOD_IN_HAND : offset + _ORE_IN_HAND + 1]
 
 
 def get_state_index(state: State) -> int:
-    return len(state.action_records)
+    return len(state.action_log)
 
 
 # ===== State Mutators
 def build_settlement(state: State, color, node_id, is_free):
     state.buildings_by_color[color][SETTLEMENT].append(node_id)
 
-    key = player_key(state, color)
-    state.player_state[f"{key}_SETTLEMENTS_AVAILABLE"] -= 1
+    offset = player_offset(state, color)
+    _increment(state, offset + _SETTLEMENTS_AVAILABLE, -1)
 
-    state.player_state[f"{key}_VICTORY_POINTS"] += 1
-    state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"] += 1
+    _increment(state, offset + _VICTORY_POINTS, 1)
+    _increment(state, offset + _ACTUAL_VICTORY_POINTS, 1)
 
     if not is_free:
-        state.player_state[f"{key}_WOOD_IN_HAND"] -= 1
-        state.player_state[f"{key}_BRICK_IN_HAND"] -= 1
-        state.player_state[f"{key}_SHEEP_IN_HAND"] -= 1
-        state.player_state[f"{key}_WHEAT_IN_HAND"] -= 1
+        _increment(state, offset + _WOOD_IN_HAND, -1)
+        _increment(state, offset + _BRICK_IN_HAND, -1)
+        _increment(state, offset + _SHEEP_IN_HAND, -1)
+        _increment(state, offset + _WHEAT_IN_HAND, -1)
 
 
 def build_road(state: State, color, edge, is_free):
     state.buildings_by_color[color][ROAD].append(edge)
 
-    key = player_key(state, color)
-    state.player_state[f"{key}_ROADS_AVAILABLE"] -= 1
+    offset = player_offset(state, color)
+    _increment(state, offset + _ROADS_AVAILABLE, -1)
     if not is_free:
-        state.player_state[f"{key}_WOOD_IN_HAND"] -= 1
-        state.player_state[f"{key}_BRICK_IN_HAND"] -= 1
+        _increment(state, offset + _WOOD_IN_HAND, -1)
+        _increment(state, offset + _BRICK_IN_HAND, -1)
         state.resource_freqdeck = freqdeck_add(
             state.resource_freqdeck, ROAD_COST_FREQDECK
         )  # replenish bank
@@ -197,158 +238,196 @@ def build_city(state: State, color, node_id):
     state.buildings_by_color[color][SETTLEMENT].remove(node_id)
     state.buildings_by_color[color][CITY].append(node_id)
 
-    key = player_key(state, color)
-    state.player_state[f"{key}_SETTLEMENTS_AVAILABLE"] += 1
-    state.player_state[f"{key}_CITIES_AVAILABLE"] -= 1
+    offset = player_offset(state, color)
+    _increment(state, offset + _SETTLEMENTS_AVAILABLE, 1)
+    _increment(state, offset + _CITIES_AVAILABLE, -1)
 
-    state.player_state[f"{key}_VICTORY_POINTS"] += 1
-    state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"] += 1
+    _increment(state, offset + _VICTORY_POINTS, 1)
+    _increment(state, offset + _ACTUAL_VICTORY_POINTS, 1)
 
-    state.player_state[f"{key}_WHEAT_IN_HAND"] -= 2
-    state.player_state[f"{key}_ORE_IN_HAND"] -= 3
+    _increment(state, offset + _WHEAT_IN_HAND, -2)
+    _increment(state, offset + _ORE_IN_HAND, -3)
 
 
 # ===== Deck Functions
 def player_can_afford_dev_card(state: State, color):
-    key = player_key(state, color)
+    values = state.player_state_array
+    offset = player_offset(state, color)
     return (
-        state.player_state[f"{key}_SHEEP_IN_HAND"] >= 1
-        and state.player_state[f"{key}_WHEAT_IN_HAND"] >= 1
-        and state.player_state[f"{key}_ORE_IN_HAND"] >= 1
+        values[offset + _SHEEP_IN_HAND] >= 1
+        and values[offset + _WHEAT_IN_HAND] >= 1
+        and values[offset + _ORE_IN_HAND] >= 1
     )
 
 
 def player_resource_freqdeck_contains(state: State, color, freqdeck):
-    key = player_key(state, color)
+    values = state.player_state_array
+    offset = player_offset(state, color)
     return (
-        state.player_state[f"{key}_WOOD_IN_HAND"] >= freqdeck[0]
-        and state.player_state[f"{key}_BRICK_IN_HAND"] >= freqdeck[1]
-        and state.player_state[f"{key}_SHEEP_IN_HAND"] >= freqdeck[2]
-        and state.player_state[f"{key}_WHEAT_IN_HAND"] >= freqdeck[3]
-        and state.player_state[f"{key}_ORE_IN_HAND"] >= freqdeck[4]
+        values[offset + _WOOD_IN_HAND] >= freqdeck[0]
+        and values[offset + _BRICK_IN_HAND] >= freqdeck[1]
+        and values[offset + _SHEEP_IN_HAND] >= freqdeck[2]
+        and values[offset + _WHEAT_IN_HAND] >= freqdeck[3]
+        and values[offset + _ORE_IN_HAND] >= freqdeck[4]
     )
 
 
 def player_can_play_dev(state: State, color, dev_card):
-    key = player_key(state, color)
+    values = state.player_state_array
+    offset = player_offset(state, color)
     return (
-        not state.player_state[f"{key}_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"]
-        and state.player_state[f"{key}_{dev_card}_IN_HAND"] >= 1
-        and state.player_state[f"{key}_{dev_card}_OWNED_AT_START"]
+        not values[offset + _HAS_PLAYED_DEV_CARD]
+        and values[offset + DEV_CARD_IN_HAND_INDEX[dev_card]] >= 1
+        and values[offset + DEV_CARD_OWNED_AT_START_INDEX[dev_card]]
     )
 
 
+def player_playable_dev_cards(state: State, color):
+    """Dev cards color could play now, i.e. the ones player_can_play_dev
+    accepts (VICTORY_POINT aside, which is never played)."""
+    values = state.player_state_array
+    offset = player_offset(state, color)
+    if values[offset + _HAS_PLAYED_DEV_CARD]:
+        return []
+    return [
+        dev_card
+        for dev_card, in_hand, owned_at_start in _PLAYABLE_DEV_CARD_INDEXES
+        if values[offset + in_hand] >= 1 and values[offset + owned_at_start]
+    ]
+
+
 def player_freqdeck_add(state: State, color, freqdeck):
-    key = player_key(state, color)
-    state.player_state[f"{key}_WOOD_IN_HAND"] += freqdeck[0]
-    state.player_state[f"{key}_BRICK_IN_HAND"] += freqdeck[1]
-    state.player_state[f"{key}_SHEEP_IN_HAND"] += freqdeck[2]
-    state.player_state[f"{key}_WHEAT_IN_HAND"] += freqdeck[3]
-    state.player_state[f"{key}_ORE_IN_HAND"] += freqdeck[4]
+    offset = player_offset(state, color)
+    _increment(state, offset + _WOOD_IN_HAND, freqdeck[0])
+    _increment(state, offset + _BRICK_IN_HAND, freqdeck[1])
+    _increment(state, offset + _SHEEP_IN_HAND, freqdeck[2])
+    _increment(state, offset + _WHEAT_IN_HAND, freqdeck[3])
+    _increment(state, offset + _ORE_IN_HAND, freqdeck[4])
 
 
 def player_freqdeck_subtract(state: State, color, freqdeck):
-    key = player_key(state, color)
-    state.player_state[f"{key}_WOOD_IN_HAND"] -= freqdeck[0]
-    state.player_state[f"{key}_BRICK_IN_HAND"] -= freqdeck[1]
-    state.player_state[f"{key}_SHEEP_IN_HAND"] -= freqdeck[2]
-    state.player_state[f"{key}_WHEAT_IN_HAND"] -= freqdeck[3]
-    state.player_state[f"{key}_ORE_IN_HAND"] -= freqdeck[4]
+    offset = player_offset(state, color)
+    _increment(state, offset + _WOOD_IN_HAND, -freqdeck[0])
+    _increment(state, offset + _BRICK_IN_HAND, -freqdeck[1])
+    _increment(state, offset + _SHEEP_IN_HAND, -freqdeck[2])
+    _increment(state, offset + _WHEAT_IN_HAND, -freqdeck[3])
+    _increment(state, offset + _ORE_IN_HAND, -freqdeck[4])
 
 
 def buy_dev_card(state: State, color, dev_card):
-    key = player_key(state, color)
+    values = state.player_state_array
+    offset = player_offset(state, color)
 
-    assert state.player_state[f"{key}_SHEEP_IN_HAND"] >= 1
-    assert state.player_state[f"{key}_WHEAT_IN_HAND"] >= 1
-    assert state.player_state[f"{key}_ORE_IN_HAND"] >= 1
+    assert values[offset + _SHEEP_IN_HAND] >= 1
+    assert values[offset + _WHEAT_IN_HAND] >= 1
+    assert values[offset + _ORE_IN_HAND] >= 1
 
-    state.player_state[f"{key}_{dev_card}_IN_HAND"] += 1
+    _increment(state, offset + DEV_CARD_IN_HAND_INDEX[dev_card], 1)
     if dev_card == VICTORY_POINT:
-        state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"] += 1
+        _increment(state, offset + _ACTUAL_VICTORY_POINTS, 1)
 
-    state.player_state[f"{key}_SHEEP_IN_HAND"] -= 1
-    state.player_state[f"{key}_WHEAT_IN_HAND"] -= 1
-    state.player_state[f"{key}_ORE_IN_HAND"] -= 1
+    _increment(state, offset + _SHEEP_IN_HAND, -1)
+    _increment(state, offset + _WHEAT_IN_HAND, -1)
+    _increment(state, offset + _ORE_IN_HAND, -1)
 
 
 def player_num_resource_cards(state: State, color, card: Optional[FastResource] = None):
-    key = player_key(state, color)
+    values = state.player_state_array
+    offset = player_offset(state, color)
     if card is None:
         return (
-            state.player_state[f"{key}_WOOD_IN_HAND"]
-            + state.player_state[f"{key}_BRICK_IN_HAND"]
-            + state.player_state[f"{key}_SHEEP_IN_HAND"]
-            + state.player_state[f"{key}_WHEAT_IN_HAND"]
-            + state.player_state[f"{key}_ORE_IN_HAND"]
+            values[offset + _WOOD_IN_HAND]
+            + values[offset + _BRICK_IN_HAND]
+            + values[offset + _SHEEP_IN_HAND]
+            + values[offset + _WHEAT_IN_HAND]
+            + values[offset + _ORE_IN_HAND]
         )
     else:
-        return state.player_state[f"{key}_{card}_IN_HAND"]
+        return values[offset + RESOURCE_IN_HAND_INDEX[card]]
 
 
 def player_num_dev_cards(state: State, color):
-    key = player_key(state, color)
-    return (
-        state.player_state[f"{key}_YEAR_OF_PLENTY_IN_HAND"]
-        + state.player_state[f"{key}_MONOPOLY_IN_HAND"]
-        + state.player_state[f"{key}_VICTORY_POINT_IN_HAND"]
-        + state.player_state[f"{key}_KNIGHT_IN_HAND"]
-        + state.player_state[f"{key}_ROAD_BUILDING_IN_HAND"]
-    )
+    return get_dev_cards_in_hand(state, color)
 
 
 def player_deck_to_array(state: State, color):
-    key = player_key(state, color)
+    values = state.player_state_array
+    offset = player_offset(state, color)
     return (
-        state.player_state[f"{key}_WOOD_IN_HAND"] * [WOOD]
-        + state.player_state[f"{key}_BRICK_IN_HAND"] * [BRICK]
-        + state.player_state[f"{key}_SHEEP_IN_HAND"] * [SHEEP]
-        + state.player_state[f"{key}_WHEAT_IN_HAND"] * [WHEAT]
-        + state.player_state[f"{key}_ORE_IN_HAND"] * [ORE]
+        values[offset + _WOOD_IN_HAND] * [WOOD]
+        + values[offset + _BRICK_IN_HAND] * [BRICK]
+        + values[offset + _SHEEP_IN_HAND] * [SHEEP]
+        + values[offset + _WHEAT_IN_HAND] * [WHEAT]
+        + values[offset + _ORE_IN_HAND] * [ORE]
     )
 
 
 def player_deck_draw(state: State, color, card, amount=1):
-    key = player_key(state, color)
-    assert state.player_state[f"{key}_{card}_IN_HAND"] >= amount
-    state.player_state[f"{key}_{card}_IN_HAND"] -= amount
+    index = player_offset(state, color) + _card_index(card)
+    assert state.player_state_array[index] >= amount
+    _increment(state, index, -amount)
 
 
 def player_deck_replenish(state: State, color, resource, amount=1):
-    key = player_key(state, color)
-    state.player_state[f"{key}_{resource}_IN_HAND"] += amount
+    index = player_offset(state, color) + _card_index(resource)
+    _increment(state, index, amount)
 
 
 def player_deck_random_select(state: State, color):
     deck_array = player_deck_to_array(state, color)
-    return random.choice(deck_array)
+    return state.rng.choice(deck_array)
+
+
+def player_set_has_rolled(state: State, color):
+    _assign(state, player_offset(state, color) + _HAS_ROLLED, True)
 
 
 def play_dev_card(state: State, color, dev_card):
-    if dev_card == "KNIGHT":
+    if dev_card == KNIGHT:
         previous_army_color, previous_army_size = get_largest_army(state)
-    key = player_key(state, color)
+    offset = player_offset(state, color)
     player_deck_draw(state, color, dev_card)
-    state.player_state[f"{key}_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"] = True
-    state.player_state[f"{key}_PLAYED_{dev_card}"] += 1
-    if dev_card == "KNIGHT":
+    _assign(state, offset + _HAS_PLAYED_DEV_CARD, True)
+    _increment(state, offset + PLAYED_DEV_CARD_INDEX[dev_card], 1)
+    if dev_card == KNIGHT:
         maintain_largest_army(state, color, previous_army_color, previous_army_size)  # type: ignore
 
 
 def player_clean_turn(state: State, color):
-    key = player_key(state, color)
-    state.player_state[f"{key}_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"] = False
-    state.player_state[f"{key}_HAS_ROLLED"] = False
+    values = state.player_state_array
+    offset = player_offset(state, color)
+    _assign(state, offset + _HAS_PLAYED_DEV_CARD, False)
+    _assign(state, offset + _HAS_ROLLED, False)
     # Dev cards owned this turn will be playable next turn
-    state.player_state[f"{key}_KNIGHT_OWNED_AT_START"] = (
-        state.player_state[f"{key}_KNIGHT_IN_HAND"] > 0
-    )
-    state.player_state[f"{key}_MONOPOLY_OWNED_AT_START"] = (
-        state.player_state[f"{key}_MONOPOLY_IN_HAND"] > 0
-    )
-    state.player_state[f"{key}_YEAR_OF_PLENTY_OWNED_AT_START"] = (
-        state.player_state[f"{key}_YEAR_OF_PLENTY_IN_HAND"] > 0
-    )
-    state.player_state[f"{key}_ROAD_BUILDING_OWNED_AT_START"] = (
-        state.player_state[f"{key}_ROAD_BUILDING_IN_HAND"] > 0
-    )
+    for dev_card, index in DEV_CARD_OWNED_AT_START_INDEX.items():
+        _assign(
+            state, offset + index, values[offset + DEV_CARD_IN_HAND_INDEX[dev_card]] > 0
+        )
+
+
+def _increment(state: State, index, amount):
+    """Adds amount to player_state_array[index], maintaining state.zobrist"""
+    if amount == 0:
+        return
+    values = state.player_state_array
+    value = values[index]
+    values[index] = value + amount
+    keys = PLAYER_VALUE_KEYS[index]
+    state.zobrist ^= keys[value % NUM_VALUES] ^ keys[(value + amount) % NUM_VALUES]
+
+
+def _assign(state: State, index, new_value):
+    """Sets player_state_array[index], maintaining state.zobrist"""
+    values = state.player_state_array
+    value = values[index]
+    if value == new_value:
+        return
+    values[index] = new_value
+    keys = PLAYER_VALUE_KEYS[index]
+    state.zobrist ^= keys[value % NUM_VALUES] ^ keys[new_value % NUM_VALUES]
+
+
+def _card_index(card):
+    """Offset of the *_IN_HAND field of a resource or development card"""
+    index = RESOURCE_IN_HAND_INDEX.get(card)
+    return DEV_CARD_IN_HAND_INDEX[card] if index is None else index
@@ -14,10 +14,17 @@ def create_app(test_config=None):
     if database_url.startswith("postgres://"):
         database_url = database_url.replace("postgres://", "postgresql://", 1)
     secret_key = os.environ.get("SECRET_KEY", "dev")
+    # MCTS analysis runs up to these many simulations, within the time budget
+    mcts_simulations = int(os.environ.get("MCTS_ANALYSIS_SIMULATIONS", "100"))
+    mcts_time_budget_ms = os.environ.get("MCTS_ANALYSIS_TIME_BUDGET_MS", "2000")
     app.config.from_mapping(
         SECRET_KEY=secret_key,
         SQLALCHEMY_DATABASE_URI=database_url,
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        MCTS_ANALYSIS_SIMULATIONS=mcts_simulations,
+        MCTS_ANALYSIS_TIME_BUDGET_MS=(
+            float(mcts_time_budget_ms) if mcts_time_budget_ms else None
+        ),
     )
     if test_config is not None:
         app.config.update(test_config)
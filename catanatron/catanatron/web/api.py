@@ -2,7 +2,7 @@ import json
 import logging
 import traceback
 
-from flask import Response, Blueprint, jsonify, abort, request
+from flask import Response, Blueprint, jsonify, abort, request, current_app
 
 from catanatron.web.models import upsert_game_state, get_game_state
 from catanatron.json import GameEncoder, action_from_json
@@ -103,7 +103,12 @@ def post_action_endpoint(game_id):
 
     # TODO: remove `or body_is_empty` when fully implement actions in FE
     body_is_empty = (not request.data) or request.json is None or request.json == {}
-    if game.state.current_player().is_bot or body_is_empty:
+    if game.state.current_player().is_bot:
+        # Play the bot's plies until someone else must decide.
+        bot_color = game.state.current_color()
+        game.advance_until(lambda game: game.state.current_color() != bot_color)
+        upsert_game_state(game)
+    elif body_is_empty:
         game.play_tick()
         upsert_game_state(game)
     else:
@@ -152,7 +157,10 @@ def mcts_analysis_endpoint(game_id, state_index):
             )  # Use original state_index for logging
             abort(404, description="Game state not found")
 
-        analyzer = GameAnalyzer(num_simulations=100)
+        analyzer = GameAnalyzer(
+            num_simulations=current_app.config["MCTS_ANALYSIS_SIMULATIONS"],
+            time_budget_ms=current_app.config["MCTS_ANALYSIS_TIME_BUDGET_MS"],
+        )
         probabilities = analyzer.analyze_win_probabilities(game)
 
         logging.info(f"Analysis successful. Probabilities: {probabilities}")
@@ -164,7 +172,7 @@ def mcts_analysis_endpoint(game_id, state_index):
                     "state_index": (
                         parsed_state_index
                         if parsed_state_index is not None
-                        else len(game.state.action_records)
+                        else len(game.state.action_log)
                     ),
                 }
             ),
@@ -5,18 +5,14 @@ from catanatron.web.utils import ensure_link
 
 class StepDatabaseAccumulator(GameAccumulator):
     """
-    Saves a game state to database for each tick.
-    Slows game ~1s per tick.
+    Saves the first and last game states to database, so that every state
+    in between can be replayed (see catanatron/replay.py).
     """
 
     def before(self, game):
         with database_session() as session:
             upsert_game_state(game, session)
 
-    def step(self, game_before_action, action):
-        with database_session() as session:
-            upsert_game_state(game_before_action, session)
-
     def after(self, game):
         self.link = ensure_link(game, get_replay_link=True)
 
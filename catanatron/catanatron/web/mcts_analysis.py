@@ -2,8 +2,9 @@ from catanatron.players.mcts import StateNode
 
 
 class GameAnalyzer:
-    def __init__(self, num_simulations=100):
+    def __init__(self, num_simulations=100, time_budget_ms=None):
         self.num_simulations = num_simulations
+        self.time_budget_ms = time_budget_ms
 
     def analyze_win_probabilities(self, game):
         """Uses MCTS to analyze win probabilities from current game state"""
@@ -17,8 +18,7 @@ class GameAnalyzer:
 
         # Create root node and run simulations
         root = StateNode(game.state.current_color(), game.copy(), None, prunning=True)
-        for _ in range(self.num_simulations):
-            root.run_simulation()
+        root.run_simulations(self.num_simulations, time_budget_ms=self.time_budget_ms)
 
         # Calculate probabilities using MCTS statistics
         probabilities = {}
@@ -1,3 +1,4 @@
+import functools
 import os
 import json
 import pickle
@@ -5,6 +6,7 @@ from contextlib import contextmanager
 from catanatron.json import GameEncoder
 
 from catanatron.game import Game
+from catanatron.replay import GameReplay
 from catanatron.state_functions import get_state_index
 from sqlalchemy import MetaData, Column, Integer, String, LargeBinary, create_engine
 from sqlalchemy.ext.declarative import declarative_base
@@ -71,7 +73,8 @@ def upsert_game_state(game: Game, session_param=None):
 
 def get_game_state(game_id, state_index=None) -> Game | None:
     """
-    Returns the game from database.
+    Returns the game from database. States that weren't stored are replayed
+    from the game's first and last stored states.
     """
     if state_index is None:
         result = (
@@ -89,6 +92,32 @@ def get_game_state(game_id, state_index=None) -> Game | None:
             .first()
         )
         if result is None:
-            abort(404)
+            replay = get_game_replay(game_id)
+            db.session.commit()
+            if replay is None:
+                abort(404)
+            try:
+                return replay.at(state_index)
+            except IndexError:
+                abort(404)
     db.session.commit()
     return pickle.loads(result.pickle_data)  # type: ignore
+
+
+def get_game_replay(game_id) -> GameReplay | None:
+    query = db.session.query(GameState).filter_by(uuid=game_id)
+    first = query.order_by(GameState.state_index.asc()).first()
+    last = query.order_by(GameState.state_index.desc()).first()
+    if first is None or last is None:
+        return None
+    return _get_game_replay(game_id, first.id, last.id)
+
+
+@functools.lru_cache(maxsize=16)
+def _get_game_replay(game_id, first_id, last_id) -> GameReplay:
+    """Cached per stored states, so that checkpoints are reused across requests"""
+    first = db.session.get(GameState, first_id)
+    last = db.session.get(GameState, last_id)
+    initial_game = pickle.loads(first.pickle_data)  # type: ignore
+    last_game = pickle.loads(last.pickle_data)  # type: ignore
+    return GameReplay(initial_game, last_game.state.action_records)
@@ -0,0 +1,127 @@
+"""
+Zobrist hashing of game states.
+
+Every (feature, value) pair of a State gets a fixed random 64-bit key, and
+the hash of a state is the XOR of the keys of its features. Changing a
+feature is then two XORs (remove old key, add new key), which is how
+State.zobrist is kept up to date by apply_action and state_functions.
+
+Keys come from a fixed seed so hashes are stable across processes and runs,
+which makes them usable as cache keys in datasets and across workers.
+"""
+
+import random
+from typing import Any, Dict
+
+from catanatron.models.coordinate_system import Coordinate
+from catanatron.models.enums import (
+    CITY,
+    DEVELOPMENT_CARDS,
+    RESOURCES,
+    SETTLEMENT,
+    ActionPrompt,
+)
+from catanatron.models.map import NUM_NODES
+from catanatron.models.player import Color
+
+ZOBRIST_SEED = 0x5EED_CA7A
+MAX_PLAYER_STATE_SIZE = 256  # >= 4 players * fields per player
+NUM_VALUES = 128  # values are folded into this range (collisions are harmless)
+
+_rng = random.Random(ZOBRIST_SEED)
+
+
+def _keys(n):
+    return [_rng.getrandbits(64) for _ in range(n)]
+
+
+COLOR_INDEX: Dict[Color, int] = {color: i for i, color in enumerate(Color)}
+
+# PLAYER_VALUE_KEYS[i][v]: player_state_array[i] has value v
+PLAYER_VALUE_KEYS = [_keys(NUM_VALUES) for _ in range(MAX_PLAYER_STATE_SIZE)]
+# BUILDING_KEYS[building_type][color_index][node_id]
+BUILDING_KEYS = {
+    SETTLEMENT: [_keys(NUM_NODES) for _ in Color],
+    CITY: [_keys(NUM_NODES) for _ in Color],
+}
+# ROAD_KEYS[color_index][min(edge) * NUM_NODES + max(edge)]
+ROAD_KEYS = [_keys(NUM_NODES * NUM_NODES) for _ in Color]
+ROBBER_KEYS: Dict[Coordinate, int] = {
+    (x, y, -x - y): _rng.getrandbits(64)
+    for x in range(-3, 4)
+    for y in range(-3, 4)
+    if -3 <= -x - y <= 3
+}
+BANK_KEYS = [_keys(NUM_VALUES) for _ in RESOURCES]
+DEV_DECK_KEYS = [_keys(NUM_VALUES) for _ in DEVELOPMENT_CARDS]
+PROMPT_KEYS = {prompt: _rng.getrandbits(64) for prompt in ActionPrompt}
+CURRENT_PLAYER_KEYS = _keys(len(Color))
+CURRENT_TURN_KEYS = _keys(len(Color))
+DISCARD_COUNT_KEYS = [_keys(NUM_VALUES) for _ in Color]
+FREE_ROADS_KEYS = _keys(3)
+INITIAL_BUILD_PHASE_KEY = _rng.getrandbits(64)
+ROAD_BUILDING_KEY = _rng.getrandbits(64)
+
+
+def player_value_key(index: int, value: Any) -> int:
+    return PLAYER_VALUE_KEYS[index][value % NUM_VALUES]
+
+
+def building_key(color: Color, building_type, node_id: int) -> int:
+    return BUILDING_KEYS[building_type][COLOR_INDEX[color]][node_id]
+
+
+def road_key(color: Color, edge) -> int:
+    a, b = edge
+    if a > b:
+        a, b = b, a
+    return ROAD_KEYS[COLOR_INDEX[color]][a * NUM_NODES + b]
+
+
+def player_state_hash(player_state_array) -> int:
+    result = 0
+    for index, value in enumerate(player_state_array):
+        result ^= player_value_key(index, value)
+    return result
+
+
+def board_hash(board) -> int:
+    result = ROBBER_KEYS[board.robber_coordinate]
+    for node_id, (color, building_type) in board.buildings.items():
+        result ^= building_key(color, building_type, node_id)
+    for edge, color in board.roads.items():
+        if edge[0] < edge[1]:  # roads dict has both orientations
+            result ^= road_key(color, edge)
+    return result
+
+
+def volatile_hash(state) -> int:
+    """Hash of the small State fields that are reassigned in many places
+    (bank, dev deck, prompt). Cheap enough to fold in on every read."""
+    result = (
+        PROMPT_KEYS[state.current_prompt]
+        ^ CURRENT_PLAYER_KEYS[state.current_player_index]
+        ^ CURRENT_TURN_KEYS[state.current_turn_index]
+    )
+    for i, count in enumerate(state.resource_freqdeck):
+        result ^= BANK_KEYS[i][count % NUM_VALUES]
+    deck = state.development_listdeck
+    for i, card in enumerate(DEVELOPMENT_CARDS):
+        result ^= DEV_DECK_KEYS[i][deck.count(card) % NUM_VALUES]
+    if state.is_discarding:
+        for i, count in enumerate(state.discard_counts):
+            result ^= DISCARD_COUNT_KEYS[i][count % NUM_VALUES]
+    if state.is_initial_build_phase:
+        result ^= INITIAL_BUILD_PHASE_KEY
+    if state.is_road_building:
+        result ^= ROAD_BUILDING_KEY ^ FREE_ROADS_KEYS[state.free_roads_available]
+    return result
+
+
+def compute_hash(state) -> int:
+    """Computes a state's hash from scratch. Should always equal state.hash."""
+    return (
+        player_state_hash(state.player_state_array)
+        ^ board_hash(state.board)
+        ^ volatile_hash(state)
+    )
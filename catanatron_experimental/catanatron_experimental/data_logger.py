@@ -46,7 +46,7 @@ class DataLogger:
             self.log_lines.append(
                 [
                     game.id,
-                    len(game.state.action_records),
+                    len(game.state.action_log),
                     "http://localhost:3000/games/" + game.id,
                 ]
             )
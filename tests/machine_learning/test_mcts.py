@@ -1,7 +1,16 @@
+import time
+
+import pytest
 from typing import List
 from catanatron import Game, RandomPlayer, Color
 from catanatron.models.player import Player
-from catanatron.players.mcts import StateNode
+from catanatron.players import mcts, playouts
+from catanatron.players.mcts import (
+    MCTSPlayer,
+    StateNode,
+    evaluate_position,
+    search_root_stats,
+)
 
 
 def test_root_node_initial_properties():
@@ -84,3 +93,228 @@ def test_child_node_initial_properties():
     assert (
         child_node.children == []
     ), "Initial children for child node should be an empty list"
+
+
+def test_find_reroots_at_what_happened():
+    players = [MCTSPlayer(Color.RED, 10), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=1)
+    game.advance_until(Color.RED)
+    root = StateNode(Color.RED, game.copy(), None)
+    for _ in range(20):
+        root.run_simulation()
+    assert root.find(game) is root
+
+    action, [(child, _)] = max(
+        root.children.items(), key=lambda item: item[1][0][0].visits
+    )
+    visits = child.visits
+    assert visits > 0
+    game.execute(action)
+    assert root.find(game) is child
+    assert child.parent is None and child.visits == visits
+    assert child.tree is not root.tree and child.id == 0
+    assert len(child.tree.visits) < len(root.tree.visits)
+    assert set(child.tree.games) < set(range(len(child.tree.visits)))
+
+    other_game = Game(players, seed=1)
+    assert child.find(other_game) is None
+
+
+def test_mcts_player_keeps_tree_between_decisions():
+    player = MCTSPlayer(Color.RED, 5)
+    game = Game([player, RandomPlayer(Color.BLUE)], seed=1)
+    game.advance_until(Color.RED)
+    game.play_tick()  # settlement
+    [(child, _)] = player.root.children[game.state.action_records[-1].action]
+    visits = child.visits
+
+    game.play_tick()  # road, searched from the settlement's node
+    assert player.root is child
+    assert child.visits == visits + 5
+
+    player.reset_state()
+    assert player.root is None
+
+
+def test_tree_parallel_simulations_count_every_visit():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=2)
+    root = StateNode(game.state.current_color(), game.copy(), None)
+    root.run_simulations(7, num_workers=3)
+    assert root.visits == 7
+    assert sum(child.visits for (child, _), in root.children.values()) == 7
+
+
+def test_virtual_loss_spreads_a_batch_across_children():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=2)
+    root = StateNode(Color.RED, game, None)
+    best = StateNode(Color.RED, game.copy(), root)
+    other = StateNode(Color.RED, game.copy(), root)
+    root.actions = ["best", "other"]
+    root.children = {"best": [(best, 1)], "other": [(other, 1)]}
+    best.visits, best.wins, other.visits, other.wins = 10, 8, 10, 5
+    root.visits = 20
+
+    # with visits alone, the batch would pile onto best
+    leaves = [root.select_leaf(mcts.VIRTUAL_LOSS) for _ in range(2)]
+    assert [leaf.parent for leaf in leaves] == [best, other]
+
+    for leaf in leaves:
+        leaf.backpropagate(0.5, mcts.VIRTUAL_LOSS)
+    assert (root.visits, best.visits, other.visits) == (22, 11, 11)
+    assert (root.wins, best.wins, other.wins) == (1, 8.5, 5.5)
+
+
+def test_tree_parallel_player_keeps_its_pool_between_decisions():
+    player = MCTSPlayer(Color.RED, 4, workers=2, parallel_mode="tree")
+    game = Game([player, RandomPlayer(Color.BLUE)], seed=2)
+    game.advance_until(Color.RED)
+    game.play_tick()
+    pool = player.pool.pool
+    assert pool is not None
+    game.advance_until(Color.RED)
+    game.play_tick()
+    assert player.pool.pool is pool
+
+    player.close()
+    assert player.pool.pool is None
+
+
+def test_root_parallel_player_decides_a_playable_action(monkeypatch):
+    searched = []
+
+    def search(color, prunning, search, **kwargs):
+        searched.append(search[1])
+        return search_root_stats(color, prunning, search, **kwargs)
+
+    monkeypatch.setattr(mcts, "search_root_stats", search)
+    monkeypatch.setattr(playouts, "USE_MULTIPROCESSING", False)  # to see searches
+    player = MCTSPlayer(Color.RED, 7, workers=3)
+    game = Game([player, RandomPlayer(Color.BLUE)], seed=2)
+    game.advance_until(Color.RED)
+    record = game.play_tick()
+    assert record.action.color == Color.RED
+    assert player.root is None
+    assert sorted(searched) == [2, 2, 3]
+
+
+def test_mcts_player_parses_cli_params():
+    player = MCTSPlayer(Color.RED, "10", "False", "1", "root", "None", "False")
+    assert not player.prunning and not player.stop_early
+    assert player.time_budget_ms is None
+    player = MCTSPlayer(Color.RED, "10", "True", "1", "root", "500", "True")
+    assert player.prunning and player.stop_early
+    assert player.time_budget_ms == 500
+    assert MCTSPlayer(Color.RED, "10", "False", "1", "root", "").time_budget_ms is None
+
+    widening = ["10", "False", "1", "root", "", "False"]
+    assert not MCTSPlayer(Color.RED, *widening, "False").progressive_widening
+    assert MCTSPlayer(Color.RED, *widening, "True").progressive_widening
+
+    rollouts = widening + ["False"]
+    assert MCTSPlayer(Color.RED, *rollouts, "None").evaluate is None
+    assert MCTSPlayer(Color.RED, *rollouts, "4").evaluate.keywords["rollout_plies"] == 4
+
+
+def test_is_decided_when_lead_or_confidence_is_enough():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=2)
+    root = StateNode(Color.RED, game, None)
+    best, other = StateNode(Color.RED, game, root), StateNode(Color.RED, game, root)
+    root.actions = ["best", "other"]
+    root.children = {"best": [(best, 1)], "other": [(other, 1)]}
+    best.visits, best.wins, other.visits, other.wins = 30, 25, 5, 1
+    root.visits = 35
+    assert root.is_decided(20)  # 25 more visits than simulations left
+    assert not root.is_decided(30)
+    assert root.choose_best_action() == "other"  # exploring
+    assert root.most_visited_action() == "best"  # what is_decided assumes
+
+    best.visits, best.wins, other.visits, other.wins = 300, 300, 25, 0
+    root.visits = 325
+    assert root.is_decided(1000)  # confidence intervals don't overlap
+
+
+def test_run_simulations_stops_at_time_budget():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=2)
+    root = StateNode(game.state.current_color(), game.copy(), None)
+    start = time.perf_counter()
+    num_simulations = root.run_simulations(10_000, time_budget_ms=50)
+    assert time.perf_counter() - start < 5
+    assert 0 < num_simulations < 10_000
+    assert root.visits == num_simulations
+
+
+def test_children_materialize_their_game_when_selected():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=2)
+    root = StateNode(game.state.current_color(), game.copy(), None)
+    root.run_simulations(3)
+    children = [child for outcomes in root.children.values() for child, _ in outcomes]
+    visited = [child for child in children if child.visits > 0]
+    assert len(visited) == 3
+    assert {child.id for child in visited} <= set(root.tree.games)
+    assert all(child._game is None for child in children)
+
+    action, [(child, _)] = next(iter(root.children.items()))
+    expected = game.copy()
+    expected.execute(action)
+    assert child.game.state.hash == expected.state.hash
+
+
+def test_evicted_games_are_replayed_from_the_closest_ancestor(monkeypatch):
+    monkeypatch.setattr(mcts, "MAX_CACHED_GAMES", 4)
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=2)
+    while game.state.num_turns < 10:
+        game.play_tick()
+    root = StateNode(game.state.current_color(), game.copy(), None)
+    root.run_simulations(30)
+    assert len(root.tree.games) == 4
+    assert len(root.tree.visits) > 30
+
+    node, path = root, []
+    while not node.is_leaf():
+        children = [c for outcomes in node.children.values() for c, _ in outcomes]
+        node = max(children, key=lambda child: child.visits)
+        path.append(node)
+    deepest = path[-1]
+    expected = deepest.game
+
+    root.tree.games.clear()
+    replayed = game.copy()
+    for node in path:
+        if node.outcome:
+            action, record = node.outcome
+            replayed.execute(action, validate_action=False, action_record=record)
+    assert deepest.game.state.hash == expected.state.hash == replayed.state.hash
+    assert root.find(replayed) is deepest
+
+
+def test_progressive_widening_adds_actions_with_visits():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=2)
+    root = StateNode(game.state.current_color(), game.copy(), None, widening=True)
+    root.run_simulations(9)
+    assert len(root.children) == 6  # ceil(WIDENING_C * 9 ** WIDENING_ALPHA)
+    assert len(root.unexpanded_actions) == len(game.playable_actions) - 6
+
+
+def test_truncated_rollouts_score_leaves_as_probabilities():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=3)
+    while game.state.num_turns < 10:
+        game.play_tick()
+
+    num_records = len(game.state.action_records)
+    for rollout_plies in [0, 5, mcts.END_OF_TURN]:
+        red = evaluate_position(game, Color.RED, rollout_plies)
+        blue = evaluate_position(game, Color.BLUE, rollout_plies, "contender_fn")
+        assert 0 < red < 1 and 0 < blue < 1
+    assert evaluate_position(game, Color.RED, 0) + evaluate_position(
+        game, Color.BLUE, 0
+    ) == pytest.approx(1)
+    assert len(game.state.action_records) == num_records
+
+    game.advance_until(
+        lambda g: g.state.current_color() == Color.RED and len(g.playable_actions) > 1
+    )
+    player = MCTSPlayer(Color.RED, 20, rollout_plies=4, rollout_mix=0.5)
+    action = player.decide(game, game.playable_actions)
+    assert action in game.playable_actions
+    assert player.root.visits == 20
+    assert 0 < player.root.wins < 20
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from catanatron.game import Game
+from catanatron.models.action_table import get_action_table
+from catanatron.models.actions import generate_playable_action_ids
+from catanatron.models.enums import Action, ActionType
+from catanatron.models.map import MINI_MAP_TEMPLATE, CatanMap
+from catanatron.models.player import Color, SimplePlayer
+
+
+def test_action_table_round_trip():
+    catan_map = CatanMap.from_template(MINI_MAP_TEMPLATE)
+    table = get_action_table([Color.RED, Color.BLUE], catan_map)
+
+    assert len(set(table.actions)) == len(table)
+    for action_id, action in enumerate(table.actions):
+        assert table.to_id(action) == action_id
+        assert table.from_id(action_id) is action
+
+    road = Action(Color.BLUE, ActionType.BUILD_ROAD, (1, 0))
+    assert table.from_id(table.to_id(road)).value == (0, 1)
+    assert table.get_id(Action(Color.RED, ActionType.OFFER_TRADE, None)) is None
+
+
+def test_action_table_is_shared_by_seating_order_and_layout():
+    catan_map = CatanMap.from_template(MINI_MAP_TEMPLATE)
+    table = get_action_table([Color.RED, Color.BLUE], catan_map)
+    other_map = CatanMap.from_template(MINI_MAP_TEMPLATE)
+    assert get_action_table([Color.BLUE, Color.RED], other_map) is table
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_playable_actions_have_ids(seed):
+    rng = random.Random(seed)
+    players = [SimplePlayer(color) for color in Color]
+    game = Game(players, seed=seed)
+    table = game.state.action_table
+    while game.winning_color() is None and game.state.num_turns < 200:
+        action_ids = generate_playable_action_ids(game.state)
+        assert [table.from_id(i) for i in action_ids] == game.playable_actions
+        game.execute(rng.choice(action_ids))
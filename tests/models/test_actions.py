@@ -1,5 +1,9 @@
+import random
+
+from catanatron.game import Game
 from catanatron.state import State
 from catanatron.models.actions import (
+    count_playable_actions,
     discard_possibilities,
     generate_playable_actions,
     monopoly_possibilities,
@@ -9,6 +13,8 @@ from catanatron.models.actions import (
     city_possibilities,
     robber_possibilities,
     maritime_trade_possibilities,
+    sample_playable_action,
+    weighted_choice,
 )
 from catanatron.models.enums import (
     Action,
@@ -19,7 +25,8 @@ from catanatron.models.enums import (
     WHEAT,
     WOOD,
 )
-from catanatron.models.player import Color, SimplePlayer
+from catanatron.models.player import Color, RandomPlayer, SimplePlayer
+from catanatron.players.weighted_random import WEIGHTS_BY_ACTION_TYPE
 from catanatron.models.decks import (
     SETTLEMENT_COST_FREQDECK,
     starting_resource_bank,
@@ -273,3 +280,51 @@ def test_can_trade_with_port():
 
     possibilities = maritime_trade_possibilities(state, Color.RED)
     assert len(possibilities) == 4
+
+
+def test_cached_move_generation_matches_fresh_generation():
+    players = [RandomPlayer(color) for color in [Color.RED, Color.BLUE, Color.WHITE]]
+    for seed in range(3):
+        game = Game(players, seed=seed)
+        rng = random.Random(seed)
+        while game.winning_color() is None:
+            game.play_tick(decide_fn=lambda player, game, actions: rng.choice(actions))
+            cached = generate_playable_actions(game.state)
+
+            state = game.state.copy()
+            state.board.move_cache = {}  # what a build would do
+            assert cached == generate_playable_actions(state)
+            assert game.playable_actions == cached
+
+
+def test_sample_playable_action_draws_like_choosing_from_list():
+    game = Game([RandomPlayer(color) for color in Color], seed=4)
+    while game.winning_color() is None and game.state.num_turns < 100:
+        state = game.state
+        playable_actions = generate_playable_actions(state)
+        counts = count_playable_actions(state)
+        assert sum(counts.values()) == len(playable_actions)
+        for action_type, count in counts.items():
+            assert count == len(
+                [a for a in playable_actions if a.action_type == action_type]
+            )
+
+        seed = game.rng.getrandbits(32)
+        expected = random.Random(seed).choice(playable_actions)
+        assert sample_playable_action(state, random.Random(seed)) == expected
+
+        bloated_actions = [
+            action
+            for action in playable_actions
+            for _ in range(WEIGHTS_BY_ACTION_TYPE.get(action.action_type, 1))
+        ]
+        expected = random.Random(seed).choice(bloated_actions)
+        sample = sample_playable_action(
+            state, random.Random(seed), WEIGHTS_BY_ACTION_TYPE
+        )
+        assert sample == expected
+        choice = weighted_choice(
+            playable_actions, random.Random(seed), WEIGHTS_BY_ACTION_TYPE
+        )
+        assert choice == expected
+        game.play_tick()
@@ -1,9 +1,17 @@
 import pytest
 
-from catanatron.models.map import MINI_MAP_TEMPLATE, CatanMap
-from catanatron.models.enums import RESOURCES
-from catanatron.models.board import Board, get_node_distances
-from catanatron.models.player import Color
+from catanatron.game import Game
+from catanatron.models.map import MINI_MAP_TEMPLATE, NUM_NODES, CatanMap
+from catanatron.models.enums import CITY, RESOURCES, SETTLEMENT
+from catanatron.models.board import (
+    EDGES,
+    Board,
+    get_node_distances,
+    iter_bits,
+    longest_acyclic_path,
+)
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.models.topology import NODE_EDGES
 
 
 def test_initial_build_phase_bypasses_restrictions():
@@ -356,4 +364,116 @@ def test_many_buildings():
     assert len(board.find_connected_components(Color.ORANGE)) == 3
 
 
+def test_enemy_settlement_at_end_of_road_cuts_it():
+    board = Board()
+    board.build_settlement(Color.RED, 3, initial_build_phase=True)
+    board.build_road(Color.RED, (3, 4))
+    board.build_road(Color.RED, (4, 5))
+    board.build_settlement(Color.BLUE, 18, initial_build_phase=True)
+    board.build_road(Color.BLUE, (16, 18))
+    board.build_road(Color.BLUE, (5, 16))
+    assert (0, 5) in board.buildable_edges(Color.RED)
+
+    board.build_settlement(Color.BLUE, 5)
+    assert board.find_connected_components(Color.RED) == [{3, 4}]
+    assert board.find_connected_components(Color.BLUE) == [{5, 16, 18}]
+    assert (0, 5) not in board.buildable_edges(Color.RED)
+    assert board.road_lengths[Color.RED] == 2  # 3-4-5, ending at BLUE's 5
+    assert_road_lengths_are_fresh(board)
+
+
+def assert_road_lengths_are_fresh(board):
+    for color in [Color.RED, Color.BLUE]:
+        fresh = max(
+            (
+                len(longest_acyclic_path(board, component, color))
+                for component in board.find_connected_components(color)
+            ),
+            default=0,
+        )
+        assert board.road_lengths[color] == fresh
+
+
+def build_red_road_from_20_to_15(board):
+    board.build_settlement(Color.RED, 20, initial_build_phase=True)
+    for edge in [(20, 0), (0, 1), (1, 2), (2, 3), (3, 4), (4, 15)]:
+        board.build_road(Color.RED, edge)
+    assert board.road_lengths[Color.RED] == 6
+
+
+def test_enemy_settlement_at_end_of_long_road_keeps_its_length():
+    board = Board()
+    build_red_road_from_20_to_15(board)
+    board.build_settlement(Color.BLUE, 37, initial_build_phase=True)
+    board.build_road(Color.BLUE, (37, 14))
+    board.build_road(Color.BLUE, (14, 15))
+
+    board.build_settlement(Color.BLUE, 15)
+    assert board.road_lengths[Color.RED] == 6  # 20-0-1-2-3-4-15
+    assert board.road_color == Color.RED and board.road_length == 6
+    assert_road_lengths_are_fresh(board)
+
+
+def test_enemy_settlement_in_the_middle_of_road_splits_it():
+    board = Board()
+    build_red_road_from_20_to_15(board)
+    board.build_settlement(Color.BLUE, 10, initial_build_phase=True)
+    board.build_road(Color.BLUE, (10, 9))
+    board.build_road(Color.BLUE, (9, 2))
+
+    board.build_settlement(Color.BLUE, 2)
+    assert board.find_connected_components(Color.RED) == [{0, 1, 20}, {3, 4, 15}]
+    assert board.road_lengths[Color.RED] == 3  # 20-0-1-2 or 2-3-4-15
+    assert board.road_color is None
+    assert_road_lengths_are_fresh(board)
+
+
 # TODO: Test super long road, cut at many places, to yield 5+ component graph
+
+
+def test_copy_is_independent_of_original():
+    board = Board()
+    board.build_settlement(Color.RED, 3, initial_build_phase=True)
+    board.build_road(Color.RED, (3, 4))
+    assert (4, 5) in board.buildable_edges(Color.RED)  # populate cache
+
+    board_copy = board.copy()
+    board_copy.build_road(Color.RED, (4, 5))
+
+    assert board.find_connected_components(Color.RED) == [{3, 4}]
+    assert board_copy.find_connected_components(Color.RED) == [{3, 4, 5}]
+    assert (4, 5) in board.buildable_edges(Color.RED)
+    assert (4, 5) not in board_copy.buildable_edges(Color.RED)
+    assert board.get_edge_color((4, 5)) is None
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bitboards_match_buildings_and_roads(seed):
+    game = Game([RandomPlayer(color) for color in Color], seed=seed)
+    game.play()
+    board = game.state.board
+
+    for color in Color:
+        settlements = {
+            n for n, b in board.buildings.items() if b == (color, SETTLEMENT)
+        }
+        cities = {n for n, b in board.buildings.items() if b == (color, CITY)}
+        roads = {tuple(sorted(e)) for e, c in board.roads.items() if c == color}
+        assert set(iter_bits(board.settlement_bits[color])) == settlements
+        assert set(iter_bits(board.city_bits[color])) == cities
+        assert {EDGES[i] for i in iter_bits(board.road_bits[color])} == roads
+
+        component_nodes = set().union(*board.connected_components[color])
+        assert board.buildable_node_ids(color) == sorted(
+            component_nodes & board.board_buildable_ids
+        )
+        assert set(board.buildable_edges(color)) == {
+            tuple(sorted(edge))
+            for node_id in component_nodes
+            for edge in NODE_EDGES[node_id]
+            if edge[1] in board.map.land_nodes and board.get_edge_color(edge) is None
+        }
+        for node_id in range(NUM_NODES):
+            node_color = board.get_node_color(node_id)
+            is_enemy = node_color is not None and node_color != color
+            assert board.is_enemy_node(node_id, color) == is_enemy
@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from catanatron.game import Game
+from catanatron.models.board import Board, longest_acyclic_path
+from catanatron.models.longest_road import longest_road, longest_road_length
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.models.topology import EDGE_INDEX, nodes_mask
+
+
+def brute_force_road_length(board: Board, color):
+    """Longest trail over color's roads in board.roads, by a plain DFS over
+    sets of edges (so independent of components and bitboards). Trails may
+    end at enemy buildings, but not go past them."""
+    edges = {tuple(sorted(edge)) for edge, c in board.roads.items() if c == color}
+
+    def is_enemy_node(node):
+        building = board.buildings.get(node)
+        return building is not None and building[0] != color
+
+    def walk(node, used):
+        best = 0
+        for edge in edges - used:
+            if node in edge:
+                neighbor = edge[0] if edge[1] == node else edge[1]
+                length = 1
+                if not is_enemy_node(neighbor):
+                    length += walk(neighbor, used | {edge})
+                best = max(best, length)
+        return best
+
+    return max((walk(node, frozenset()) for edge in edges for node in edge), default=0)
+
+
+def roads_mask(edges):
+    mask = 0
+    for edge in edges:
+        mask |= 1 << EDGE_INDEX[edge]
+    return mask
+
+
+def test_longest_road_on_a_cycle():
+    roads = roads_mask([(0, 1), (1, 2), (2, 3), (3, 4), (4, 5), (0, 5), (3, 12)])
+    assert longest_road_length(nodes_mask([0]), roads, 0) == 6  # around the loop
+    assert longest_road_length(nodes_mask([0, 12]), roads, 0) == 7
+    assert len(longest_road(nodes_mask([0, 12]), roads, 0)) == 7
+
+
+def test_longest_road_stops_at_blocked_nodes():
+    roads = roads_mask([(0, 1), (1, 2), (2, 3)])
+    # the road into a blocked node counts, but doesn't go past it
+    assert longest_road_length(nodes_mask([0]), roads, nodes_mask([2])) == 2
+    assert longest_road_length(nodes_mask([3]), roads, nodes_mask([2])) == 1
+    # starting on a blocked node is allowed
+    assert longest_road_length(nodes_mask([2]), roads, nodes_mask([2])) == 2
+    assert longest_road_length(nodes_mask([0, 3]), roads, nodes_mask([2])) == 2
+    assert len(longest_road(nodes_mask([0, 3]), roads, nodes_mask([2]))) == 2
+
+
+def test_longest_road_between_two_blocked_nodes():
+    roads = roads_mask([(0, 1), (1, 2), (2, 3), (3, 4)])
+    blocked = nodes_mask([0, 4])
+    # neither end is a start node, but the trail may start at either
+    assert longest_road_length(nodes_mask([1, 2, 3]), roads, blocked) == 4
+    assert len(longest_road(nodes_mask([1, 2, 3]), roads, blocked)) == 4
+    # but only into start nodes: 2-3-4 belongs to another component
+    assert longest_road_length(nodes_mask([0, 1]), roads, nodes_mask([2])) == 2
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_longest_road_matches_brute_force(seed):
+    rng = random.Random(seed)
+    game = Game([RandomPlayer(color) for color in Color], seed=seed)
+    while game.winning_color() is None:
+        game.play_tick(decide_fn=lambda player, game, actions: rng.choice(actions))
+
+        board = game.state.board
+        for color in Color:
+            expected = brute_force_road_length(board, color)
+            components = board.connected_components[color]
+            paths = [longest_acyclic_path(board, c, color) for c in components]
+            assert max(map(len, paths), default=0) == expected
+            assert board.road_lengths[color] == expected
@@ -0,0 +1,42 @@
+import pytest
+
+from catanatron.models.map import BASE_MAP_TEMPLATE, MINI_MAP_TEMPLATE, CatanMap
+from catanatron.models.topology import (
+    EDGE_INDEX,
+    EDGES,
+    GRAPH_NODES,
+    NODE_DISTANCES,
+    NODE_EDGES,
+    NODE_NEIGHBORS,
+    get_edges,
+)
+
+
+def test_edge_index_covers_both_orientations():
+    for i, (a, b) in enumerate(EDGES):
+        assert a < b
+        assert EDGE_INDEX[(a, b)] == i
+        assert EDGE_INDEX[(b, a)] == i
+
+
+def test_tables_match_networkx():
+    nx = pytest.importorskip("networkx")
+    graph = nx.Graph()
+    for tile in CatanMap.from_template(BASE_MAP_TEMPLATE).tiles.values():
+        graph.add_nodes_from(tile.nodes.values())
+        graph.add_edges_from(tile.edges.values())
+
+    assert list(graph.nodes()) == list(GRAPH_NODES)
+    for node_id in graph.nodes():
+        assert list(graph.neighbors(node_id)) == list(NODE_NEIGHBORS[node_id])
+        assert list(graph.edges(node_id)) == list(NODE_EDGES[node_id])
+
+    for template in [None, BASE_MAP_TEMPLATE, MINI_MAP_TEMPLATE]:
+        land_nodes = template and CatanMap.from_template(template).land_nodes
+        subgraph = graph.subgraph(land_nodes or range(54))
+        assert get_edges(land_nodes) == list(subgraph.edges())
+
+    distances = nx.floyd_warshall(graph)
+    for a in graph.nodes():
+        for b in graph.nodes():
+            assert NODE_DISTANCES[a][b] == distances[a][b]
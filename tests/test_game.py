@@ -7,7 +7,7 @@ from catanatron.state_functions import (
     player_clean_turn,
     player_has_rolled,
 )
-from catanatron.game import Game, is_valid_trade
+from catanatron.game import TURNS_LIMIT, Game, is_valid_trade
 from catanatron.apply_action import apply_action
 from catanatron.state_functions import (
     player_key,
@@ -18,6 +18,7 @@ from catanatron.models.actions import generate_playable_actions
 from catanatron.models.enums import (
     BRICK,
     ORE,
+    SHEEP,
     RESOURCES,
     ActionPrompt,
     SETTLEMENT,
@@ -107,6 +108,40 @@ def test_can_play_for_a_bit():  # assert no exception thrown
         game.play_tick()
 
 
+def test_play_ends_games_like_checking_for_a_winner_every_tick():
+    for seed in range(5):
+        game = Game([RandomPlayer(color) for color in Color], seed=seed)
+        expected = Game([RandomPlayer(color) for color in Color], seed=seed)
+        while (
+            expected.winning_color() is None
+            and expected.state.num_turns < TURNS_LIMIT
+        ):
+            expected.play_tick()
+        assert game.play() == expected.winning_color()
+        assert game.state.action_records == expected.state.action_records
+
+
+def test_subclass_overriding_decide_is_not_sampled():
+    class FirstActionPlayer(RandomPlayer):
+        def decide(self, game, playable_actions):
+            self.decisions += 1
+            return playable_actions[0]
+
+    class RenamedRandomPlayer(RandomPlayer):
+        pass
+
+    assert not FirstActionPlayer.samples_actions
+    assert RenamedRandomPlayer.samples_actions
+
+    players = [FirstActionPlayer(Color.RED), FirstActionPlayer(Color.BLUE)]
+    for player in players:
+        player.decisions = 0
+    game = Game(players)
+    for _ in range(20):
+        game.play_tick()
+    assert sum(player.decisions for player in players) == 20
+
+
 @patch("catanatron.apply_action.roll_dice")
 def test_seven_cards_dont_trigger_discarding(fake_roll_dice):
     fake_roll_dice.return_value = (1, 6)
@@ -235,9 +270,7 @@ def test_friendly_robber_filters_tiles_in_game_playable_actions(fake_roll_dice):
     regular_game = Game(players, seed=1, friendly_robber=False)
     build_initial_placements(regular_game)
     regular_game.execute(Action(Color.RED, ActionType.ROLL, None))
-    regular_coordinates = {
-        action.value[0] for action in regular_game.playable_actions
-    }
+    regular_coordinates = {action.value[0] for action in regular_game.playable_actions}
 
     friendly_game = Game(players, seed=1, friendly_robber=True)
     build_initial_placements(friendly_game)
@@ -426,6 +459,43 @@ def test_longest_road_steal():
     assert game.state.player_state[f"{p1_key}_ACTUAL_VICTORY_POINTS"] == 1
 
 
+def test_longest_road_is_lost_when_cut_under_five():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    game = Game(players)
+    red_key = player_key(game.state, Color.RED)
+    blue_key = player_key(game.state, Color.BLUE)
+    board = game.state.board
+
+    # RED has longest road of length 6 (20-0-1-2-3-4-15)
+    board.build_settlement(Color.RED, 20, True)
+    for edge in [(20, 0), (0, 1), (1, 2), (2, 3), (3, 4), (4, 15)]:
+        board.build_road(Color.RED, edge)
+    game.state.player_state[f"{red_key}_VICTORY_POINTS"] = 3
+    game.state.player_state[f"{red_key}_ACTUAL_VICTORY_POINTS"] = 3
+    game.state.player_state[f"{red_key}_HAS_ROAD"] = True
+
+    # BLUE can settle in the middle of it
+    board.build_settlement(Color.BLUE, 10, True)
+    board.build_road(Color.BLUE, (10, 9))
+    board.build_road(Color.BLUE, (9, 2))
+    game.state.player_state[f"{blue_key}_VICTORY_POINTS"] = 1
+    game.state.player_state[f"{blue_key}_ACTUAL_VICTORY_POINTS"] = 1
+    game.state.current_prompt = ActionPrompt.PLAY_TURN
+    game.state.is_initial_build_phase = False
+    for resource in [WOOD, BRICK, SHEEP, WHEAT]:
+        player_deck_replenish(game.state, Color.BLUE, resource)
+
+    # Cutting it under 5 leaves no one with longest road
+    apply_action(game.state, Action(Color.BLUE, ActionType.BUILD_SETTLEMENT, 2))
+    assert game.state.player_state[f"{red_key}_LONGEST_ROAD_LENGTH"] == 3
+    assert game.state.player_state[f"{red_key}_HAS_ROAD"] == False
+    assert game.state.player_state[f"{red_key}_VICTORY_POINTS"] == 1
+    assert game.state.player_state[f"{red_key}_ACTUAL_VICTORY_POINTS"] == 1
+    assert game.state.player_state[f"{blue_key}_HAS_ROAD"] == False
+    assert game.state.player_state[f"{blue_key}_VICTORY_POINTS"] == 2
+    assert game.state.player_state[f"{blue_key}_ACTUAL_VICTORY_POINTS"] == 2
+
+
 def test_second_placement_takes_cards_from_bank():
     players = [
         SimplePlayer(Color.RED),
@@ -630,3 +700,41 @@ def test_trading_sequence(fake_roll_dice):
     expected[index_of_a_resource_owned] -= 1
     expected[missing_resource_index] += 1
     assert get_player_freqdeck(game.state, p0.color) == expected
+
+
+def test_seeded_games_replay_exactly_when_interleaved():
+    players = [RandomPlayer(color) for color in Color]
+    first, second = Game(players, seed=42), Game(players, seed=42)
+    while first.winning_color() is None and first.state.num_turns < 100:
+        first.play_tick()
+        first.copy().play_tick()  # simulating on copies doesn't change the game
+        second.play_tick()
+    assert first.state.colors == second.state.colors
+    assert first.state.action_records == second.state.action_records
+
+    # copies fork the random stream deterministically
+    first_copy = Game(players, seed=7).copy()
+    second_copy = Game(players, seed=7).copy()
+    first_copy.play()
+    second_copy.play()
+    assert first_copy.state.action_records == second_copy.state.action_records
+
+
+def test_advance_until_stops_where_asked():
+    players = [RandomPlayer(color) for color in Color]
+    game, expected = Game(players, seed=3), Game(players, seed=3)
+    last_color = game.state.colors[-1]
+
+    records = game.advance_until(last_color)
+    assert game.state.current_color() == last_color
+    assert game.advance_until(last_color) == []
+    while expected.state.current_color() != last_color:
+        expected.play_tick()
+    assert records == expected.state.action_records
+
+    records = game.advance_until(lambda game: game.state.num_turns == 5)
+    assert game.state.num_turns == 5
+    assert len(game.advance_until(last_color, max_ticks=3)) <= 3
+
+    game.advance_until(lambda game: False)
+    assert game.winning_color() is not None or game.state.num_turns >= TURNS_LIMIT
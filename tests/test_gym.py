@@ -268,12 +268,13 @@ def test_gym_reproducibility():
     assert center_tile.resource == ORE
     assert center_tile.number == 11
 
+    rng = random.Random(123)
     done = False
     reward = 0
     while not done:
         action_mask = env.action_masks()
         valid_indices = np.flatnonzero(action_mask)
-        action = random.choice(valid_indices)
+        action = rng.choice(valid_indices)
 
         observation, reward, terminated, truncated, info = env.step(action)
         done = terminated or truncated
@@ -281,4 +282,4 @@ def test_gym_reproducibility():
     game_json = json.loads(json.dumps(game, cls=GameEncoder))
     env.close()
 
-    assert game_json["state_index"] == 125
+    assert game_json["state_index"] == 142
@@ -0,0 +1,70 @@
+import pickle
+
+import pytest
+
+from catanatron.game import Game
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.players import playouts
+from catanatron.players.playouts import GreedyPlayoutsPlayer, run_playouts_of
+
+
+def build_games(num_games):
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=1)
+    for _ in range(30):
+        game.play_tick()
+    return [game.copy() for _ in range(num_games)]
+
+
+@pytest.mark.skipif(not playouts.USE_FORK, reason="forks only on linux")
+def test_fork_playouts_match_serial_playouts():
+    expected = run_playouts_of(build_games(5), num_workers=1)
+    assert playouts.fork_playouts(build_games(5), 2) == expected
+    assert playouts.fork_playouts(build_games(5), 5) == expected
+
+
+def test_worker_pool_maps_games_as_serially():
+    expected = playouts.map_games(None, playouts.run_playout, build_games(4))
+    with playouts.worker_pool(2) as pool:
+        assert pool is not None
+        for _ in range(2):  # same workers, many calls
+            games = build_games(4)
+            assert playouts.map_games(pool, playouts.run_playout, games) == expected
+
+
+def fail_on_three(item):
+    if item == 3:
+        raise ValueError("bad item")
+    return item
+
+
+@pytest.mark.skipif(not playouts.USE_FORK, reason="forks only on linux")
+def test_fork_map_reports_worker_tracebacks():
+    assert playouts.fork_map(fail_on_three, [1, 2], 2) == [1, 2]
+    with pytest.raises(RuntimeError, match="ValueError: bad item"):
+        playouts.fork_map(fail_on_three, [1, 2, 3, 4], 2)
+
+
+def test_greedy_playouts_player_decides(monkeypatch):
+    monkeypatch.setattr(playouts, "NUM_WORKERS", 2)
+    players = [GreedyPlayoutsPlayer(Color.RED, 1), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=0)
+    game.advance_until(Color.RED)
+    record = game.play_tick()
+    assert record.action.color == Color.RED
+
+
+def test_greedy_playouts_player_keeps_its_pool_between_decisions(monkeypatch):
+    monkeypatch.setattr(playouts, "NUM_WORKERS", 2)
+    player = GreedyPlayoutsPlayer(Color.RED, 1)
+    game = Game([player, RandomPlayer(Color.BLUE)], seed=0)
+    game.advance_until(Color.RED)
+    game.play_tick()
+    pool = player.pool.pool
+    assert pool is not None
+    game.advance_until(Color.RED)
+    game.play_tick()
+    assert player.pool.pool is pool
+
+    assert pickle.loads(pickle.dumps(player)).pool.pool is None
+    player.close()
+    assert player.pool.pool is None
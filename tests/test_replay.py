@@ -0,0 +1,32 @@
+import pytest
+
+from catanatron.game import Game
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.replay import GameReplay
+
+
+def test_replay_rebuilds_every_state_index():
+    game = Game([RandomPlayer(color) for color in Color], seed=2)
+    initial_game = game.copy()
+    games = [game.copy()]
+    while game.winning_color() is None:
+        game.play_tick()
+        games.append(game.copy())
+
+    replay = GameReplay(initial_game, game.state.action_records, checkpoint_every=8)
+    assert len(replay) == len(games)
+    for state_index in [len(games) - 1, 0, 9, 8, 1, len(games) // 2, 17]:
+        expected, replayed = games[state_index], replay.at(state_index)
+        assert len(replayed.state.action_log) == state_index
+        assert replayed.state.action_records == expected.state.action_records
+        assert replayed.state.player_state_array == expected.state.player_state_array
+        assert (
+            replayed.state.development_listdeck == expected.state.development_listdeck
+        )
+        assert replayed.state.hash == expected.state.hash
+        assert replayed.playable_actions == expected.playable_actions
+    assert set(replay.checkpoints) == set(range(0, len(games), 8))
+
+    with pytest.raises(IndexError):
+        replay.at(len(games))
+    assert len(initial_game.state.action_log) == 0
@@ -0,0 +1,68 @@
+import pickle
+
+import pytest
+
+from catanatron.game import Game
+from catanatron.models.enums import Action, ActionRecord, ActionType
+from catanatron.models.map import MINI_MAP_TEMPLATE, CatanMap
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.players.weighted_random import WeightedRandomPlayer
+
+
+def assert_same_game(game, loaded):
+    state, loaded_state = game.state, loaded.state
+    assert loaded.id == game.id
+    assert loaded.seed == game.seed
+    assert loaded_state.colors == state.colors
+    assert loaded_state.action_records == state.action_records
+    assert loaded_state.player_state_array == state.player_state_array
+    assert loaded_state.resource_freqdeck == state.resource_freqdeck
+    assert loaded_state.development_listdeck == state.development_listdeck
+    assert loaded_state.buildings_by_color == state.buildings_by_color
+    assert loaded_state.current_prompt == state.current_prompt
+    assert loaded_state.board.buildings == state.board.buildings
+    assert loaded_state.board.roads == state.board.roads
+    assert loaded_state.board.road_bits == state.board.road_bits
+    assert loaded_state.board.robber_coordinate == state.board.robber_coordinate
+    assert loaded_state.hash == state.hash
+    assert loaded.playable_actions == game.playable_actions
+
+
+@pytest.mark.parametrize("map_template", [None, MINI_MAP_TEMPLATE])
+def test_from_bytes_continues_the_same_game(map_template):
+    def players():
+        return [WeightedRandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+
+    catan_map = CatanMap.from_template(map_template) if map_template else None
+    game = Game(players(), seed=3, catan_map=catan_map)
+    while game.state.num_turns < 20:
+        game.play_tick()
+
+    data = game.to_bytes()
+    loaded = Game.from_bytes(data, players())
+    assert_same_game(game, loaded)
+    assert loaded.to_bytes() == data
+    assert len(data) * 3 < len(pickle.dumps(game))
+
+    assert loaded.play() == game.play()
+    assert_same_game(game, loaded)
+
+
+def test_from_bytes_keeps_unpacked_records():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=0)
+    trade = Action(Color.RED, ActionType.OFFER_TRADE, (1,) + (0,) * 9)
+    game.state.append_action_record(ActionRecord(trade, None))
+    confirm = Action(Color.RED, ActionType.CONFIRM_TRADE, trade.value + (Color.BLUE,))
+    game.state.append_action_record(ActionRecord(confirm, None))
+
+    loaded = Game.from_bytes(game.to_bytes())
+    assert loaded.state.action_records == game.state.action_records
+    assert tuple(p.color for p in loaded.state.players) == game.state.colors
+
+
+def test_from_bytes_rejects_invalid_data():
+    data = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]).to_bytes()
+    with pytest.raises(ValueError):
+        Game.from_bytes(pickle.dumps(data))
+    with pytest.raises(ValueError):
+        Game.from_bytes(data[:-10])
@@ -1,3 +1,5 @@
+import pickle
+
 import pytest
 
 from catanatron.state import State
@@ -268,3 +270,83 @@ def test_discard_sequence_advances_to_next_discarder():
     assert state.current_color() == next_color
     assert state.is_discarding
     assert state.current_prompt == ActionPrompt.DISCARD
+
+
+def test_player_state_view_reads_and_writes_array():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+    color = state.colors[1]
+
+    player_deck_replenish(state, color, WHEAT, 3)
+    assert state.player_state["P1_WHEAT_IN_HAND"] == 3
+
+    state.player_state["P1_ORE_IN_HAND"] = 2
+    assert player_num_resource_cards(state, color, ORE) == 2
+
+    assert len(state.player_state) == len(dict(state.player_state))
+    assert "P1_HAS_ROAD" in state.player_state
+    assert "P2_HAS_ROAD" not in state.player_state
+    with pytest.raises(KeyError):
+        state.player_state["P0_NOT_A_FIELD"]
+
+
+def test_state_copy_does_not_share_player_state():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+    state_copy = state.copy()
+
+    player_deck_replenish(state_copy, state.colors[0], WOOD, 1)
+    assert player_num_resource_cards(state, state.colors[0], WOOD) == 0
+    assert player_num_resource_cards(state_copy, state.colors[0], WOOD) == 1
+
+
+def test_state_copy_shares_action_log_until_append():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+    color = state.colors[0]
+    apply_action(state, Action(color, ActionType.BUILD_SETTLEMENT, 3))
+    state_copy = state.copy()
+    assert state_copy.action_records is state.action_records
+
+    apply_action(state_copy, Action(color, ActionType.BUILD_ROAD, (3, 4)))
+    assert len(state.action_records) == 1
+    assert len(state_copy.action_records) == 2
+    assert state.buildings_by_color[color]["ROAD"] == []
+    assert state_copy.buildings_by_color[color]["ROAD"] == [(3, 4)]
+
+
+def test_action_log_packs_records_and_survives_pickling():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+    color = state.colors[0]
+    records = [
+        ActionRecord(Action(color, ActionType.ROLL, None), (3, 4)),
+        ActionRecord(Action(color, ActionType.MOVE_ROBBER, ((0, 0, 0), None)), None),
+        ActionRecord(Action(color, ActionType.OFFER_TRADE, (1,) + (0,) * 9), None),
+    ]
+    for record in records:
+        state.append_action_record(record)
+
+    assert isinstance(state.action_log.parent.entry, int)
+    assert state.action_log.entry == records[2]  # trades are kept unpacked
+    assert state.action_records == records
+
+    state_copy = pickle.loads(pickle.dumps(state))
+    assert state_copy.action_records == records
+    assert state_copy.pop_action_record() == records[2]
+    assert state_copy.action_records == records[:2]
+    assert state.action_records == records
+
+
+def test_action_log_records_after_returns_only_the_suffix():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+    color = state.colors[0]
+    for roll in [(1, 2), (3, 4), (5, 6), (2, 2)]:
+        state.append_action_record(
+            ActionRecord(Action(color, ActionType.ROLL, None), roll)
+        )
+
+    log = state.action_log
+    for start in range(len(log) + 1):
+        assert log.records_after(start) == log.records()[start:]
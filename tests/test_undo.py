@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from catanatron.game import Game
+from catanatron.apply_action import apply_action_with_undo
+from catanatron.models.enums import Action, ActionType
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.state import State
+
+
+def normalized_buildings(state: State):
+    return {
+        color: {key: value for key, value in buildings.items() if len(value) > 0}
+        for color, buildings in state.buildings_by_color.items()
+    }
+
+
+def assert_states_equal(state: State, expected: State):
+    assert state.player_state_array == expected.player_state_array
+    assert state.resource_freqdeck == expected.resource_freqdeck
+    assert state.development_listdeck == expected.development_listdeck
+    assert normalized_buildings(state) == normalized_buildings(expected)
+    assert state.action_records == expected.action_records
+    assert state.num_turns == expected.num_turns
+    assert state.current_player_index == expected.current_player_index
+    assert state.current_turn_index == expected.current_turn_index
+    assert state.current_prompt == expected.current_prompt
+    assert state.is_initial_build_phase == expected.is_initial_build_phase
+    assert state.is_discarding == expected.is_discarding
+    assert state.discard_counts == expected.discard_counts
+    assert state.is_moving_knight == expected.is_moving_knight
+    assert state.is_road_building == expected.is_road_building
+    assert state.free_roads_available == expected.free_roads_available
+    assert state.is_resolving_trade == expected.is_resolving_trade
+    assert state.current_trade == expected.current_trade
+    assert state.acceptees == expected.acceptees
+
+    board, expected_board = state.board, expected.board
+    assert board.buildings == expected_board.buildings
+    assert board.roads == expected_board.roads
+    assert dict(board.connected_components) == dict(expected_board.connected_components)
+    assert board.board_buildable_ids == expected_board.board_buildable_ids
+    assert board.road_lengths == expected_board.road_lengths
+    assert board.road_color == expected_board.road_color
+    assert board.road_length == expected_board.road_length
+    assert board.robber_coordinate == expected_board.robber_coordinate
+    assert board.settlement_bits == expected_board.settlement_bits
+    assert board.city_bits == expected_board.city_bits
+    assert board.road_bits == expected_board.road_bits
+    assert board.component_node_bits == expected_board.component_node_bits
+    assert board.occupied_node_bits == expected_board.occupied_node_bits
+    assert board.occupied_edge_bits == expected_board.occupied_edge_bits
+    assert board.buildable_node_bits == expected_board.buildable_node_bits
+    assert board.payouts == expected_board.payouts
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_undo_restores_copy_over_random_games(seed):
+    players = [RandomPlayer(c) for c in [Color.RED, Color.BLUE, Color.WHITE]]
+    game = Game(players, seed=seed)
+    rng = random.Random(seed)
+    while game.winning_color() is None and game.state.num_turns < 300:
+        action = rng.choice(game.playable_actions)
+        expected = game.copy()
+        rng_state, forks = game.state.rng.getstate(), game.state._forks
+
+        action_record, undo = game.execute_with_undo(action)
+        game.undo(undo)
+
+        assert_states_equal(game.state, expected.state)
+        assert game.state.rng.getstate() == rng_state
+        assert game.state._forks == forks
+        assert game.playable_actions == expected.playable_actions
+
+        game.execute(action, action_record=action_record)
+
+
+def test_failed_action_leaves_state_untouched():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=1)
+    expected = game.copy()
+    color = game.state.current_color()
+    action = Action(color, ActionType.BUY_DEVELOPMENT_CARD, None)
+
+    with pytest.raises(ValueError):
+        apply_action_with_undo(game.state, action)
+
+    assert_states_equal(game.state, expected.state)
+
+
+def test_undoing_a_roll_rewinds_the_random_stream():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=1)
+    game.advance_until(lambda g: g.playable_actions[0].action_type == ActionType.ROLL)
+    roll = game.playable_actions[0]
+    copy = game.copy()  # its stream is only created when first drawn from
+
+    for state_game in [game, copy]:
+        first_record, undo = state_game.execute_with_undo(roll)
+        state_game.undo(undo)
+        for _ in range(3):
+            action_record, undo = state_game.execute_with_undo(roll)
+            state_game.undo(undo)
+            assert action_record == first_record
+        assert state_game.execute(roll) == first_record
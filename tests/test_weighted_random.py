@@ -0,0 +1,24 @@
+from catanatron.game import Game
+from catanatron.models.player import Color
+from catanatron.players.weighted_random import (
+    WEIGHTS_BY_ACTION_TYPE,
+    WeightedRandomPlayer,
+)
+
+
+def test_weighted_random_matches_choosing_from_bloated_list():
+    game = Game([WeightedRandomPlayer(color) for color in Color], seed=0)
+    player = game.state.players[0]
+    while game.winning_color() is None and game.state.num_turns < 100:
+        seed = game.rng.getrandbits(32)
+        game.rng.seed(seed)
+
+        bloated_actions = []
+        for action in game.playable_actions:
+            weight = WEIGHTS_BY_ACTION_TYPE.get(action.action_type, 1)
+            bloated_actions.extend([action] * weight)
+        expected = game.rng.choice(bloated_actions)
+
+        game.rng.seed(seed)
+        assert player.decide(game, game.playable_actions) == expected
+        game.play_tick()
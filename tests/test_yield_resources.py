@@ -1,6 +1,10 @@
+from collections import defaultdict
+
 from catanatron.apply_action import yield_resources
+from catanatron.game import Game
 from catanatron.models.board import Board
-from catanatron.models.player import Color
+from catanatron.models.enums import CITY, RESOURCES
+from catanatron.models.player import Color, RandomPlayer
 from catanatron.models.decks import (
     freqdeck_count,
     freqdeck_draw,
@@ -92,3 +96,25 @@ def test_empty_payout_if_not_enough_resources():
     assert (
         Color.RED not in payout or freqdeck_count(payout[Color.RED], tile.resource) == 0  # type: ignore
     )
+
+
+def test_payout_index_matches_tiles():
+    game = Game([RandomPlayer(color) for color in Color], seed=0)
+    game.play()
+    board = game.state.board
+
+    for coordinate in board.map.land_tiles.keys():
+        board.robber_coordinate = coordinate
+        for number in range(2, 13):
+            expected = defaultdict(lambda: [0, 0, 0, 0, 0])
+            for tile_coordinate, tile in board.map.land_tiles.items():
+                if tile.number != number or tile_coordinate == coordinate:
+                    continue
+                for node_id in tile.nodes.values():
+                    building = board.buildings.get(node_id)
+                    if building is not None:
+                        amount = 2 if building[1] == CITY else 1
+                        expected[building[0]][RESOURCES.index(tile.resource)] += amount
+
+            payout, _ = yield_resources(board, starting_resource_bank(), number)
+            assert {c: d for c, d in payout.items() if sum(d) > 0} == expected
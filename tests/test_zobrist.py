@@ -0,0 +1,54 @@
+import pytest
+
+from catanatron.game import Game
+from catanatron.models.enums import Action, ActionType, WOOD, BRICK
+from catanatron.models.player import Color, RandomPlayer, SimplePlayer
+from catanatron.state_functions import player_deck_replenish
+from catanatron.zobrist import compute_hash
+from tests.utils import build_initial_placements
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_hash_matches_recomputed_hash(seed):
+    players = [RandomPlayer(c) for c in [Color.RED, Color.BLUE, Color.WHITE]]
+    game = Game(players, seed=seed)
+    assert game.state_hash() == compute_hash(game.state)
+    while game.winning_color() is None and game.state.num_turns < 300:
+        before = game.state_hash()
+        action = game.playable_actions[0]
+        _, undo = game.execute_with_undo(action)
+        assert game.state_hash() == compute_hash(game.state)
+        game.undo(undo)
+        assert game.state_hash() == before
+
+        game.play_tick()
+        assert game.state_hash() == compute_hash(game.state)
+
+
+def test_transpositions_have_same_hash():
+    game = Game([SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)], seed=0)
+    build_initial_placements(game)
+    color = game.state.current_color()
+    game.execute(Action(color, ActionType.ROLL, None))
+    while game.state.current_color() != color or game.state.is_moving_knight:
+        game.execute(game.playable_actions[0])
+    player_deck_replenish(game.state, color, WOOD, 2)
+    player_deck_replenish(game.state, color, BRICK, 2)
+
+    first = game.copy()
+    first.execute(Action(color, ActionType.BUILD_ROAD, (2, 3)), validate_action=False)
+    first.execute(Action(color, ActionType.BUILD_ROAD, (1, 6)), validate_action=False)
+    second = game.copy()
+    second.execute(Action(color, ActionType.BUILD_ROAD, (1, 6)), validate_action=False)
+    second.execute(Action(color, ActionType.BUILD_ROAD, (2, 3)), validate_action=False)
+
+    assert first.state_hash() == second.state_hash()
+    assert first.state_hash() != game.state_hash()
+
+
+def test_player_state_view_writes_update_hash():
+    game = Game([SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)], seed=0)
+    before = game.state_hash()
+    game.state.player_state["P0_WOOD_IN_HAND"] = 3
+    assert game.state_hash() != before
+    assert game.state_hash() == compute_hash(game.state)
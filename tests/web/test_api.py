@@ -1,7 +1,7 @@
 import pytest
 import json
 from catanatron.web import create_app
-from catanatron.web.models import db, GameState, get_game_state
+from catanatron.web.models import db, GameState, get_game_state, upsert_game_state
 
 
 @pytest.fixture
@@ -116,6 +116,29 @@ def test_get_latest_game_endpoint(client):
     assert data["winning_color"] is None
 
 
+def test_get_game_endpoint_replays_states_not_stored(client):
+    post_response = client.post("/api/games", json={"players": ["RANDOM", "RANDOM"]})
+    game_id = json.loads(post_response.data)["game_id"]
+    with client.application.app_context():
+        game = get_game_state(game_id)
+        for _ in range(30):
+            game.play_tick()
+        expected = game.copy()
+        while game.winning_color() is None:
+            game.play_tick()
+        upsert_game_state(game)
+
+        replayed = get_game_state(game_id, 30)
+        assert replayed.state.action_records == expected.state.action_records
+        assert replayed.state.hash == expected.state.hash
+
+    response = client.get(f"/api/games/{game_id}/states/30")
+    assert response.status_code == 200
+    assert len(json.loads(response.data)["action_records"]) == 30
+    response = client.get(f"/api/games/{game_id}/states/{10**6}")
+    assert response.status_code == 404
+
+
 def test_get_game_not_found(client):
     """Test retrieving a non-existent game."""
     response = client.get("/api/games/nonexistentgameid/states/0")
@@ -151,9 +174,12 @@ def test_repeated_bot_actions_advance_latest_state(client):
     second_tick = json.loads(client.post(f"/api/games/{game_id}/actions", json={}).data)
     latest_after = json.loads(client.get(f"/api/games/{game_id}/states/latest").data)
 
-    assert first_tick["state_index"] == latest_before["state_index"] + 1
-    assert second_tick["state_index"] == first_tick["state_index"] + 1
-    assert len(second_tick["action_records"]) == len(first_tick["action_records"]) + 1
+    # each post plays the whole bot turn, until another color must decide
+    assert first_tick["state_index"] > latest_before["state_index"]
+    assert second_tick["state_index"] > first_tick["state_index"]
+    assert first_tick["current_color"] != latest_before["current_color"]
+    assert second_tick["current_color"] != first_tick["current_color"]
+    assert len(second_tick["action_records"]) == second_tick["state_index"]
     assert latest_after["state_index"] == second_tick["state_index"]
     assert latest_after["action_records"] == second_tick["action_records"]
 
@@ -173,6 +199,28 @@ def test_mcts_analysis_endpoint(client):
     assert len(data["probabilities"]) == 2  # For two players
 
 
+def test_mcts_analysis_uses_configured_budget(app, client, monkeypatch):
+    from catanatron.web import api
+
+    analyzers = []
+
+    class RecordingAnalyzer(api.GameAnalyzer):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            analyzers.append(self)
+
+    monkeypatch.setattr(api, "GameAnalyzer", RecordingAnalyzer)
+    app.config.update(MCTS_ANALYSIS_SIMULATIONS=50, MCTS_ANALYSIS_TIME_BUDGET_MS=10)
+    post_response = client.post("/api/games", json={"players": ["RANDOM", "RANDOM"]})
+    game_id = json.loads(post_response.data)["game_id"]
+
+    response = client.get(f"/api/games/{game_id}/states/latest/mcts-analysis")
+    assert response.status_code == 200
+    [analyzer] = analyzers
+    assert analyzer.num_simulations == 50
+    assert analyzer.time_budget_ms == 10
+
+
 def test_mcts_analysis_game_not_found(client):
     """Test MCTS analysis for a non-existent game."""
     response = client.get("/api/games/nonexistent/states/nonexistent/mcts-analysis")